@@ -0,0 +1,275 @@
+"""
+Benchmarks of the graph implementations in graphs.py.
+
+neighbors: like_component on every graph implementation, with the
+current version (which walks the out-neighbors of every vertex with
+iter_out_neighbors) and with the previous one (which built a new set
+with out_neighbors for every vertex), on a Go board graph (low degree)
+and on a dense random graph (high degree). Every run is done twice:
+once to measure its running time, and once with tracemalloc enabled to
+measure the memory it uses on top of its result (tracing slows the
+code down, so it would distort the times).
+
+hubs: adjacency lists in their default mode (neighbors kept in lists)
+and in unique mode (neighbors kept in dicts), on a graph where a few hub
+vertices have a very high out-degree: building it (with every edge
+connected twice), then checking, removing, and adding back some of the
+edges of the hubs.
+
+build: building a random graph by connecting its edges one at a time,
+and with from_edges (from pairs of labels, and from arrays of vertex
+ids), for every graph implementation.
+
+Usage:
+    python3 benchmark.py neighbors [BOARD_SIZE [DENSE_VERTICES]]
+    python3 benchmark.py hubs [DEGREE [QUERIES]]
+    python3 benchmark.py build [NUM_VERTICES [NUM_EDGES]]
+"""
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from array import array
+from typing import Any, Callable
+
+from graphs import Graph, AdjacencyListDigraph, AdjacencyMatrixDigraph, \
+    CSRDigraph
+from hw3 import GoBoard, go_graph, like_component
+
+
+def measure(func: Callable[[], object]) -> tuple[float, int]:
+    """
+    Measures the running time of a function, and the temporary memory
+    it uses (the difference between its peak memory use and the memory
+    still in use when it returns, that is, its result).
+
+    Inputs:
+      func, the function to measure
+
+    Returns: the time in seconds, and the temporary memory in bytes
+    """
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+        del result
+    finally:
+        tracemalloc.stop()
+    return seconds, peak - current
+
+
+def copying_like_component(g: Graph, src: str) -> set[str]:
+    """
+    The previous version of like_component, which calls out_neighbors
+    (and so builds a new set) for every vertex it visits.
+    """
+    like = set([src])
+    stack = [src]
+    value = g.get_value(src)
+
+    while stack:
+        vertex = stack.pop()
+        for neigh in g.out_neighbors(vertex):
+            if g.get_value(neigh) == value and neigh not in like:
+                like.add(neigh)
+                stack.append(neigh)
+
+    return like
+
+
+def dense_graph(num_vertices: int, degree: int,
+                seed: int = 0) -> AdjacencyListDigraph:
+    """
+    Inputs:
+      num_vertices, the number of vertices
+      degree, the number of (distinct) out-neighbors of every vertex
+      seed, the seed of the random choice of neighbors
+
+    Returns: a random graph where every vertex has the same value
+    """
+    rng = random.Random(seed)
+    labels = [str(i) for i in range(num_vertices)]
+    g = AdjacencyListDigraph(labels)
+    for src in labels:
+        for dst in rng.sample(labels, degree):
+            g.connect(src, dst)
+        g.set_value(src, True)
+    return g
+
+
+def packed_matrix(g: Graph) -> AdjacencyMatrixDigraph:
+    """
+    Inputs:
+      g, a graph
+
+    Returns: the same graph as a packed adjacency matrix (unpacked
+    matrices of the sizes used here do not fit in memory)
+    """
+    matrix = AdjacencyMatrixDigraph(list(g.vertex_labels), packed=True)
+    for src, dst in g.edges:
+        matrix.connect(src, dst)
+    for vertex in g.vertex_labels:
+        matrix.set_value(vertex, g.get_value(vertex))
+    return matrix
+
+
+def benchmark_neighbors(board_size: int, dense_vertices: int) -> None:
+    """
+    Prints the time and temporary memory use of like_component
+    (current and previous versions) on every graph implementation.
+
+    Inputs:
+      board_size, the side of the (empty) Go board of the first graph
+      dense_vertices, the number of vertices of the dense graph (every
+        vertex has a quarter of the vertices as out-neighbors)
+    """
+    sources = {
+        f"go board {board_size}x{board_size}":
+            (go_graph(GoBoard(board_size)), "0:0"),
+        f"dense {dense_vertices} vertices":
+            (dense_graph(dense_vertices, dense_vertices // 4), "0"),
+    }
+    print(f"{'graph':<26}{'implementation':<16}{'version':<10}"
+          f"{'seconds':>10}{'temp KB':>10}")
+    for name, (graph, src) in sources.items():
+        for kind, g in [("list", graph), ("packed matrix",
+                                                packed_matrix(graph)),
+                        ("csr", graph.to_csr())]:
+            for version, func in [("previous", copying_like_component),
+                                  ("current", like_component)]:
+                seconds, temp = measure(lambda: func(g, src))
+                print(f"{name:<26}{kind:<16}{version:<10}"
+                      f"{seconds:>10.4f}{temp / 1024:>10.1f}")
+
+
+def benchmark_hubs(degree: int, queries: int, num_hubs: int = 4,
+                   seed: int = 0) -> None:
+    """
+    Prints the time taken by connect, connected, and disconnect on
+    the hubs of a graph, for adjacency lists in default and unique
+    mode.
+
+    Inputs:
+      degree, the out-degree of every hub
+      queries, the number of edges checked (and then removed and added
+        back) per hub
+      num_hubs, the number of hubs
+      seed, the seed of the random choice of edges
+    """
+    labels = [str(i) for i in range(degree)]
+    hubs = labels[:num_hubs]
+    rng = random.Random(seed)
+    checked = [(hub, rng.choice(labels)) for hub in hubs
+               for _ in range(queries)]
+
+    print(f"{num_hubs} hubs with out-degree {degree}, "
+          f"{queries} queries per hub")
+    print(f"{'mode':<10}{'operation':<20}{'seconds':>10}{'edges':>10}")
+    for mode, unique in [("list", False), ("unique", True)]:
+        g = AdjacencyListDigraph(labels, unique=unique)
+
+        def build() -> None:
+            for _ in range(2):
+                for hub in hubs:
+                    for dst in labels:
+                        g.connect(hub, dst)
+
+        def check() -> None:
+            for src, dst in checked:
+                g.connected(src, dst)
+
+        def remove() -> None:
+            for src, dst in checked:
+                g.disconnect(src, dst)
+
+        def add_back() -> None:
+            for src, dst in checked:
+                g.connect(src, dst)
+
+        for name, func in [("connect (x2)", build), ("connected", check),
+                           ("disconnect", remove),
+                           ("connect again", add_back)]:
+            gc.collect()
+            start = time.perf_counter()
+            func()
+            seconds = time.perf_counter() - start
+            print(f"{mode:<10}{name:<20}{seconds:>10.4f}{g.num_edges:>10}")
+
+
+def benchmark_build(num_vertices: int, num_edges: int,
+                    seed: int = 0) -> None:
+    """
+    Prints the time taken to build a random graph with every graph
+    implementation, one edge at a time and with from_edges.
+
+    Inputs:
+      num_vertices, the number of vertices
+      num_edges, the number of edges
+      seed, the seed of the random choice of edges
+    """
+    rng = random.Random(seed)
+    labels = [str(i) for i in range(num_vertices)]
+    src_ids = array("i", (rng.randrange(num_vertices)
+                          for _ in range(num_edges)))
+    dst_ids = array("i", (rng.randrange(num_vertices)
+                          for _ in range(num_edges)))
+    pairs = [(labels[i], labels[j]) for i, j in zip(src_ids, dst_ids)]
+
+    implementations: list[tuple[str, Callable[[], Graph], Any]] = [
+        ("list", lambda: AdjacencyListDigraph(labels),
+         AdjacencyListDigraph.from_edges),
+        ("unique", lambda: AdjacencyListDigraph(labels, unique=True),
+         lambda labels, edges: AdjacencyListDigraph.from_edges(
+             labels, edges, unique=True)),
+        ("packed matrix",
+         lambda: AdjacencyMatrixDigraph(labels, packed=True),
+         lambda labels, edges: AdjacencyMatrixDigraph.from_edges(
+             labels, edges, packed=True)),
+        ("csr", lambda: AdjacencyListDigraph(labels),
+         CSRDigraph.from_edges),
+    ]
+
+    print(f"{num_vertices} vertices, {num_edges} edges")
+    print(f"{'implementation':<16}{'method':<24}{'seconds':>10}")
+    for kind, empty, from_edges in implementations:
+        def connect_all() -> Graph:
+            g = empty()
+            for src, dst in pairs:
+                g.connect(src, dst)
+            # CSR graphs can only be built from another graph
+            return g.to_csr() if kind == "csr" else g
+
+        for method, func in [
+                ("connect" + (" + to_csr" if kind == "csr" else ""),
+                 connect_all),
+                ("from_edges (labels)", lambda: from_edges(labels, pairs)),
+                ("from_edges (ids)",
+                 lambda: from_edges(labels, (src_ids, dst_ids)))]:
+            gc.collect()
+            start = time.perf_counter()
+            func()
+            seconds = time.perf_counter() - start
+            print(f"{kind:<16}{method:<24}{seconds:>10.4f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or \
+            sys.argv[1] not in ("neighbors", "hubs", "build") or \
+            not all(arg.isdigit() for arg in sys.argv[2:]):
+        print(__doc__.split("Usage:")[1].rstrip())
+        sys.exit(1)
+
+    numbers = [int(arg) for arg in sys.argv[2:4]]
+    if sys.argv[1] == "neighbors":
+        benchmark_neighbors(*numbers + [200, 2000][len(numbers):])
+    elif sys.argv[1] == "hubs":
+        benchmark_hubs(*numbers + [100000, 1000][len(numbers):])
+    else:
+        benchmark_build(*numbers + [20000, 1000000][len(numbers):])
@@ -3,7 +3,173 @@ CMSC 14200, Spring 2024
 Homework #3
 """
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from array import array
+from collections import defaultdict, deque
+from itertools import accumulate, chain, compress, repeat
+from operator import itemgetter
+from typing import (AbstractSet, Any, Iterable, Iterator, Optional, Sequence,
+                    Union, cast)
+
+# Positions of the bits set in every possible byte
+_BYTE_BITS = [tuple(bit for bit in range(8) if byte >> bit & 1)
+              for byte in range(256)]
+
+# Bitsets with fewer bits set than this are walked one bit at a time
+# (a few operations on the whole bitset per bit, at C speed) instead of
+# one byte at a time
+_SPARSE_BITS = 128
+
+# CSR rows shorter than this are copied and searched with "in" (cheaper
+# than a search in place for short rows); longer ones are searched in
+# place, so that checking an edge of a hub does not copy its whole row
+_SHORT_ROW = 64
+
+
+def _set_bits(data: bytes | bytearray | memoryview) -> Iterator[int]:
+    """
+    Yields the positions of the bits set in a little-endian bitset
+    (bit j is bit j % 8 of byte j // 8), in increasing order.
+
+    Inputs:
+      data, the bytes of the bitset
+
+    Returns: an iterator of ints
+    """
+    bits = int.from_bytes(data, "little")
+    if bits.bit_count() < _SPARSE_BITS:
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+        return
+
+    for index, byte in enumerate(data):
+        if byte:
+            base = index * 8
+            for bit in _BYTE_BITS[byte]:
+                yield base + bit
+
+
+# Edges given to from_edges and connect_many: either (source,
+# destination) pairs of labels, or a tuple with two sequences of vertex
+# ids (see _id_arrays)
+Edges = Union[Iterable[tuple[str, str]], tuple[Sequence[int], Sequence[int]]]
+
+
+def _id_arrays(edges: Edges) \
+        -> Optional[tuple[Sequence[int], Sequence[int]]]:
+    """
+    Tells edges given as two sequences of vertex ids (the ids of the
+    sources and the ids of the destinations) from edges given as pairs
+    of labels.
+
+    Inputs:
+      edges, the edges
+
+    Returns: the two sequences of ids, or None if the edges are pairs
+    of labels
+    """
+    if not isinstance(edges, tuple) or len(edges) != 2:
+        return None
+    for ids in edges:
+        if not isinstance(ids, Sequence) or isinstance(ids, (str, tuple)) \
+                or (len(ids) > 0 and not isinstance(ids[0], int)):
+            return None
+    return cast(tuple[Sequence[int], Sequence[int]], edges)
+
+
+def _check_ids(src_ids: Sequence[int], dst_ids: Sequence[int],
+               num_vertices: int) -> None:
+    """
+    Checks that two sequences of vertex ids describe edges of a graph.
+
+    Inputs:
+      src_ids, dst_ids, the ids of the sources and destinations
+      num_vertices, the number of vertices of the graph
+
+    Raises:
+        ValueError if the sequences have different lengths, or if one
+        of the ids is not the id of a vertex
+    """
+    if len(src_ids) != len(dst_ids):
+        raise ValueError("There must be as many sources as destinations.")
+    for ids in (src_ids, dst_ids):
+        if len(ids) > 0 and (min(ids) < 0 or max(ids) >= num_vertices):
+            raise ValueError("Invalid vertex id.")
+
+
+def _label_lists(edges: Iterable[tuple[str, str]],
+                 vertices: Iterable[str]) -> tuple[list[str], list[str]]:
+    """
+    Splits edges given as pairs of labels into their sources and their
+    destinations, checking every label at once.
+
+    Inputs:
+      edges, (source, destination) pairs of labels
+      vertices, the labels of the vertices of the graph (for instance,
+        a dictionary with them as keys)
+
+    Returns: the labels of the sources, and of the destinations
+
+    Raises:
+        ValueError if one of the labels is not in the graph
+    """
+    pairs = edges if isinstance(edges, list) else list(edges)
+    srcs = list(map(itemgetter(0), pairs))
+    dsts = list(map(itemgetter(1), pairs))
+    unknown = set(srcs).union(dsts).difference(vertices)
+    if unknown:
+        raise ValueError(f"Vertex '{min(unknown)}' not in the graph")
+    return srcs, dsts
+
+
+def _consume(iterator: Iterator[Any]) -> None:
+    """
+    Runs an iterator to the end, discarding what it produces (without
+    a Python-level loop: this is how the bulk operations below apply a
+    method to every edge, using map).
+
+    Inputs:
+      iterator, the iterator
+    """
+    deque(iterator, maxlen=0)
+
+
+def _extend_adjacency(adjacency: dict[str, list[str] | dict[str, None]],
+                      srcs: list[str], dsts: list[str], unique: bool) -> int:
+    """
+    Adds edges to the adjacency lists (or dicts) of an
+    AdjacencyListDigraph.
+
+    Inputs:
+      adjacency, dictionary mapping every vertex to its neighbors
+      srcs, dsts, the labels of the sources and destinations of the
+        edges (already checked)
+      unique, whether the neighbors are kept in dicts (and edges that
+        are already there are skipped)
+
+    Returns: the number of edges added
+    """
+    if not unique:
+        lists = cast(dict[str, list[str]], adjacency)
+        for src, dst in zip(srcs, dsts):
+            lists[src].append(dst)
+        return len(srcs)
+
+    # Group the edges by source, so that every neighbor dict is updated
+    # once
+    grouped: defaultdict[str, list[str]] = defaultdict(list)
+    for src, dst in zip(srcs, dsts):
+        grouped[src].append(dst)
+    added = 0
+    for src, new in grouped.items():
+        neigh = adjacency[src]
+        if isinstance(neigh, dict):
+            before = len(neigh)
+            neigh.update(dict.fromkeys(new))
+            added += len(neigh) - before
+    return added
+
 
 class Graph(ABC):
     """ Abstract class for graphs """
@@ -31,22 +197,25 @@ class Graph(ABC):
         raise NotImplementedError
     @property
     @abstractmethod
-    def vertex_labels(self) -> set[str]:
+    def vertex_labels(self) -> AbstractSet[str]:
         """
         Inputs: (nothing)
 
-        Returns: the set of all vertex labels in the graph.
+        Returns: the set of all vertex labels in the graph. The set
+        must not be modified.
         """
         raise NotImplementedError
 
     @property
     @abstractmethod
-    def edges(self) -> set[tuple[str, str]]:
+    def edges(self) -> AbstractSet[tuple[str, str]]:
         """
         Inputs: (nothing)
 
         Returns: the set of all edges in the graph. Each edge is a
-        tuple of labels in (source, destination) order.
+        tuple of labels in (source, destination) order. The set must
+        not be modified (it may be shared by later calls until the
+        graph changes).
         """
         raise NotImplementedError
 
@@ -67,7 +236,82 @@ class Graph(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def disconnect(self, src: str, dst: str) -> None:
+        """
+        Removes an edge from the graph (every copy of it, if it was
+        added more than once). Does nothing if there is no such edge.
+
+        Inputs:
+           src, the label of the origin of the edge
+           dst, the label of the destination of the edge
+
+        Returns: (nothing)
+
+        Raises:
+            ValueError if src or dst not in the graph
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def from_edges(cls, vertex_labels: list[str], edges: Edges) -> 'Graph':
+        """
+        Builds a graph with the given vertices and edges (the values
+        at the vertices are None). The graphs in this module do this
+        much faster than connecting the edges one at a time; by
+        default, the graph is built with cls(vertex_labels) and its
+        edges are added with connect_many.
+
+        Inputs:
+          vertex_labels, the labels of the vertices
+          edges, either an iterable of (source, destination) pairs of
+            labels, or a tuple with two sequences of ints (for instance,
+            arrays): the ids of the sources and the ids of the
+            destinations, where the id of a vertex is its position in
+            vertex_labels
+
+        Returns: a graph
+
+        Raises:
+            ValueError if an edge has a vertex that is not in the graph
+        """
+        id_arrays = _id_arrays(edges)
+        if id_arrays is not None:
+            _check_ids(*id_arrays, len(vertex_labels))
+            edges = list(zip(map(vertex_labels.__getitem__, id_arrays[0]),
+                             map(vertex_labels.__getitem__, id_arrays[1])))
+        graph = cls(vertex_labels)  # type: ignore[call-arg]
+        graph.connect_many(edges)
+        return graph
+
+    def connect_many(self, edges: Edges) -> None:
+        """
+        Adds edges to the graph. The edges are all checked before any
+        of them is added, so nothing is added if one of them is invalid.
+
+        By default, the edges are then added with connect, one at a
+        time, and only pairs of labels are accepted (vertex ids need
+        the order the vertices were given in, which is up to every
+        implementation to keep).
 
+        Inputs:
+          edges, the edges, in one of the forms taken by from_edges
+            (vertex ids are positions in the list of labels the graph
+            was built with)
+
+        Returns: (nothing)
+
+        Raises:
+            ValueError if an edge has a vertex that is not in the graph
+            TypeError if the edges are given as vertex ids and the
+            graph does not support them
+        """
+        if _id_arrays(edges) is not None:
+            raise TypeError(f"{type(self).__name__} does not support "
+                            "edges given as vertex ids.")
+        srcs, dsts = _label_lists(
+            cast(Iterable[tuple[str, str]], edges), self.vertex_labels)
+        _consume(map(self.connect, srcs, dsts))
 
     @abstractmethod
     def connected(self, src: str, dst: str) -> bool:
@@ -100,6 +344,89 @@ class Graph(ABC):
         """
         raise NotImplementedError
 
+    def iter_out_neighbors(self, src: str) -> Iterator[str]:
+        """
+        Iterates over the labels of the vertices directly connected
+        to src by an edge originating at src, without building a set
+        (unlike out_neighbors). A vertex may be produced more than
+        once if there are repeated edges to it. The graph must not be
+        changed while iterating.
+
+        Inputs:
+          src, a vertex label
+
+        Returns: an iterator of strings
+
+        Raises:
+            ValueError if src not in the graph
+        """
+        return iter(self.out_neighbors(src))
+
+    def out_degree(self, src: str) -> int:
+        """
+        Inputs:
+          src, a vertex label
+
+        Returns: the number of edges originating at src.
+
+        Raises:
+            ValueError if src not in the graph
+        """
+        return len(self.out_neighbors(src))
+
+    def out_neighbors_many(self, vertices: Iterable[str]) -> set[str]:
+        """
+        Returns the set of the labels of all vertices directly
+        connected by an edge to at least one of the given vertices
+        (for instance, the next frontier of a breadth-first search).
+
+        Inputs:
+          vertices, vertex labels
+
+        Returns: a set of strings
+
+        Raises:
+            ValueError if one of the vertices is not in the graph
+        """
+        neighbors: set[str] = set()
+        for vertex in vertices:
+            neighbors.update(self.iter_out_neighbors(vertex))
+        return neighbors
+
+    def in_neighbors(self, dst: str) -> set[str]:
+        """
+        Returns the set of the labels of all vertices that have an edge
+        to dst. Unless the graph keeps a reverse index, this checks
+        every vertex of the graph.
+
+        Inputs:
+          dst, a vertex label
+
+        Returns: a set of strings
+
+        Raises:
+            ValueError if dst not in the graph
+        """
+        if dst not in self.vertex_labels:
+            raise ValueError(f"Vertex '{dst}' not in the graph")
+        return {src for src in self.vertex_labels if self.connected(src, dst)}
+
+    def in_degree(self, dst: str) -> int:
+        """
+        Inputs:
+          dst, a vertex label
+
+        Returns: the number of edges ending at dst (checking every edge
+        of the graph, unless the graph keeps a reverse index).
+
+        Raises:
+            ValueError if dst not in the graph
+        """
+        if dst not in self.vertex_labels:
+            raise ValueError(f"Vertex '{dst}' not in the graph")
+        return sum(1 for src in self.vertex_labels
+                   for neigh in self.iter_out_neighbors(src) if neigh == dst)
+
     @abstractmethod
     def get_value(self, vertex: str) -> Any:
         """
@@ -153,137 +480,516 @@ class Graph(ABC):
         Returns: an AdjacencyMatrixDigraph.
         """
         raise NotImplementedError
+
+    def to_csr(self) -> 'CSRDigraph':
+        """
+        Return the same graph in compressed sparse row form.
+
+        Inputs: (nothing)
+
+        Returns: a CSRDigraph.
+        """
+        labels = list(self.vertex_labels)
+        ids = {label: i for i, label in enumerate(labels)}
+        offsets = array("q", [0]) * (len(labels) + 1)
+        targets = array("i")
+        for i, src in enumerate(labels):
+            targets.extend([ids[dst] for dst in self.out_neighbors(src)])
+            offsets[i + 1] = len(targets)
+        return CSRDigraph(labels, offsets, targets,
+                          [self.get_value(label) for label in labels])
     
 
 class AdjacencyListDigraph(Graph):
-    """ Adjacency list implementation of graphs """
+    """
+    Adjacency list implementation of graphs
+
+    By default, the out-neighbors of a vertex are kept in a list, in
+    the order the edges were added, and connecting the same vertices
+    twice adds a second copy of the edge. In unique mode, they are kept
+    in an (insertion-ordered) dict instead: connect ignores edges that
+    are already in the graph, and connected and disconnect take constant
+    time whatever the degree of the vertex.
+
+    With a reverse index, the in-neighbors of every vertex are also kept
+    (in the same kind of list or dict), so that in_neighbors and
+    in_degree do not have to check every vertex.
+    """
 
-    _neighbors:     dict[str,list[str]]
+    _neighbors:     dict[str, list[str] | dict[str, None]]
+    _predecessors:  Optional[dict[str, list[str] | dict[str, None]]]
+    _unique:        bool
     _vertex_values: dict[str,Any]
+    _num_edges:     int
+    _label_set:     Optional[frozenset[str]]
+    _edge_set:      Optional[frozenset[tuple[str, str]]]
 
-    def __init__(self, vertex_labels:list[str]):
+    def __init__(self, vertex_labels:list[str], unique: bool = False,
+                 reverse: bool = False):
+        """
+        Inputs:
+          vertex_labels, the labels of the vertices
+          unique, whether to keep a single copy of every edge
+          reverse, whether to keep a reverse index
+        """
         super().__init__()
         self._neighbors = {}
+        self._predecessors = None
+        if reverse:
+            self._predecessors = {vertex: {} if unique else []
+                                  for vertex in vertex_labels}
+        self._unique = unique
         self._vertex_values = {}
+        self._num_edges = 0
+        self._label_set = None
+        self._edge_set = None
         for vertex in vertex_labels:
-                self._neighbors[vertex] = []
+                self._neighbors[vertex] = {} if unique else []
                 self._vertex_values[vertex] = None
+
+    @property
+    def unique(self) -> bool:
+        """
+        Whether the graph keeps a single copy of every edge.
+        """
+        return self._unique
+
+    @property
+    def reverse(self) -> bool:
+        """
+        Whether the graph keeps a reverse index.
+        """
+        return self._predecessors is not None
        
     @property
-    def num_vertices(self):
+    def num_vertices(self) -> int:
         return len(self._neighbors)
     @property
-    def num_edges(self):
-        return sum(len(neigh) for neigh in self._neighbors.values())
+    def num_edges(self) -> int:
+        return self._num_edges
     @property
-    def vertex_labels(self):
-        return set(self._vertex_values.keys())
+    def vertex_labels(self) -> AbstractSet[str]:
+        if self._label_set is None:
+            self._label_set = frozenset(self._vertex_values)
+        return self._label_set
     @property
-    def edges(self):
-        edge_set = set()
-        for src, neigh in self._neighbors.items():
-            for dst in neigh:
-                edge_set.add((src,dst))
-        return edge_set
+    def edges(self) -> AbstractSet[tuple[str, str]]:
+        if self._edge_set is None:
+            self._edge_set = frozenset(
+                (src, dst) for src, neigh in self._neighbors.items()
+                for dst in neigh)
+        return self._edge_set
+
 
+    def connect(self, src: str, dst: str) -> None:
+        if src not in self._vertex_values:
+            raise ValueError(f"Source vertex {src} does not exist.")
+        if dst not in self._vertex_values:
+            raise ValueError(f"Destination vertex {dst} does not exist.")
+        neigh = self._neighbors[src]
+        if isinstance(neigh, dict):
+            if dst in neigh:
+                return
+            neigh[dst] = None
+        else:
+            neigh.append(dst)
+        if self._predecessors is not None:
+            preds = self._predecessors[dst]
+            if isinstance(preds, dict):
+                preds[src] = None
+            else:
+                preds.append(src)
+        self._num_edges += 1
+        self._edge_set = None
 
-    def connect(self, src, dst):
+    def disconnect(self, src: str, dst: str) -> None:
         if src not in self._vertex_values:
             raise ValueError(f"Source vertex {src} does not exist.")
         if dst not in self._vertex_values:
             raise ValueError(f"Destination vertex {dst} does not exist.")
-        self._neighbors[src].append(dst)
+        neigh = self._neighbors[src]
+        if isinstance(neigh, dict):
+            if dst not in neigh:
+                return
+            del neigh[dst]
+            copies = 1
+        else:
+            copies = neigh.count(dst)
+            if not copies:
+                return
+            for _ in range(copies):
+                neigh.remove(dst)
+        if self._predecessors is not None:
+            preds = self._predecessors[dst]
+            if isinstance(preds, dict):
+                del preds[src]
+            else:
+                for _ in range(copies):
+                    preds.remove(src)
+        self._num_edges -= copies
+        self._edge_set = None
+
+    @classmethod
+    def from_edges(cls, vertex_labels: list[str], edges: Edges,
+                   unique: bool = False,
+                   reverse: bool = False) -> 'AdjacencyListDigraph':
+        """
+        See Graph.from_edges (unique and reverse are passed on to the
+        constructor).
+        """
+        graph = cls(vertex_labels, unique, reverse)
+        graph.connect_many(edges)
+        return graph
+
+    def connect_many(self, edges: Edges) -> None:
+        id_arrays = _id_arrays(edges)
+        if id_arrays is None:
+            srcs, dsts = _label_lists(
+                cast(Iterable[tuple[str, str]], edges), self._neighbors)
+        else:
+            labels = list(self._neighbors)
+            _check_ids(*id_arrays, len(labels))
+            srcs = list(map(labels.__getitem__, id_arrays[0]))
+            dsts = list(map(labels.__getitem__, id_arrays[1]))
+
+        added = _extend_adjacency(self._neighbors, srcs, dsts, self._unique)
+        if self._predecessors is not None:
+            _extend_adjacency(self._predecessors, dsts, srcs, self._unique)
+        if added:
+            self._num_edges += added
+            self._edge_set = None
    
-    def connected(self, src, dst):
+    def connected(self, src: str, dst: str) -> bool:
         if src not in self._neighbors:
             raise ValueError("Source vertex not in the graph")
         if dst not in self._neighbors:
             raise ValueError("Destination vertex not in the graph")
         return dst in self._neighbors.get(src, [])
     
-    def out_neighbors(self, src):
+    def out_neighbors(self, src: str) -> set[str]:
        return set(self._neighbors.get(src,[]))
 
+    def iter_out_neighbors(self, src: str) -> Iterator[str]:
+        if src not in self._neighbors:
+            raise ValueError(f"Vertex '{src}' not in the graph")
+        return iter(self._neighbors[src])
+
+    def out_degree(self, src: str) -> int:
+        if src not in self._neighbors:
+            raise ValueError(f"Vertex '{src}' not in the graph")
+        return len(self._neighbors[src])
+
+    def in_neighbors(self, dst: str) -> set[str]:
+        if self._predecessors is None:
+            return super().in_neighbors(dst)
+        if dst not in self._predecessors:
+            raise ValueError(f"Vertex '{dst}' not in the graph")
+        return set(self._predecessors[dst])
+
+    def in_degree(self, dst: str) -> int:
+        if self._predecessors is None:
+            return super().in_degree(dst)
+        if dst not in self._predecessors:
+            raise ValueError(f"Vertex '{dst}' not in the graph")
+        return len(self._predecessors[dst])
+
     
-    def get_value(self, vertex):
+    def get_value(self, vertex: str) -> Any:
         if vertex not in self._vertex_values:
             raise KeyError(f"Vertex '{vertex}' does not exist in the graph.")
         return self._vertex_values.get(vertex)
     
-    def set_value(self, vertex, value):
+    def set_value(self, vertex: str, value: Any) -> None:
         if vertex not in self._vertex_values:
             raise KeyError(f"Vertex '{vertex}' does not exist in the graph.")
         self._vertex_values[vertex] = value
 
-    def to_adj_list(self):
+    def to_adj_list(self) -> 'AdjacencyListDigraph':
         return self
     
-    def to_adj_matrix(self):
-        matrix_graph = AdjacencyMatrixDigraph(self.vertex_labels)
+    def to_adj_matrix(self) -> 'AdjacencyMatrixDigraph':
+        matrix_graph = AdjacencyMatrixDigraph(list(self._neighbors))
 
         for src in self._neighbors:
             for dst in self._neighbors[src]:
                 matrix_graph.connect(src, dst)
+            matrix_graph.set_value(src, self._vertex_values[src])
 
         return matrix_graph
 
+    def to_csr(self) -> 'CSRDigraph':
+        ids = {label: i for i, label in enumerate(self._neighbors)}
+        offsets = array("q", [0]) * (len(ids) + 1)
+        targets = array("i")
+        for i, neigh in enumerate(self._neighbors.values()):
+            targets.extend(map(ids.__getitem__, neigh))
+            offsets[i + 1] = len(targets)
+        return CSRDigraph(list(ids), offsets, targets,
+                          list(self._vertex_values.values()))
+
 class AdjacencyMatrixDigraph(Graph):
-    """ Adjacency matrix implementation of graphs """
+    """
+    Adjacency matrix implementation of graphs
 
-    _labels_to_ints: dict[str, int]
-    _ints_to_labels: list[str]
-    _adjacency:      list[list[bool]]
+    In packed mode, the matrix takes one bit per cell (instead of a
+    list entry per cell): row i is stored as (num_vertices + 7) // 8
+    bytes of a single bytearray, with bit j of the row set if there is
+    an edge from vertex i to vertex j. This makes dense graphs with tens
+    of thousands of vertices fit in a few hundred MB, and lets whole
+    rows be combined at once (see out_neighbors_union and
+    out_neighbors_intersection).
+
+    With a reverse index, the transposed matrix is also kept (in the
+    same form), so that in_neighbors and in_degree read a row of it
+    instead of a column of the matrix.
+    """
+
+    _labels_to_ints:    dict[str, int]
+    _ints_to_labels:    list[str]
+    _adjacency:         list[list[bool]]
+    _reverse_adjacency: list[list[bool]]
+    _bits:              bytearray
+    _reverse_bits:      bytearray
+    _row_size:          int
+    _packed:            bool
+    _reverse:           bool
     _vertex_values:  dict[str, Any]
+    _num_edges:      int
+    _label_set:      Optional[frozenset[str]]
+    _edge_set:       Optional[frozenset[tuple[str, str]]]
 
-    def __init__(self, vertex_labels: list[str]):
+    def __init__(self, vertex_labels: list[str], packed: bool = False,
+                 reverse: bool = False):
+        """
+        Inputs:
+          vertex_labels, the labels of the vertices
+          packed, whether to store the matrix with one bit per cell
+          reverse, whether to keep a reverse index
+        """
         super().__init__()
         self._vertex_values = {}
         self._labels_to_ints = {}
         self._ints_to_labels = vertex_labels
+        self._packed = packed
+        self._reverse = reverse
+        self._num_edges = 0
+        self._label_set = None
+        self._edge_set = None
 
         for index, label in enumerate(vertex_labels):
             self._vertex_values[label] = None
             self._labels_to_ints[label] = index
 
         size = len(vertex_labels)
-        self._adjacency = [[False] * size for _ in range(size)]
+        self._adjacency, self._reverse_adjacency = [], []
+        self._bits, self._reverse_bits = bytearray(), bytearray()
+        if packed:
+            self._row_size = (size + 7) // 8
+            self._bits = bytearray(size * self._row_size)
+            if reverse:
+                self._reverse_bits = bytearray(size * self._row_size)
+        else:
+            self._row_size = 0
+            self._adjacency = [[False] * size for _ in range(size)]
+            if reverse:
+                self._reverse_adjacency = [[False] * size
+                                           for _ in range(size)]
 
+    @property
+    def packed(self) -> bool:
+        """
+        Whether the matrix is stored with one bit per cell.
+        """
+        return self._packed
 
     @property
-    def num_vertices(self):
-       return len(self._adjacency)
+    def reverse(self) -> bool:
+        """
+        Whether the graph keeps a reverse index.
+        """
+        return self._reverse
+
+    def _row(self, index: int, reverse: bool = False) -> memoryview:
+        """
+        Inputs:
+          index, the id of a vertex (packed mode only)
+          reverse, whether to read the transposed matrix
+
+        Returns: the bytes of its row of the matrix.
+        """
+        start = index * self._row_size
+        bits = self._reverse_bits if reverse else self._bits
+        return memoryview(bits)[start:start + self._row_size]
+
+    def _row_bits(self, index: int) -> int:
+        """
+        Inputs:
+          index, the id of a vertex
+
+        Returns: its row of the matrix, as an int with bit j set if
+        there is an edge to vertex j.
+        """
+        if self._packed:
+            return int.from_bytes(self._row(index), "little")
+        bits = 0
+        for j in compress(range(len(self._ints_to_labels)),
+                          self._adjacency[index]):
+            bits |= 1 << j
+        return bits
+
+    def _row_ids(self, index: int) -> Iterable[int]:
+        """
+        Inputs:
+          index, the id of a vertex
+
+        Returns: the ids of its out-neighbors, in increasing order.
+        """
+        if self._packed:
+            return _set_bits(self._row(index))
+        return compress(range(len(self._ints_to_labels)),
+                        self._adjacency[index])
+
+    def _column_ids(self, index: int) -> Iterable[int]:
+        """
+        Inputs:
+          index, the id of a vertex
+
+        Returns: the ids of its in-neighbors, in increasing order.
+        """
+        size = len(self._ints_to_labels)
+        if self._packed:
+            if self._reverse:
+                return _set_bits(self._row(index, reverse=True))
+            mask = 1 << (index & 7)
+            return compress(range(size), map(
+                mask.__and__, self._bits[index >> 3::self._row_size]))
+        if self._reverse:
+            return compress(range(size), self._reverse_adjacency[index])
+        return compress(range(size), map(itemgetter(index), self._adjacency))
+
     @property
-    def num_edges(self):
+    def num_vertices(self) -> int:
+       return len(self._ints_to_labels)
+    @property
+    def num_edges(self) -> int:
         """
-        Calculate the  number of edges in the graph.
+        The number of edges in the graph (kept up to date by connect).
         int: The total number of edges in the graph.
         """
-        edge_count = 0
-        for row in self._adjacency:
-            edge_count += sum(row)  
-        return edge_count
+        return self._num_edges
     @property
-    def vertex_labels(self):
-        return set(self._ints_to_labels)
+    def vertex_labels(self) -> AbstractSet[str]:
+        if self._label_set is None:
+            self._label_set = frozenset(self._ints_to_labels)
+        return self._label_set
     @property
-    def edges(self):
-        edge_set = set()
-        for i, Rows in enumerate(self._adjacency):
-            for j, con in enumerate(Rows):
-                if con:
-                    src = self._ints_to_labels[i]
-                    dst = self._ints_to_labels[j]
-                    edge_set.add((src, dst))
-        return edge_set
-    def connect(self, src, dst):
+    def edges(self) -> AbstractSet[tuple[str, str]]:
+        if self._edge_set is None:
+            labels = self._ints_to_labels
+            self._edge_set = frozenset((src, labels[j])
+                                       for i, src in enumerate(labels)
+                                       for j in self._row_ids(i))
+        return self._edge_set
+    def connect(self, src: str, dst: str) -> None:
         """Connect two points """
         if src not in self._labels_to_ints or dst not in self._labels_to_ints:
             raise ValueError
 
         i, j = self._labels_to_ints[src], self._labels_to_ints[dst]
-        self._adjacency[i][j] = True
+        if self._packed:
+            position, mask = i * self._row_size + (j >> 3), 1 << (j & 7)
+            if self._bits[position] & mask:
+                return
+            self._bits[position] |= mask
+            if self._reverse:
+                self._reverse_bits[j * self._row_size + (i >> 3)] |= \
+                    1 << (i & 7)
+        else:
+            if self._adjacency[i][j]:
+                return
+            self._adjacency[i][j] = True
+            if self._reverse:
+                self._reverse_adjacency[j][i] = True
+        self._num_edges += 1
+        self._edge_set = None
+
+    def disconnect(self, src: str, dst: str) -> None:
+        if src not in self._labels_to_ints or dst not in self._labels_to_ints:
+            raise ValueError
+
+        i, j = self._labels_to_ints[src], self._labels_to_ints[dst]
+        if self._packed:
+            position, mask = i * self._row_size + (j >> 3), 1 << (j & 7)
+            if not self._bits[position] & mask:
+                return
+            self._bits[position] &= ~mask
+            if self._reverse:
+                self._reverse_bits[j * self._row_size + (i >> 3)] &= \
+                    ~(1 << (i & 7))
+        else:
+            if not self._adjacency[i][j]:
+                return
+            self._adjacency[i][j] = False
+            if self._reverse:
+                self._reverse_adjacency[j][i] = False
+        self._num_edges -= 1
+        self._edge_set = None
+
+    @classmethod
+    def from_edges(cls, vertex_labels: list[str], edges: Edges,
+                   packed: bool = False,
+                   reverse: bool = False) -> 'AdjacencyMatrixDigraph':
+        """
+        See Graph.from_edges (packed and reverse are passed on to the
+        constructor).
+        """
+        graph = cls(vertex_labels, packed, reverse)
+        graph.connect_many(edges)
+        return graph
+
+    def connect_many(self, edges: Edges) -> None:
+        id_arrays = _id_arrays(edges)
+        if id_arrays is None:
+            srcs, dsts = _label_lists(
+                cast(Iterable[tuple[str, str]], edges), self._labels_to_ints)
+            src_ids: Sequence[int] = \
+                list(map(self._labels_to_ints.__getitem__, srcs))
+            dst_ids: Sequence[int] = \
+                list(map(self._labels_to_ints.__getitem__, dsts))
+        else:
+            src_ids, dst_ids = id_arrays
+            _check_ids(src_ids, dst_ids, len(self._ints_to_labels))
+
+        added = 0
+        if self._packed:
+            bits, row_size = self._bits, self._row_size
+            for i, j in zip(src_ids, dst_ids):
+                position, mask = i * row_size + (j >> 3), 1 << (j & 7)
+                if not bits[position] & mask:
+                    bits[position] |= mask
+                    added += 1
+                    if self._reverse:
+                        self._reverse_bits[j * row_size + (i >> 3)] |= \
+                            1 << (i & 7)
+        else:
+            # Set every cell, then count the new edges in the rows that
+            # changed
+            rows = [self._adjacency[i] for i in set(src_ids)]
+            before = sum(row.count(True) for row in rows)
+            _consume(map(list.__setitem__,
+                         map(self._adjacency.__getitem__, src_ids),
+                         dst_ids, repeat(True)))
+            added = sum(row.count(True) for row in rows) - before
+            if self._reverse:
+                _consume(map(list.__setitem__,
+                             map(self._reverse_adjacency.__getitem__,
+                                 dst_ids),
+                             src_ids, repeat(True)))
+        if added:
+            self._num_edges += added
+            self._edge_set = None
     
-    def connected(self, src, dst):
+    def connected(self, src: str, dst: str) -> bool:
         if src not in self._labels_to_ints:
             raise ValueError(f"Source vertex '{src}' not in the graph")
         if dst not in self._labels_to_ints:
@@ -291,39 +997,374 @@ class AdjacencyMatrixDigraph(Graph):
 
         src_index = self._labels_to_ints[src]
         dst_index = self._labels_to_ints[dst]
+        if self._packed:
+            byte = self._bits[src_index * self._row_size + (dst_index >> 3)]
+            return bool(byte >> (dst_index & 7) & 1)
         return self._adjacency[src_index][dst_index]
 
-    def out_neighbors(self,src: str):
+    def out_neighbors(self,src: str) -> set[str]:
         if src not in self._labels_to_ints:
             raise KeyError(f"Vertex '{src}' does not exist in the graph.")
 
         src_index = self._labels_to_ints[src]
         neighbors = set()
-        for j, con in enumerate(self._adjacency[src_index]):
-            if con:
-                neighbors.add(self._ints_to_labels[j])
+        for j in self._row_ids(src_index):
+            neighbors.add(self._ints_to_labels[j])
         return neighbors
 
-    def get_value(self, vertex):
+    def iter_out_neighbors(self, src: str) -> Iterator[str]:
+        if src not in self._labels_to_ints:
+            raise ValueError(f"Vertex '{src}' not in the graph")
+        return map(self._ints_to_labels.__getitem__,
+                   self._row_ids(self._labels_to_ints[src]))
+
+    def out_degree(self, src: str) -> int:
+        if src not in self._labels_to_ints:
+            raise ValueError(f"Vertex '{src}' not in the graph")
+        src_index = self._labels_to_ints[src]
+        if self._packed:
+            return int.from_bytes(self._row(src_index), "little").bit_count()
+        return self._adjacency[src_index].count(True)
+
+    def in_neighbors(self, dst: str) -> set[str]:
+        if dst not in self._labels_to_ints:
+            raise ValueError(f"Vertex '{dst}' not in the graph")
+        return set(map(self._ints_to_labels.__getitem__,
+                       self._column_ids(self._labels_to_ints[dst])))
+
+    def in_degree(self, dst: str) -> int:
+        if dst not in self._labels_to_ints:
+            raise ValueError(f"Vertex '{dst}' not in the graph")
+        dst_index = self._labels_to_ints[dst]
+        if self._reverse and self._packed:
+            return int.from_bytes(self._row(dst_index, reverse=True),
+                                  "little").bit_count()
+        if self._reverse:
+            return self._reverse_adjacency[dst_index].count(True)
+        return sum(1 for _ in self._column_ids(dst_index))
+
+    def out_neighbors_many(self, vertices: Iterable[str]) -> set[str]:
+        if self._packed:
+            return self._combined_rows(vertices, intersect=False)
+        return super().out_neighbors_many(vertices)
+
+    def _combined_rows(self, vertices: Iterable[str],
+                       intersect: bool) -> set[str]:
+        """
+        Inputs:
+          vertices, vertex labels
+          intersect, whether to intersect the rows of the vertices
+            (instead of taking their union)
+
+        Returns: the labels of the vertices set in the combined row.
+
+        Raises:
+            ValueError if one of the vertices is not in the graph
+        """
+        combined: Optional[int] = None
+        for vertex in vertices:
+            if vertex not in self._labels_to_ints:
+                raise ValueError(f"Vertex '{vertex}' not in the graph")
+            bits = self._row_bits(self._labels_to_ints[vertex])
+            if combined is None:
+                combined = bits
+            elif intersect:
+                combined &= bits
+            else:
+                combined |= bits
+        if not combined:
+            return set()
+        return {self._ints_to_labels[j] for j in _set_bits(
+            combined.to_bytes(self._row_size or
+                              (combined.bit_length() + 7) // 8, "little"))}
+
+    def out_neighbors_union(self, vertices: Iterable[str]) -> set[str]:
+        """
+        Returns the labels of the vertices that are out-neighbors of
+        at least one of the given vertices, by combining whole rows
+        of the matrix.
+
+        Inputs:
+          vertices, vertex labels
+
+        Returns: a set of strings
+
+        Raises:
+            ValueError if one of the vertices is not in the graph
+        """
+        return self._combined_rows(vertices, intersect=False)
+
+    def out_neighbors_intersection(self, vertices: Iterable[str]) \
+            -> set[str]:
+        """
+        Returns the labels of the vertices that are out-neighbors of
+        every one of the given vertices, by combining whole rows of the
+        matrix.
+
+        Inputs:
+          vertices, vertex labels
+
+        Returns: a set of strings (empty if there are no vertices)
+
+        Raises:
+            ValueError if one of the vertices is not in the graph
+        """
+        return self._combined_rows(vertices, intersect=True)
+
+    def get_value(self, vertex: str) -> Any:
        if vertex not in self._vertex_values:
             raise KeyError(f"Vertex '{vertex}' does not exist in the graph.")
        return self._vertex_values.get(vertex)
     
-    def set_value(self, vertex, value):
+    def set_value(self, vertex: str, value: Any) -> None:
        if vertex not in self._vertex_values:
             raise KeyError(f"Vertex '{vertex}' does not exist in the graph.")
        self._vertex_values[vertex] = value
 
     def to_adj_list(self) -> 'AdjacencyListDigraph':
         adj_list_graph = AdjacencyListDigraph(self._ints_to_labels)
-        for i, row in enumerate(self._adjacency):
-            src = self._ints_to_labels[i]
-            for j, con in enumerate(row):
-                if con:
-                    dst = self._ints_to_labels[j]
-                    adj_list_graph.connect(src, dst) 
+        for i, src in enumerate(self._ints_to_labels):
+            for j in self._row_ids(i):
+                dst = self._ints_to_labels[j]
+                adj_list_graph.connect(src, dst) 
+            adj_list_graph.set_value(src, self._vertex_values[src])
         return adj_list_graph
     
     def to_adj_matrix(self) -> 'AdjacencyMatrixDigraph':
         return self
-    
+
+    def to_csr(self) -> 'CSRDigraph':
+        size = len(self._ints_to_labels)
+        offsets = array("q", [0]) * (size + 1)
+        targets = array("i")
+        for i in range(size):
+            targets.extend(self._row_ids(i))
+            offsets[i + 1] = len(targets)
+        return CSRDigraph(list(self._ints_to_labels), offsets, targets,
+                          [self._vertex_values[label]
+                           for label in self._ints_to_labels])
+
+
+class CSRDigraph(Graph):
+    """
+    Compressed sparse row (CSR) implementation of graphs.
+
+    Vertices are numbered from 0 to num_vertices - 1, in the order of
+    their labels, and the edges are stored in two flat arrays: the
+    out-neighbors of vertex i are the ids in targets[offsets[i]] to
+    targets[offsets[i + 1] - 1]. This takes a few bytes per edge, instead
+    of a Python object per edge, so large graphs take much less memory
+    than with the other implementations.
+
+    The edges of a CSRDigraph cannot be changed once it has been built
+    (but the values at the vertices can). Use to_csr to build one from
+    another graph.
+    """
+
+    _labels_to_ints: dict[str, int]
+    _ints_to_labels: list[str]
+    _offsets:        array
+    _targets:        array
+    _values:         list[Any]
+    _label_set:      Optional[frozenset[str]]
+    _edge_set:       Optional[frozenset[tuple[str, str]]]
+
+    def __init__(self, vertex_labels: list[str], offsets: Sequence[int],
+                 targets: Sequence[int],
+                 values: Optional[Sequence[Any]] = None):
+        """
+        Inputs:
+          vertex_labels, the labels of the vertices, in id order
+          offsets, num_vertices + 1 non-decreasing positions in targets
+            (the first one is 0, and the last one is len(targets))
+          targets, the ids of the destinations of the edges, grouped by
+            source vertex
+          values, the values at the vertices, in id order (optional;
+            the values are None if not given)
+
+        Raises:
+            ValueError if the labels are not unique, or if the arrays
+            do not describe a graph on these vertices
+        """
+        super().__init__()
+        size = len(vertex_labels)
+        self._ints_to_labels = list(vertex_labels)
+        self._labels_to_ints = {label: i for i, label
+                                in enumerate(self._ints_to_labels)}
+        if len(self._labels_to_ints) != size:
+            raise ValueError("Vertex labels are not unique.")
+
+        self._offsets = offsets if isinstance(offsets, array) \
+            and offsets.typecode == "q" else array("q", offsets)
+        self._targets = targets if isinstance(targets, array) \
+            and targets.typecode == "i" else array("i", targets)
+        if len(self._offsets) != size + 1 or self._offsets[0] != 0 \
+                or self._offsets[-1] != len(self._targets) \
+                or any(self._offsets[i] > self._offsets[i + 1]
+                       for i in range(size)):
+            raise ValueError("Invalid offsets.")
+        if self._targets and (min(self._targets) < 0
+                              or max(self._targets) >= size):
+            raise ValueError("Invalid edge targets.")
+
+        self._label_set = None
+        self._edge_set = None
+        if values is None:
+            self._values = [None] * size
+        elif len(values) != size:
+            raise ValueError("There must be one value per vertex.")
+        else:
+            self._values = list(values)
+
+    @property
+    def num_vertices(self) -> int:
+        return len(self._ints_to_labels)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._targets)
+
+    @property
+    def vertex_labels(self) -> frozenset[str]:
+        if self._label_set is None:
+            self._label_set = frozenset(self._ints_to_labels)
+        return self._label_set
+
+    @property
+    def edges(self) -> frozenset[tuple[str, str]]:
+        if self._edge_set is None:
+            labels, offsets = self._ints_to_labels, self._offsets
+            self._edge_set = frozenset(
+                (src, labels[j]) for i, src in enumerate(labels)
+                for j in self._targets[offsets[i]:offsets[i + 1]])
+        return self._edge_set
+
+    @property
+    def offsets(self) -> array:
+        """
+        The position of the first edge of every vertex in targets (plus
+        the number of edges at the end). Do not modify.
+        """
+        return self._offsets
+
+    @property
+    def targets(self) -> array:
+        """
+        The ids of the destinations of the edges. Do not modify.
+        """
+        return self._targets
+
+    def vertex_id(self, vertex: str) -> int:
+        """
+        Inputs:
+          vertex, a label
+
+        Returns: the id of the vertex (its position in offsets).
+
+        Raises:
+            ValueError if vertex not in the graph
+        """
+        vertex_id = self._labels_to_ints.get(vertex)
+        if vertex_id is None:
+            raise ValueError(f"Vertex '{vertex}' not in the graph")
+        return vertex_id
+
+    def vertex_label(self, vertex_id: int) -> str:
+        """
+        Inputs:
+          vertex_id, the id of a vertex
+
+        Returns: the label of the vertex.
+        """
+        return self._ints_to_labels[vertex_id]
+
+    def connect(self, src: str, dst: str) -> None:
+        raise TypeError("The edges of a CSRDigraph cannot be changed.")
+
+    def disconnect(self, src: str, dst: str) -> None:
+        raise TypeError("The edges of a CSRDigraph cannot be changed.")
+
+    def connect_many(self, edges: Edges) -> None:
+        raise TypeError("The edges of a CSRDigraph cannot be changed.")
+
+    @classmethod
+    def from_edges(cls, vertex_labels: list[str],
+                   edges: Edges) -> 'CSRDigraph':
+        """
+        See Graph.from_edges. The out-neighbors of every vertex are
+        kept in the order of the edges.
+        """
+        size = len(vertex_labels)
+        id_arrays = _id_arrays(edges)
+        if id_arrays is None:
+            ids = {label: i for i, label in enumerate(vertex_labels)}
+            srcs, dsts = _label_lists(
+                cast(Iterable[tuple[str, str]], edges), ids)
+            src_ids: Sequence[int] = array("i", map(ids.__getitem__, srcs))
+            dst_ids: Sequence[int] = array("i", map(ids.__getitem__, dsts))
+        else:
+            src_ids, dst_ids = id_arrays
+            _check_ids(src_ids, dst_ids, size)
+
+        # Group the destinations by source, then lay the groups out
+        # one after the other
+        grouped: list[list[int]] = [[] for _ in range(size)]
+        _consume(map(list.append, map(grouped.__getitem__, src_ids),
+                     dst_ids))
+        offsets = array("q", accumulate(map(len, grouped), initial=0))
+        targets = array("i", chain.from_iterable(grouped))
+        return cls(vertex_labels, offsets, targets)
+
+    def connected(self, src: str, dst: str) -> bool:
+        i, j = self.vertex_id(src), self.vertex_id(dst)
+        start, stop = self._offsets[i], self._offsets[i + 1]
+        if stop - start < _SHORT_ROW:
+            return j in self._targets[start:stop]
+        try:
+            self._targets.index(j, start, stop)
+        except ValueError:
+            return False
+        return True
+
+    def out_neighbors(self, src: str) -> set[str]:
+        i = self.vertex_id(src)
+        labels = self._ints_to_labels
+        return {labels[j] for j
+                in self._targets[self._offsets[i]:self._offsets[i + 1]]}
+
+    def iter_out_neighbors(self, src: str) -> Iterator[str]:
+        i = self.vertex_id(src)
+        return map(self._ints_to_labels.__getitem__,
+                   memoryview(self._targets)[self._offsets[i]:
+                                             self._offsets[i + 1]])
+
+    def out_degree(self, src: str) -> int:
+        i = self.vertex_id(src)
+        return self._offsets[i + 1] - self._offsets[i]
+
+    def get_value(self, vertex: str) -> Any:
+        return self._values[self.vertex_id(vertex)]
+
+    def set_value(self, vertex: str, value: Any) -> None:
+        self._values[self.vertex_id(vertex)] = value
+
+    def to_adj_list(self) -> AdjacencyListDigraph:
+        labels, offsets = self._ints_to_labels, self._offsets
+        adj_list_graph = AdjacencyListDigraph(labels)
+        for i, src in enumerate(labels):
+            for j in self._targets[offsets[i]:offsets[i + 1]]:
+                adj_list_graph.connect(src, labels[j])
+            adj_list_graph.set_value(src, self._values[i])
+        return adj_list_graph
+
+    def to_adj_matrix(self) -> AdjacencyMatrixDigraph:
+        labels, offsets = self._ints_to_labels, self._offsets
+        matrix_graph = AdjacencyMatrixDigraph(list(labels))
+        for i, src in enumerate(labels):
+            for j in self._targets[offsets[i]:offsets[i + 1]]:
+                matrix_graph.connect(src, labels[j])
+            matrix_graph.set_value(src, self._values[i])
+        return matrix_graph
+
+    def to_csr(self) -> 'CSRDigraph':
+        return self
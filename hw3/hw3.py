@@ -37,8 +37,8 @@ def like_component(g: Graph, src: str) -> set[str]:
 
     while stack:
         vertex = stack.pop()
-        for neigh in g.out_neighbors(vertex):
-            if g.get_value(neigh) == value and neigh not in like:
+        for neigh in g.iter_out_neighbors(vertex):
+            if neigh not in like and g.get_value(neigh) == value:
                 like.add(neigh)
                 stack.append(neigh)
 
@@ -117,26 +117,26 @@ def go_graph(gb: GoBoard) -> Graph:
       a graph as described
     """
     size = gb.size
-    graph = AdjacencyListDigraph([f'{col}:{row}' for col in range(size) \
-                                  for row in range(size)])
-    
+    labels = [f'{col}:{row}' for col in range(size) for row in range(size)]
+
+    edges = []
     for col in range(size):
         for row in range(size):
-            
             cur_label = f'{col}:{row}'
-            cur_value = gb.get(col, row)
-            graph.set_value(cur_label, cur_value)
 
-            
             if col < size - 1:
                 r_label = f'{col + 1}:{row}'
-                graph.connect(cur_label, r_label)
-                graph.connect(r_label, cur_label)
-            
-           
+                edges.append((cur_label, r_label))
+                edges.append((r_label, cur_label))
+
             if row < size - 1:
                 bot_label = f'{col}:{row + 1}'
-                graph.connect(cur_label, bot_label)
-                graph.connect(bot_label, cur_label)
+                edges.append((cur_label, bot_label))
+                edges.append((bot_label, cur_label))
+
+    graph = AdjacencyListDigraph.from_edges(labels, edges)
+    for col in range(size):
+        for row in range(size):
+            graph.set_value(f'{col}:{row}', gb.get(col, row))
 
     return graph
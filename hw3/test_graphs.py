@@ -0,0 +1,586 @@
+"""
+Tests for the graph implementations in graphs.py that are not covered
+by test_hw3.py
+"""
+from array import array
+from typing import Any
+
+import pytest
+
+from graphs import Graph, AdjacencyListDigraph, AdjacencyMatrixDigraph, \
+    CSRDigraph
+from hw3 import like_component, GoBoard, go_graph
+
+
+def sample_board() -> GoBoard:
+    """
+    Returns: a 4x4 Go board with a few stones on it
+    """
+    board = GoBoard(4)
+    for col, row in [(0, 0), (1, 0), (0, 1), (3, 3), (2, 3)]:
+        board.put(col, row, 'BLACK')
+    for col, row in [(2, 0), (1, 1), (2, 1), (1, 2)]:
+        board.put(col, row, 'WHITE')
+    return board
+
+
+def same_graph(g: Graph, h: Graph) -> None:
+    """
+    Checks that two graphs have the same vertices, values, and edges
+    """
+    assert g.num_vertices == h.num_vertices
+    assert g.num_edges == h.num_edges
+    assert g.vertex_labels == h.vertex_labels
+    assert g.edges == h.edges
+    for v in g.vertex_labels:
+        assert g.out_neighbors(v) == h.out_neighbors(v)
+        assert g.get_value(v) == h.get_value(v)
+
+
+@pytest.mark.parametrize("kind", ["list", "matrix"])
+def test_csr_from_graph(kind: str) -> None:
+    """
+    Checks that converting a graph to CSR form (and back) keeps its
+    vertices, values, and edges, and that like_component gives the
+    same components on it
+    """
+    g = go_graph(sample_board())
+    if kind == "matrix":
+        g = g.to_adj_matrix()
+
+    csr = g.to_csr()
+    assert isinstance(csr, CSRDigraph)
+    same_graph(g, csr)
+    same_graph(g, csr.to_adj_list())
+    same_graph(g, csr.to_adj_matrix())
+    assert csr.to_csr() is csr
+
+    for src in g.vertex_labels:
+        assert like_component(csr, src) == like_component(g, src)
+        for dst in g.vertex_labels:
+            assert csr.connected(src, dst) == g.connected(src, dst)
+
+    assert len(csr.offsets) == csr.num_vertices + 1
+    assert len(csr.targets) == csr.num_edges
+    for v in g.vertex_labels:
+        assert csr.vertex_label(csr.vertex_id(v)) == v
+
+
+def test_csr_arrays() -> None:
+    """
+    Checks building a CSRDigraph directly from its arrays, and the
+    errors for invalid arrays and labels
+    """
+    g = CSRDigraph(['a', 'b', 'c'], [0, 2, 3, 3], array('i', [1, 2, 0]),
+                   [1, 2, 1])
+    assert g.edges == {('a', 'b'), ('a', 'c'), ('b', 'a')}
+    assert g.out_neighbors('c') == set()
+    assert like_component(g, 'a') == {'a', 'c'}
+    g.set_value('c', 5)
+    assert g.get_value('c') == 5
+
+    with pytest.raises(TypeError):
+        g.connect('c', 'a')
+    with pytest.raises(ValueError):
+        g.out_neighbors('d')
+    with pytest.raises(ValueError):
+        g.connected('a', 'd')
+
+    with pytest.raises(ValueError):
+        CSRDigraph(['a', 'a'], [0, 0, 0], [])
+    with pytest.raises(ValueError):
+        CSRDigraph(['a', 'b'], [0, 1], [1])
+    with pytest.raises(ValueError):
+        CSRDigraph(['a', 'b'], [0, 2, 1], [1])
+    with pytest.raises(ValueError):
+        CSRDigraph(['a', 'b'], [0, 1, 1], [2])
+    with pytest.raises(ValueError):
+        CSRDigraph(['a', 'b'], [0, 1, 1], [1], [None])
+
+
+def test_csr_duplicate_edges() -> None:
+    """
+    Checks that repeated edges in an adjacency list are kept (and
+    counted) by its CSR form
+    """
+    g = AdjacencyListDigraph(['a', 'b'])
+    g.connect('a', 'b')
+    g.connect('a', 'b')
+    csr = g.to_csr()
+    assert csr.num_edges == g.num_edges == 2
+    assert csr.edges == {('a', 'b')}
+
+    empty = AdjacencyMatrixDigraph([]).to_csr()
+    assert empty.num_vertices == empty.num_edges == 0
+
+
+def test_csr_connected_hub() -> None:
+    """
+    Checks connected on a CSR row long enough to be searched in place
+    (and on the short rows around it)
+    """
+    labels = [str(i) for i in range(200)]
+    g = AdjacencyListDigraph(labels)
+    for dst in labels[::2]:
+        g.connect('0', dst)
+    g.connect('1', '199')
+    csr = g.to_csr()
+    for dst in labels:
+        assert csr.connected('0', dst) == (int(dst) % 2 == 0)
+        assert csr.connected('1', dst) == (dst == '199')
+        assert not csr.connected('2', dst)
+
+
+def random_matrix(size: int, packed: bool) -> AdjacencyMatrixDigraph:
+    """
+    Returns: a matrix graph with a fixed pseudo-random set of edges
+    """
+    labels = [str(i) for i in range(size)]
+    g = AdjacencyMatrixDigraph(labels, packed=packed)
+    for i in range(size):
+        for j in range(size):
+            if (i * 7 + j * 13) % 5 == 0 or (i * j) % 11 == 3:
+                g.connect(labels[i], labels[j])
+        g.set_value(labels[i], i % 3 == 0)
+    return g
+
+
+@pytest.mark.parametrize("size", [0, 1, 8, 19])
+def test_packed_matrix(size: int) -> None:
+    """
+    Checks that a packed matrix behaves the same as a regular one
+    """
+    g = random_matrix(size, packed=False)
+    packed = random_matrix(size, packed=True)
+    assert packed.packed and not g.packed
+    same_graph(g, packed)
+    same_graph(g, packed.to_adj_list())
+    same_graph(g, packed.to_csr())
+    for src in g.vertex_labels:
+        assert like_component(packed, src) == like_component(g, src)
+        for dst in g.vertex_labels:
+            assert packed.connected(src, dst) == g.connected(src, dst)
+
+
+@pytest.mark.parametrize("packed", [False, True])
+def test_matrix_row_operations(packed: bool) -> None:
+    """
+    Checks the union and intersection of whole rows of a matrix
+    """
+    g = random_matrix(19, packed)
+    for vertices in [[], ['3'], ['0', '5'], ['1', '2', '18'],
+                     [str(i) for i in range(19)]]:
+        neighbors = [g.out_neighbors(v) for v in vertices]
+        assert g.out_neighbors_union(vertices) == set().union(*neighbors)
+        assert g.out_neighbors_intersection(vertices) == \
+            (set.intersection(*neighbors) if neighbors else set())
+
+    with pytest.raises(ValueError):
+        g.out_neighbors_union(['0', 'x'])
+    with pytest.raises(ValueError):
+        g.out_neighbors_intersection(['x'])
+
+
+@pytest.mark.parametrize("kind", ["list", "matrix", "packed"])
+def test_cached_statistics(kind: str) -> None:
+    """
+    Checks that num_edges, edges, and vertex_labels stay correct as
+    edges are added, and that edges and vertex_labels are only rebuilt
+    after a change
+    """
+    labels = ['a', 'b', 'c']
+    g: Graph
+    if kind == "list":
+        g = AdjacencyListDigraph(labels)
+    else:
+        g = AdjacencyMatrixDigraph(labels, packed=kind == "packed")
+
+    assert g.num_edges == 0
+    assert g.edges == set()
+    assert g.vertex_labels is g.vertex_labels
+    assert g.vertex_labels == {'a', 'b', 'c'}
+
+    g.connect('a', 'b')
+    g.connect('c', 'a')
+    edge_set = g.edges
+    assert edge_set == {('a', 'b'), ('c', 'a')}
+    assert g.edges is edge_set
+    assert g.num_edges == 2
+
+    with pytest.raises(ValueError):
+        g.connect('a', 'd')
+    assert g.edges is edge_set
+
+    # Repeated edges are counted by adjacency lists only
+    g.connect('a', 'b')
+    assert g.num_edges == (3 if kind == "list" else 2)
+    assert g.edges == edge_set
+
+    g.connect('b', 'b')
+    assert g.edges == edge_set | {('b', 'b')}
+    assert edge_set == {('a', 'b'), ('c', 'a')}
+
+    csr = g.to_csr()
+    assert csr.edges is csr.edges
+    assert csr.vertex_labels is csr.vertex_labels
+    assert csr.edges == g.edges
+
+
+@pytest.mark.parametrize("kind", ["list", "matrix", "packed", "csr"])
+def test_neighbor_iteration(kind: str) -> None:
+    """
+    Checks iter_out_neighbors, out_degree, and out_neighbors_many
+    against out_neighbors
+    """
+    g: Graph = go_graph(sample_board())
+    if kind == "matrix":
+        g = g.to_adj_matrix()
+    elif kind == "packed":
+        matrix = AdjacencyMatrixDigraph(sorted(g.vertex_labels), packed=True)
+        for src, dst in g.edges:
+            matrix.connect(src, dst)
+        g = matrix
+    elif kind == "csr":
+        g = g.to_csr()
+
+    labels = sorted(g.vertex_labels)
+    for v in labels:
+        neighbors = list(g.iter_out_neighbors(v))
+        assert len(neighbors) == len(set(neighbors)) == g.out_degree(v)
+        assert set(neighbors) == g.out_neighbors(v)
+
+    for vertices in [[], labels[:1], labels[3:9], labels]:
+        assert g.out_neighbors_many(vertices) == \
+            set().union(*(g.out_neighbors(v) for v in vertices))
+
+    with pytest.raises(ValueError):
+        g.iter_out_neighbors('x')
+    with pytest.raises(ValueError):
+        g.out_degree('x')
+    with pytest.raises(ValueError):
+        g.out_neighbors_many(labels[:2] + ['x'])
+
+
+def test_out_degree_repeated_edges() -> None:
+    """
+    Checks that out_degree and iter_out_neighbors count repeated edges
+    in an adjacency list, like num_edges
+    """
+    g = AdjacencyListDigraph(['a', 'b'])
+    g.connect('a', 'b')
+    g.connect('a', 'b')
+    assert g.out_degree('a') == 2
+    assert list(g.iter_out_neighbors('a')) == ['b', 'b']
+    assert g.out_neighbors_many(['a', 'b']) == {'b'}
+
+
+def test_unique_adjacency_list() -> None:
+    """
+    Checks that an adjacency list in unique mode ignores repeated edges
+    and keeps the order the edges were added in
+    """
+    g = AdjacencyListDigraph(['a', 'b', 'c'], unique=True)
+    assert g.unique and not AdjacencyListDigraph([]).unique
+    for dst in ['c', 'a', 'c', 'b', 'a']:
+        g.connect('a', dst)
+    assert g.num_edges == 3
+    assert list(g.iter_out_neighbors('a')) == ['c', 'a', 'b']
+    assert g.out_degree('a') == 3
+    assert g.connected('a', 'b') and not g.connected('b', 'a')
+    same_graph(g, g.to_adj_matrix())
+    same_graph(g, g.to_csr())
+    with pytest.raises(ValueError):
+        g.connect('a', 'd')
+
+
+@pytest.mark.parametrize("kind", ["list", "unique", "matrix", "packed"])
+def test_disconnect(kind: str) -> None:
+    """
+    Checks removing edges (including repeated and missing ones)
+    """
+    g: Graph
+    if kind in ("list", "unique"):
+        g = AdjacencyListDigraph(['a', 'b', 'c'], unique=kind == "unique")
+    else:
+        g = AdjacencyMatrixDigraph(['a', 'b', 'c'], packed=kind == "packed")
+    for src, dst in [('a', 'b'), ('a', 'c'), ('a', 'b'), ('c', 'a')]:
+        g.connect(src, dst)
+    assert g.edges == {('a', 'b'), ('a', 'c'), ('c', 'a')}
+
+    g.disconnect('a', 'b')
+    assert not g.connected('a', 'b')
+    assert g.edges == {('a', 'c'), ('c', 'a')}
+    assert g.num_edges == 2
+    assert g.out_neighbors('a') == {'c'}
+
+    g.disconnect('a', 'b')
+    g.disconnect('b', 'c')
+    assert g.num_edges == 2
+
+    g.connect('a', 'b')
+    assert g.connected('a', 'b')
+    assert g.num_edges == 3
+    with pytest.raises(ValueError):
+        g.disconnect('a', 'd')
+
+
+class SetDigraph(Graph):
+    """
+    A graph that keeps its edges in a set, and only implements the
+    abstract methods of Graph (to test the methods Graph provides)
+    """
+
+    _values: dict[str, Any]
+    _edge_set: set[tuple[str, str]]
+
+    def __init__(self, vertex_labels: list[str]):
+        self._values = dict.fromkeys(vertex_labels)
+        self._edge_set = set()
+
+    def _check(self, *vertices: str) -> None:
+        for vertex in vertices:
+            if vertex not in self._values:
+                raise ValueError(f"Vertex '{vertex}' not in the graph")
+
+    @property
+    def num_vertices(self) -> int:
+        return len(self._values)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self._edge_set)
+
+    @property
+    def vertex_labels(self) -> set[str]:
+        return set(self._values)
+
+    @property
+    def edges(self) -> set[tuple[str, str]]:
+        return set(self._edge_set)
+
+    def connect(self, src: str, dst: str) -> None:
+        self._check(src, dst)
+        self._edge_set.add((src, dst))
+
+    def disconnect(self, src: str, dst: str) -> None:
+        self._check(src, dst)
+        self._edge_set.discard((src, dst))
+
+    def connected(self, src: str, dst: str) -> bool:
+        self._check(src, dst)
+        return (src, dst) in self._edge_set
+
+    def out_neighbors(self, src: str) -> set[str]:
+        self._check(src)
+        return {dst for tail, dst in self._edge_set if tail == src}
+
+    def get_value(self, vertex: str) -> Any:
+        self._check(vertex)
+        return self._values[vertex]
+
+    def set_value(self, vertex: str, value: Any) -> None:
+        self._check(vertex)
+        self._values[vertex] = value
+
+    def to_adj_list(self) -> AdjacencyListDigraph:
+        return AdjacencyListDigraph.from_edges(list(self._values),
+                                               self._edge_set)
+
+    def to_adj_matrix(self) -> AdjacencyMatrixDigraph:
+        return AdjacencyMatrixDigraph.from_edges(list(self._values),
+                                                 self._edge_set)
+
+
+def test_disconnect_abstract() -> None:
+    """
+    Checks that graphs must implement disconnect
+    """
+    class NoDisconnect(SetDigraph):
+        disconnect = Graph.disconnect
+
+    with pytest.raises(TypeError):
+        NoDisconnect(['a'])  # type: ignore[abstract]
+
+    g = SetDigraph(['a', 'b'])
+    g.connect('a', 'b')
+    g.disconnect('a', 'b')
+    assert not g.connected('a', 'b') and g.num_edges == 0
+
+
+def test_csr_disconnect() -> None:
+    """
+    Checks that edges cannot be removed from a CSRDigraph
+    """
+    g = AdjacencyListDigraph(['a', 'b'])
+    g.connect('a', 'b')
+    csr = g.to_csr()
+    with pytest.raises(TypeError):
+        csr.disconnect('a', 'b')
+    assert csr.connected('a', 'b')
+
+
+EDGE_LABELS = ['a', 'b', 'c', 'd']
+EDGE_PAIRS = [('a', 'b'), ('c', 'a'), ('a', 'd'), ('a', 'b'), ('d', 'd')]
+
+
+def build_graph(kind: str, edges: list[tuple[str, str]]) -> Graph:
+    """
+    Returns: a graph of the given kind with EDGE_LABELS as vertices,
+      built by connecting the edges one at a time
+    """
+    g: Graph
+    if kind in ("list", "unique"):
+        g = AdjacencyListDigraph(EDGE_LABELS, unique=kind == "unique")
+    else:
+        g = AdjacencyMatrixDigraph(EDGE_LABELS, packed=kind == "packed")
+    for src, dst in edges:
+        g.connect(src, dst)
+    return g
+
+
+@pytest.mark.parametrize("kind", ["list", "unique", "matrix", "packed"])
+@pytest.mark.parametrize("form", ["pairs", "generator", "ids"])
+def test_from_edges(kind: str, form: str) -> None:
+    """
+    Checks that from_edges and connect_many give the same graph as
+    connecting the edges one at a time, with every form of edges
+    """
+    def edges(pairs: list[tuple[str, str]]) -> Any:
+        if form == "pairs":
+            return pairs
+        if form == "generator":
+            return (pair for pair in pairs)
+        return (array('i', [EDGE_LABELS.index(src) for src, _ in pairs]),
+                [EDGE_LABELS.index(dst) for _, dst in pairs])
+
+    expected = build_graph(kind, EDGE_PAIRS)
+    g: Graph
+    if kind in ("list", "unique"):
+        g = AdjacencyListDigraph.from_edges(EDGE_LABELS, edges(EDGE_PAIRS),
+                                            unique=kind == "unique")
+    else:
+        g = AdjacencyMatrixDigraph.from_edges(EDGE_LABELS, edges(EDGE_PAIRS),
+                                              packed=kind == "packed")
+    same_graph(expected, g)
+    for v in EDGE_LABELS:
+        assert list(g.iter_out_neighbors(v)) == \
+            list(expected.iter_out_neighbors(v))
+
+    g = build_graph(kind, EDGE_PAIRS[:2])
+    edge_set = g.edges
+    g.connect_many(edges(EDGE_PAIRS[2:]))
+    same_graph(expected, g)
+    assert g.edges is not edge_set
+
+    csr = CSRDigraph.from_edges(EDGE_LABELS, edges(EDGE_PAIRS))
+    assert csr.num_edges == len(EDGE_PAIRS)
+    assert list(csr.iter_out_neighbors('a')) == ['b', 'd', 'b']
+    assert csr.edges == expected.edges
+
+
+@pytest.mark.parametrize("kind", ["list", "unique", "matrix", "packed", "csr"])
+def test_from_edges_invalid(kind: str) -> None:
+    """
+    Checks that invalid edges are all rejected before any edge is added
+    """
+    invalid: list[Any] = [
+        [('a', 'b'), ('b', 'e')],
+        ([0, 1], [1, 4]),
+        ([0, -1], [1, 2]),
+        ([0, 1], [1]),
+    ]
+    for edges in invalid:
+        if kind == "csr":
+            with pytest.raises(ValueError):
+                CSRDigraph.from_edges(EDGE_LABELS, edges)
+            continue
+        g = build_graph(kind, [('c', 'd')])
+        with pytest.raises(ValueError):
+            g.connect_many(edges)
+        assert g.edges == {('c', 'd')}
+        assert g.num_edges == 1
+
+    if kind == "csr":
+        with pytest.raises(TypeError):
+            CSRDigraph.from_edges(EDGE_LABELS, []).connect_many([])
+
+
+def test_default_bulk_construction() -> None:
+    """
+    Checks the versions of from_edges and connect_many that Graph
+    provides (on a graph that does not have its own)
+    """
+    g = SetDigraph.from_edges(EDGE_LABELS, EDGE_PAIRS)
+    assert isinstance(g, SetDigraph)
+    assert g.edges == set(EDGE_PAIRS)
+    assert g.vertex_labels == set(EDGE_LABELS)
+
+    by_ids = SetDigraph.from_edges(EDGE_LABELS, ([0, 2, 3], [1, 0, 3]))
+    assert by_ids.edges == {('a', 'b'), ('c', 'a'), ('d', 'd')}
+    with pytest.raises(ValueError):
+        SetDigraph.from_edges(EDGE_LABELS, ([0, 1], [1, 4]))
+
+    g.connect_many(iter([('b', 'c'), ('c', 'd')]))
+    assert g.connected('b', 'c') and g.connected('c', 'd')
+    with pytest.raises(ValueError):
+        g.connect_many([('b', 'a'), ('b', 'e')])
+    assert not g.connected('b', 'a')
+    with pytest.raises(TypeError):
+        g.connect_many(([0], [1]))
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize("kind", ["list", "unique", "matrix", "packed"])
+def test_in_neighbors(kind: str, reverse: bool) -> None:
+    """
+    Checks in_neighbors and in_degree (with and without a reverse
+    index) as edges are added and removed
+    """
+    labels = [str(i) for i in range(11)]
+    pairs = [(labels[i], labels[(i * i + 3) % 11]) for i in range(11)] + \
+        [(labels[i], labels[(2 * i) % 11]) for i in range(11)]
+
+    g: Graph
+    if kind in ("list", "unique"):
+        g = AdjacencyListDigraph(labels, unique=kind == "unique",
+                                 reverse=reverse)
+    else:
+        g = AdjacencyMatrixDigraph(labels, packed=kind == "packed",
+                                   reverse=reverse)
+    assert getattr(g, "reverse") == reverse
+
+    def check() -> None:
+        for dst in labels:
+            assert g.in_neighbors(dst) == \
+                {src for src, other in g.edges if other == dst}
+            assert g.in_degree(dst) == \
+                sum(list(g.iter_out_neighbors(src)).count(dst)
+                    for src in labels)
+
+    for src, dst in pairs[:5]:
+        g.connect(src, dst)
+    check()
+    g.connect_many(pairs[5:])
+    g.connect_many(pairs[:3])
+    check()
+    for src, dst in pairs[::3]:
+        g.disconnect(src, dst)
+    check()
+
+    with pytest.raises(ValueError):
+        g.in_neighbors('x')
+    with pytest.raises(ValueError):
+        g.in_degree('x')
+
+
+def test_csr_in_neighbors() -> None:
+    """
+    Checks the (index-free) in_neighbors and in_degree of a CSRDigraph
+    """
+    csr = CSRDigraph.from_edges(EDGE_LABELS, EDGE_PAIRS)
+    assert csr.in_neighbors('b') == {'a'}
+    assert csr.in_degree('b') == 2
+    assert csr.in_neighbors('a') == {'c'}
+    assert csr.in_degree('c') == 0
+    with pytest.raises(ValueError):
+        csr.in_degree('x')
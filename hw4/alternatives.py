@@ -0,0 +1,313 @@
+"""
+Module providing searches for alternative itineraries: the k cheapest
+itineraries between two airports, and the itineraries that are Pareto
+optimal on cost and number of flights.
+
+Both searches run over the search states of a compiled schedule, and
+are guided by the exact cost of getting from every state to the
+destination (computed with a single backwards run of Dijkstra's
+algorithm, see AlternativeItineraries.costs_to, and cached per
+destination). With that cost as an A* heuristic, labels leave the heap
+in order of the total cost of the best itinerary that extends them, so
+the searches only expand labels that lie on one of the itineraries
+they end up returning (or tie with one), and never expand states from
+which the destination cannot be reached.
+
+On top of that, labels are pruned by dominance:
+
+- k cheapest: once a state has been expanded k times, any other label
+  for that state is more expensive than k itineraries that reach it,
+  and can be discarded.
+- Pareto: a label is discarded if an earlier (so, no more expensive)
+  label for the same state took at most as many flights, or if an
+  itinerary with at most as many flights has already been found.
+
+As in hw4.py, an itinerary is any sequence of flights that respects
+the layover rules, so it may go through the same airport more than
+once (although it always ends the first time it reaches the
+destination).
+"""
+from array import array
+from collections import OrderedDict
+import heapq
+from typing import Sequence
+
+from flights import Airport, Flight, TimeOfDay
+from schedule import CompiledSchedule, NUM_TIMES, UNREACHED
+
+Itinerary = tuple[int, list[Flight]]
+
+
+class AlternativeItineraries:
+    """
+    Class representing the k cheapest and Pareto searches over a
+    compiled schedule. Edges are indexed by the state they arrive at
+    once, when the object is created, and the costs to the most
+    recently used destinations are kept between queries.
+    """
+
+    __schedule: CompiledSchedule
+    __in_offsets: array
+    __in_edges: array
+    __cache_size: int
+    __costs_to: OrderedDict[int, list[int]]
+
+    def __init__(self, schedule: CompiledSchedule, cache_size: int = 16):
+        """
+        Constructor
+
+        Args:
+            schedule: Compiled schedule
+            cache_size: Number of destinations whose costs are kept
+        """
+        assert cache_size > 0, "Cache size must be positive"
+
+        self.__schedule = schedule
+        self.__cache_size = cache_size
+        self.__costs_to = OrderedDict()
+
+        # Edges sorted by the state they arrive at (counting sort)
+        num_states = schedule.num_states
+        arrivals = schedule.arrivals
+        in_offsets = array("l", [0]) * (num_states + 1)
+        for nxt in arrivals:
+            in_offsets[nxt + 1] += 1
+        for state in range(num_states):
+            in_offsets[state + 1] += in_offsets[state]
+        in_edges = array("l", [0]) * len(arrivals)
+        fill = array("l", in_offsets)
+        for edge, nxt in enumerate(arrivals):
+            in_edges[fill[nxt]] = edge
+            fill[nxt] += 1
+
+        self.__in_offsets = in_offsets
+        self.__in_edges = in_edges
+
+    @property
+    def schedule(self) -> CompiledSchedule:
+        """
+        Returns: The compiled schedule
+        """
+        return self.__schedule
+
+    def costs_to(self, target_id: int) -> list[int]:
+        """
+        Find the cost of the cheapest way of getting from every search
+        state to an airport, by running Dijkstra's algorithm backwards
+        from the states of that airport.
+
+        Args:
+            target_id: Id of the destination airport
+
+        Returns: The cost from every state (UNREACHED for states from
+          which the airport cannot be reached)
+        """
+        if target_id in self.__costs_to:
+            self.__costs_to.move_to_end(target_id)
+            return self.__costs_to[target_id]
+
+        schedule = self.__schedule
+        in_offsets = self.__in_offsets
+        in_edges = self.__in_edges
+        edge_costs = schedule.costs
+        buckets = schedule.buckets
+
+        costs = [UNREACHED] * schedule.num_states
+        heap = []
+        for state in range(target_id * NUM_TIMES,
+                           (target_id + 1) * NUM_TIMES):
+            costs[state] = 0
+            heap.append((0, state))
+        settled = bytearray(schedule.num_states)
+
+        while heap:
+            cost, state = heapq.heappop(heap)
+            if settled[state]:
+                continue
+            settled[state] = 1
+
+            for i in range(in_offsets[state], in_offsets[state + 1]):
+                edge = in_edges[i]
+                bucket = buckets[edge]
+                dep = bucket % NUM_TIMES
+                new_cost = cost + edge_costs[edge]
+                # A flight departing at dep can be taken by passengers
+                # who arrived at dep or in the period before it
+                for prev in (bucket, bucket - dep + (dep - 1) % NUM_TIMES):
+                    old_cost = costs[prev]
+                    if old_cost == UNREACHED or new_cost < old_cost:
+                        costs[prev] = new_cost
+                        heapq.heappush(heap, (new_cost, prev))
+
+        self.__costs_to[target_id] = costs
+        if len(self.__costs_to) > self.__cache_size:
+            self.__costs_to.popitem(last=False)
+
+        return costs
+
+    def k_cheapest(self, origin: Airport, destination: Airport,
+                   start: TimeOfDay, k: int) -> list[Itinerary]:
+        """
+        Find the k cheapest itineraries from one airport to another.
+
+        Args:
+            origin: Origin airport
+            destination: Destination airport
+            start: Time at which we start the itinerary
+            k: Maximum number of itineraries to return
+
+        Raises:
+            ValueError: If k is not positive, or if either airport is
+              not in the schedule
+
+        Returns: Up to k (cost, flights) tuples, cheapest first (the
+          first one has the same cost as hw4.best_itinerary). If the
+          origin and the destination are the same, the only itinerary
+          is (0, []).
+        """
+        if k <= 0:
+            raise ValueError(f"k must be positive: {k}")
+
+        schedule = self.__schedule
+        origin_id = schedule.airport_id(origin.code)
+        target_id = schedule.airport_id(destination.code)
+        if origin_id == target_id:
+            return [(0, [])]
+
+        remaining = self.costs_to(target_id)
+        source = origin_id * NUM_TIMES + start
+        if remaining[source] == UNREACHED:
+            return []
+
+        offsets = schedule.offsets
+        arrivals = schedule.arrivals
+        edge_costs = schedule.costs
+
+        expanded = array("l", [0]) * schedule.num_states
+        label_edge = array("l", [UNREACHED])
+        label_parent = array("l", [UNREACHED])
+        # (cost + remaining cost, cost, label, state); ties are broken
+        # by label, that is, in the order labels were created
+        heap = [(remaining[source], 0, 0, source)]
+        itineraries: list[Itinerary] = []
+
+        while heap and len(itineraries) < k:
+            _, cost, label, state = heapq.heappop(heap)
+            airport_id, time = divmod(state, NUM_TIMES)
+            if airport_id == target_id:
+                itineraries.append((cost, self.__flights(
+                    label_edge, label_parent, label)))
+                continue
+            if expanded[state] >= k:
+                continue
+            expanded[state] += 1
+
+            bucket = state - time
+            for dep in (time, (time + 1) % NUM_TIMES):
+                for edge in range(offsets[bucket + dep],
+                                  offsets[bucket + dep + 1]):
+                    nxt = arrivals[edge]
+                    if remaining[nxt] == UNREACHED or expanded[nxt] >= k:
+                        continue
+                    new_cost = cost + edge_costs[edge]
+                    label_edge.append(edge)
+                    label_parent.append(label)
+                    heapq.heappush(heap, (new_cost + remaining[nxt],
+                                          new_cost, len(label_edge) - 1, nxt))
+
+        return itineraries
+
+    def pareto(self, origin: Airport, destination: Airport,
+               start: TimeOfDay) -> list[Itinerary]:
+        """
+        Find the itineraries from one airport to another that are
+        Pareto optimal on cost and number of flights: for every
+        itinerary that is returned, every other itinerary is either
+        more expensive or takes more flights. When several itineraries
+        have the same cost and number of flights, only one of them is
+        returned.
+
+        Args:
+            origin: Origin airport
+            destination: Destination airport
+            start: Time at which we start the itinerary
+
+        Raises:
+            ValueError: If either airport is not in the schedule
+
+        Returns: List of (cost, flights) tuples, cheapest first (and
+          so, from most to fewest flights). The first one has the same
+          cost as hw4.best_itinerary. If the origin and the destination
+          are the same, the only itinerary is (0, []).
+        """
+        schedule = self.__schedule
+        origin_id = schedule.airport_id(origin.code)
+        target_id = schedule.airport_id(destination.code)
+        if origin_id == target_id:
+            return [(0, [])]
+
+        remaining = self.costs_to(target_id)
+        source = origin_id * NUM_TIMES + start
+        if remaining[source] == UNREACHED:
+            return []
+
+        offsets = schedule.offsets
+        arrivals = schedule.arrivals
+        edge_costs = schedule.costs
+
+        # Fewest flights of any label expanded at each state (labels are
+        # expanded in order of cost, so any later label with at least
+        # as many flights is dominated)
+        fewest = array("l", [schedule.num_states + 1]) * schedule.num_states
+        # Fewest flights of any itinerary found so far
+        target_fewest = schedule.num_states + 1
+        label_edge = array("l", [UNREACHED])
+        label_parent = array("l", [UNREACHED])
+        # (cost + remaining cost, flights, cost, label, state)
+        heap = [(remaining[source], 0, 0, 0, source)]
+        itineraries: list[Itinerary] = []
+
+        while heap:
+            _, legs, cost, label, state = heapq.heappop(heap)
+            airport_id, time = divmod(state, NUM_TIMES)
+            if airport_id == target_id:
+                if legs < target_fewest:
+                    target_fewest = legs
+                    itineraries.append((cost, self.__flights(
+                        label_edge, label_parent, label)))
+                continue
+            # Every itinerary extending this label takes at least one
+            # more flight, and costs at least as much as the ones found
+            # so far
+            if legs >= fewest[state] or legs + 1 >= target_fewest:
+                continue
+            fewest[state] = legs
+
+            bucket = state - time
+            for dep in (time, (time + 1) % NUM_TIMES):
+                for edge in range(offsets[bucket + dep],
+                                  offsets[bucket + dep + 1]):
+                    nxt = arrivals[edge]
+                    if remaining[nxt] == UNREACHED or \
+                            legs + 1 >= fewest[nxt]:
+                        continue
+                    new_cost = cost + edge_costs[edge]
+                    label_edge.append(edge)
+                    label_parent.append(label)
+                    heapq.heappush(heap, (new_cost + remaining[nxt],
+                                          legs + 1, new_cost,
+                                          len(label_edge) - 1, nxt))
+
+        return itineraries
+
+    def __flights(self, label_edge: Sequence[int],
+                  label_parent: Sequence[int], label: int) -> list[Flight]:
+        """
+        Returns: The flights taken to reach a label, in order
+        """
+        flights = []
+        while label_parent[label] != UNREACHED:
+            flights.append(self.__schedule.flights[label_edge[label]])
+            label = label_parent[label]
+        flights.reverse()
+        return flights
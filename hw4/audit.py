@@ -0,0 +1,190 @@
+"""
+Module providing batch validation of itineraries (the same check as
+hw4.process_itinerary, applied to many itineraries at once).
+
+Flight codes are resolved through a FlightIndex, built once for the
+whole schedule, which maps every (airport code, flight code) pair to
+the airport the flight goes to and the times it departs and arrives.
+Itineraries in a batch are merged into a trie (one per origin and
+start time), so legs shared by several itineraries, such as a common
+first flight, are only looked up and checked once, and every
+itinerary that extends an invalid prefix fails without any further
+work.
+
+Unlike process_itinerary, the result for an invalid itinerary says
+why it is invalid, and which flight (leg) made it invalid.
+"""
+from enum import Enum
+from typing import NamedTuple, Optional, Sequence, Union
+
+from flights import Airport, TimeOfDay
+
+# An itinerary to check: origin, start time, and flight codes
+ItineraryQuery = tuple[Airport, TimeOfDay, Sequence[str]]
+
+
+class Status(Enum):
+    """
+    Enumerated type for the result of checking an itinerary
+    """
+    VALID = "valid"
+    # The flight does not depart from the airport we are at
+    UNKNOWN_FLIGHT = "unknown flight"
+    # The flight exists, but taking it does not meet the layover rule
+    MISSED_CONNECTION = "missed connection"
+
+
+class ItineraryCheck(NamedTuple):
+    """
+    Result of checking an itinerary
+    """
+    # Final airport (None if the itinerary is not valid)
+    destination: Optional[Airport]
+    status: Status
+    # Index of the flight code that made the itinerary invalid (None if
+    # the itinerary is valid)
+    leg: Optional[int]
+
+
+class FlightIndex:
+    """
+    Class representing an index of the flights in a schedule by the
+    airport they depart from and their flight code
+    """
+
+    __airports: dict[str, Airport]
+    __flights: dict[str, dict[str, tuple[str, TimeOfDay, TimeOfDay]]]
+
+    def __init__(self, airports: dict[str, Airport]):
+        """
+        Constructor
+
+        Args:
+            airports: Dictionary mapping airport codes to Airport objects.
+              Airports that are only reachable as the destination of
+              a flight are included as well.
+        """
+        self.__airports = {}
+        self.__flights = {}
+        arrival = [TimeOfDay((time + 1) % len(TimeOfDay))
+                   for time in TimeOfDay]
+
+        pending = list(airports.values())
+        while pending:
+            airport = pending.pop()
+            if airport.code in self.__airports:
+                continue
+            self.__airports[airport.code] = airport
+            self.__flights[airport.code] = {
+                flight.code: (flight.destination.code, flight.departure_time,
+                              arrival[flight.departure_time])
+                for flight in airport.flights}
+            pending.extend(flight.destination for flight in airport.flights)
+
+    def __len__(self) -> int:
+        return sum(len(flights) for flights in self.__flights.values())
+
+    def airport(self, code: str) -> Airport:
+        """
+        Returns: The Airport object with the given code
+
+        Raises:
+            KeyError: If the airport is not in the index
+        """
+        return self.__airports[code]
+
+    def lookup(self, airport_code: str, flight_code: str) \
+            -> Optional[tuple[str, TimeOfDay, TimeOfDay]]:
+        """
+        Args:
+            airport_code: Code of the airport the flight departs from
+            flight_code: Flight code
+
+        Returns: The destination code, departure time, and arrival
+          time of the flight, or None if there is no such flight
+        """
+        flights = self.__flights.get(airport_code)
+        if flights is None:
+            return None
+        return flights.get(flight_code)
+
+
+class _Node:
+    """
+    A node of the itinerary trie: the airport and time reached after
+    taking a valid prefix of flights, and the nodes for every flight
+    taken next (or, if taking that flight is not valid, the result
+    shared by every itinerary that does).
+    """
+
+    airport: str
+    time: TimeOfDay
+    children: dict[str, Union["_Node", ItineraryCheck]]
+    result: Optional[ItineraryCheck]
+
+    def __init__(self, airport: str, time: TimeOfDay):
+        self.airport = airport
+        self.time = time
+        self.children = {}
+        self.result = None
+
+
+def process_itineraries(batch: Sequence[ItineraryQuery],
+                        index: Optional[FlightIndex] = None) \
+        -> list[ItineraryCheck]:
+    """
+    Checks whether each itinerary in a batch is a valid sequence of
+    flights (see hw4.process_itinerary).
+
+    Args:
+        batch: The itineraries, as (origin, start time, flight codes)
+        index: Index of the schedule's flights. If not provided, an
+          index is built from the origins of the itineraries (to check
+          several batches, build it once and pass it to every call).
+
+    Returns: One result per itinerary, in the same order as the batch.
+      For valid itineraries, the result has the final airport (the
+      same one process_itinerary returns).
+    """
+    if index is None:
+        index = FlightIndex({origin.code: origin for origin, _, _ in batch})
+
+    num_times = len(TimeOfDay)
+    roots: dict[tuple[str, TimeOfDay], _Node] = {}
+    results = []
+
+    for origin, start, flight_codes in batch:
+        node = roots.get((origin.code, start))
+        if node is None:
+            node = _Node(origin.code, start)
+            node.result = ItineraryCheck(origin, Status.VALID, None)
+            roots[(origin.code, start)] = node
+
+        failure = None
+        for leg, code in enumerate(flight_codes):
+            child = node.children.get(code)
+            if child is None:
+                flight = index.lookup(node.airport, code)
+                if flight is None:
+                    child = ItineraryCheck(None, Status.UNKNOWN_FLIGHT, leg)
+                elif (flight[1] - node.time) % num_times > 1:
+                    child = ItineraryCheck(None, Status.MISSED_CONNECTION,
+                                           leg)
+                else:
+                    child = _Node(flight[0], flight[2])
+                node.children[code] = child
+
+            if isinstance(child, ItineraryCheck):
+                failure = child
+                break
+            node = child
+
+        if failure is not None:
+            results.append(failure)
+            continue
+        if node.result is None:
+            node.result = ItineraryCheck(index.airport(node.airport),
+                                         Status.VALID, None)
+        results.append(node.result)
+
+    return results
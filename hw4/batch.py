@@ -0,0 +1,240 @@
+"""
+Module providing batch (many-to-many) cheapest-itinerary queries.
+
+Instead of calling best_itinerary once for every origin, destination,
+and start time, we run a single search from every (origin, start time)
+pair and read off the cost of getting to every destination. These
+searches are independent of each other, so they are spread across a
+pool of worker processes. Workers only receive the arrays of the
+compiled schedule (not the Airport and Flight objects), so starting
+them is cheap.
+"""
+from array import array
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+
+from flights import Flight, TimeOfDay
+from schedule import (CompiledSchedule, NUM_TIMES, UNREACHED,
+                      cheapest_arrival, shortest_paths)
+
+# Arrays of the compiled schedule, set in every worker by _init_worker
+_worker_arrays: Optional[tuple[array, array, array]] = None
+
+# Result of the search from one (origin, start time) pair: the cost of
+# getting to each destination, the state we arrive at each destination
+# in, and (optionally) the predecessor table of the search
+SearchResult = tuple[list[int], list[int], Optional[array]]
+
+
+def _init_worker(offsets: array, arrivals: array, costs: array) -> None:
+    """
+    Initializer for worker processes: keeps the schedule arrays
+    around so they are only sent to each worker once.
+    """
+    global _worker_arrays  # pylint: disable=global-statement
+    _worker_arrays = (offsets, arrivals, costs)
+
+
+def _worker_search(task: tuple[int, int, list[int], bool]) -> SearchResult:
+    """
+    Runs one single-source search inside a worker process.
+    """
+    assert _worker_arrays is not None, "Worker was not initialized"
+    return _search(_worker_arrays, *task)
+
+
+def _search(arrays: tuple[array, array, array], origin_id: int, start: int,
+            destination_ids: list[int], keep_previous: bool) -> SearchResult:
+    """
+    Runs Dijkstra's algorithm from one origin and start time, and
+    extracts the results for the requested destinations.
+
+    Args:
+        arrays: The offsets, arrivals, and costs of a compiled schedule
+        origin_id: Id of the origin airport
+        start: Time at which we start the itinerary
+        destination_ids: Ids of the destination airports
+        keep_previous: Whether to return the predecessor table
+
+    Returns: See SearchResult
+    """
+    costs, previous = shortest_paths(*arrays, origin_id * NUM_TIMES + start)
+
+    dest_costs = []
+    dest_states = []
+    for destination_id in destination_ids:
+        state = cheapest_arrival(costs, destination_id)
+        if destination_id == origin_id:
+            dest_costs.append(0)
+            dest_states.append(UNREACHED)
+        elif state is None:
+            dest_costs.append(UNREACHED)
+            dest_states.append(UNREACHED)
+        else:
+            dest_costs.append(costs[state])
+            dest_states.append(state)
+
+    return dest_costs, dest_states, previous if keep_previous else None
+
+
+class ItineraryMatrix:
+    """
+    Class representing the result of a batch query: the cost of the
+    cheapest itinerary for every origin, destination, and start time
+    (and, optionally, enough information to rebuild the itineraries).
+    """
+
+    __schedule: CompiledSchedule
+    __origins: list[str]
+    __destinations: dict[str, int]
+    __results: dict[tuple[str, TimeOfDay], SearchResult]
+
+    def __init__(self, schedule: CompiledSchedule, origins: list[str],
+                 destinations: list[str],
+                 results: dict[tuple[str, TimeOfDay], SearchResult]):
+        """
+        Constructor (use itinerary_matrix to build one)
+
+        Args:
+            schedule: The compiled schedule that was searched
+            origins: Origin airport codes (in the order of the rows of
+              the matrix, possibly with repeated codes)
+            destinations: Destination airport codes
+            results: Result of the search from every (origin, start) pair
+        """
+        self.__schedule = schedule
+        self.__origins = origins
+        self.__destinations = {code: i for i, code in enumerate(destinations)}
+        self.__results = results
+
+    def __lookup(self, origin: str, destination: str,
+                 start: TimeOfDay) -> tuple[SearchResult, int]:
+        """
+        Returns: The search result for an origin and start time, and the
+          index of the destination within it.
+
+        Raises:
+            ValueError: If the query was not part of the batch
+        """
+        if (origin, start) not in self.__results or \
+                destination not in self.__destinations:
+            raise ValueError(f"{origin} -> {destination} @ {start.name} "
+                             f"is not part of this batch")
+
+        return self.__results[(origin, start)], \
+            self.__destinations[destination]
+
+    def cost(self, origin: str, destination: str,
+             start: TimeOfDay) -> Optional[int]:
+        """
+        Args:
+            origin, destination: Airport codes
+            start: Time at which we start the itinerary
+
+        Raises:
+            ValueError: If the query was not part of the batch
+
+        Returns: The cost of the cheapest itinerary, or None if the
+          destination cannot be reached.
+        """
+        (costs, _, _), index = self.__lookup(origin, destination, start)
+        if costs[index] == UNREACHED:
+            return None
+        return costs[index]
+
+    def costs(self, start: TimeOfDay) -> list[list[Optional[int]]]:
+        """
+        Args:
+            start: Time at which we start the itineraries
+
+        Returns: Matrix of costs for a given start time, with one row
+          per origin and one column per destination (in the order they
+          were given to itinerary_matrix, including repeated ones), or
+          an empty list if the start time was not part of the batch.
+        """
+        return [[None if cost == UNREACHED else cost
+                 for cost in self.__results[(origin, start)][0]]
+                for origin in self.__origins
+                if (origin, start) in self.__results]
+
+    def best_itinerary(self, origin: str, destination: str,
+                       start: TimeOfDay) \
+            -> Optional[tuple[int, list[Flight]]]:
+        """
+        Same as hw4.best_itinerary, but using the precomputed results.
+        The matrix must have been built with predecessors=True.
+
+        Args:
+            origin, destination: Airport codes
+            start: Time at which we start the itinerary
+
+        Raises:
+            ValueError: If the query was not part of the batch, or if
+              predecessors were not kept
+
+        Returns: Same as hw4.best_itinerary
+        """
+        (costs, states, previous), index = \
+            self.__lookup(origin, destination, start)
+        if previous is None:
+            raise ValueError("Itineraries can only be rebuilt if the "
+                             "matrix was built with predecessors=True")
+
+        if costs[index] == UNREACHED:
+            return None
+        if states[index] == UNREACHED:
+            return 0, []
+        return costs[index], self.__schedule.itinerary(previous,
+                                                       states[index])
+
+
+def itinerary_matrix(schedule: CompiledSchedule, origins: Sequence[str],
+                     destinations: Sequence[str],
+                     times: Sequence[TimeOfDay] = tuple(TimeOfDay),
+                     predecessors: bool = False,
+                     workers: Optional[int] = None) -> ItineraryMatrix:
+    """
+    Find the cost of the cheapest itinerary for every combination of
+    origin, destination, and start time.
+
+    Args:
+        schedule: Compiled schedule
+        origins: Codes of the origin airports
+        destinations: Codes of the destination airports
+        times: Start times
+        predecessors: Whether to keep the predecessor tables, so that
+          the itineraries themselves can be rebuilt (this uses memory
+          proportional to the size of the schedule for every origin
+          and start time)
+        workers: Number of worker processes (if None, one per CPU).
+          If 1, all the searches run in the current process.
+
+    Raises:
+        ValueError: If any of the airports is not in the schedule
+
+    Returns: An ItineraryMatrix with the results
+    """
+    destination_ids = [schedule.airport_id(code) for code in destinations]
+    # Repeated origins are only searched once
+    keys = [(code, time) for code in dict.fromkeys(origins)
+            for time in times]
+    tasks = [(schedule.airport_id(code), int(time), destination_ids,
+              predecessors) for code, time in keys]
+    arrays = (schedule.offsets, schedule.arrivals, schedule.costs)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1:
+        results = [_search(arrays, *task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=arrays) as executor:
+            chunksize = max(1, len(tasks) // (4 * workers))
+            results = list(executor.map(_worker_search, tasks,
+                                        chunksize=chunksize))
+
+    return ItineraryMatrix(schedule, list(origins), list(destinations),
+                           dict(zip(keys, results)))
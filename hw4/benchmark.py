@@ -0,0 +1,364 @@
+"""
+Benchmark of the functions in hw4.py on synthetic schedules (see
+generate.py).
+
+For every schedule size, the benchmark generates a schedule, writes it
+to a CSV file, and measures load_flights on that file, followed by
+valid_flights, is_reachable, process_itinerary, and best_itinerary on
+the same set of randomly chosen queries. Every phase is run twice:
+once to measure its running time, and once with tracemalloc enabled to
+measure its peak memory use (tracing slows the code down, so it would
+distort the times).
+
+The results are written to a JSON report, and two reports can be
+compared with the compare command.
+
+Usage:
+    python3 benchmark.py generate NUM_AIRPORTS NUM_FLIGHTS PATH
+        [--kind random|hub] [--seed SEED] [--hubs NUM_HUBS]
+    python3 benchmark.py run [--size NUM_AIRPORTSxNUM_FLIGHTS ...]
+        [--kind random|hub] [--seed SEED] [--queries NUM_QUERIES]
+        [--no-memory] [--output REPORT.json]
+    python3 benchmark.py compare OLD.json NEW.json
+"""
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Sequence
+
+from flights import Airport, TimeOfDay
+from generate import KINDS, generate_schedule, write_schedule
+from hw4 import (arrival_time, best_itinerary, is_reachable, load_flights,
+                 process_itinerary, valid_flights)
+
+REPORT_VERSION = 1
+
+PHASES = ("load_flights", "valid_flights", "is_reachable",
+          "process_itinerary", "best_itinerary")
+
+# Longest itinerary used to benchmark process_itinerary
+MAX_LEGS = 5
+
+
+def measure(func: Callable[[], object], calls: int,
+            memory: bool = True) -> dict[str, Any]:
+    """
+    Measures the running time (and, optionally, the peak memory use)
+    of a function.
+
+    Args:
+        func: Function to measure
+        calls: Number of calls to the benchmarked function made by func
+          (used to compute the time per call)
+        memory: Whether to measure memory use
+
+    Returns: Dictionary with the number of calls, the total time and
+      time per call in seconds, and the peak memory use in bytes (None
+      if memory was not measured)
+    """
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {"calls": calls, "seconds": seconds,
+            "per_call": seconds / calls if calls else 0.0,
+            "peak_bytes": peak}
+
+
+def random_itinerary(airports: dict[str, Airport], rng: random.Random) \
+        -> tuple[Airport, TimeOfDay, list[str]]:
+    """
+    Generates a random valid itinerary (with up to MAX_LEGS flights).
+
+    Returns: The origin, start time, and flight codes of the itinerary
+    """
+    origin = airports[rng.choice(sorted(airports))]
+    start = TimeOfDay(rng.randrange(len(TimeOfDay)))
+
+    airport, now, codes = origin, start, []
+    for _ in range(rng.randint(1, MAX_LEGS)):
+        options = sorted(valid_flights(airport, now))
+        if not options:
+            break
+        flight = rng.choice(options)
+        codes.append(flight.code)
+        airport, now = flight.destination, arrival_time(flight)
+
+    return origin, start, codes
+
+
+def benchmark_schedule(path: str, num_queries: int, seed: int,
+                       memory: bool = True) -> dict[str, Any]:
+    """
+    Benchmarks the functions in hw4.py on a schedule file.
+
+    Args:
+        path: Path to the schedule
+        num_queries: Number of queries for each function (except
+          load_flights, which is called once)
+        seed: Seed used to choose the queries
+        memory: Whether to measure memory use
+
+    Returns: Dictionary mapping each of PHASES to its measurements
+    """
+    results = {"load_flights": measure(lambda: load_flights(path), 1,
+                                       memory)}
+
+    airports = load_flights(path)
+    assert airports is not None, f"Could not load {path}"
+
+    rng = random.Random(seed)
+    codes = sorted(airports)
+    queries = [(airports[rng.choice(codes)], airports[rng.choice(codes)],
+                TimeOfDay(rng.randrange(len(TimeOfDay))))
+               for _ in range(num_queries)]
+    itineraries = [random_itinerary(airports, rng)
+                   for _ in range(num_queries)]
+
+    results["valid_flights"] = measure(
+        lambda: [valid_flights(origin, start)
+                 for origin, _, start in queries], num_queries, memory)
+    results["is_reachable"] = measure(
+        lambda: [is_reachable(origin, destination, start)
+                 for origin, destination, start in queries],
+        num_queries, memory)
+    results["process_itinerary"] = measure(
+        lambda: [process_itinerary(origin, start, flight_codes)
+                 for origin, start, flight_codes in itineraries],
+        num_queries, memory)
+    results["best_itinerary"] = measure(
+        lambda: [best_itinerary(origin, destination, start)
+                 for origin, destination, start in queries],
+        num_queries, memory)
+
+    return results
+
+
+def run_benchmark(sizes: Sequence[tuple[int, int]], kind: str = "random",
+                  seed: int = 0, num_queries: int = 100,
+                  memory: bool = True) -> dict[str, Any]:
+    """
+    Runs the benchmark on generated schedules of several sizes.
+
+    Args:
+        sizes: List of (number of airports, number of flights)
+        kind: Kind of schedule (see generate.KINDS)
+        seed: Seed used to generate the schedules and the queries
+        num_queries: Number of queries for each function
+        memory: Whether to measure memory use
+
+    Returns: The report (a JSON-serializable dictionary)
+    """
+    runs = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for num_airports, num_flights in sizes:
+            path = os.path.join(tmpdir,
+                                f"{kind}-{num_airports}-{num_flights}.csv")
+            write_schedule(generate_schedule(num_airports, num_flights,
+                                             kind, seed), path)
+            runs.append({"num_airports": num_airports,
+                         "num_flights": num_flights,
+                         "file_bytes": os.path.getsize(path),
+                         "phases": benchmark_schedule(path, num_queries,
+                                                      seed, memory)})
+
+    return {"version": REPORT_VERSION,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "kind": kind, "seed": seed, "queries": num_queries,
+            "runs": runs}
+
+
+def compare_reports(old: dict[str, Any], new: dict[str, Any]) -> list[str]:
+    """
+    Compares the times in two reports, for the sizes that appear in both.
+
+    Returns: One line for every size and phase, with the time per call
+      in each report and the ratio between them
+    """
+    old_runs = {(run["num_airports"], run["num_flights"]): run
+                for run in old["runs"]}
+
+    lines = []
+    for run in new["runs"]:
+        size = (run["num_airports"], run["num_flights"])
+        if size not in old_runs:
+            continue
+        for phase in PHASES:
+            before = old_runs[size]["phases"][phase]["per_call"]
+            after = run["phases"][phase]["per_call"]
+            ratio = f"{after / before:.2f}x" if before else "n/a"
+            lines.append(f"{size[0]}x{size[1]} {phase}: {before:.6f}s -> "
+                         f"{after:.6f}s ({ratio})")
+    return lines
+
+
+def parse_size(size: str) -> tuple[int, int]:
+    """
+    Parses a schedule size written as NUM_AIRPORTSxNUM_FLIGHTS
+
+    Raises:
+        ValueError: If the size is not valid
+    """
+    num_airports, _, num_flights = size.partition("x")
+    return int(num_airports), int(num_flights)
+
+
+def parse_options(args: Sequence[str], names: Sequence[str],
+                  flags: Sequence[str] = ()) \
+        -> tuple[list[str], dict[str, list[str]]]:
+    """
+    Splits command-line arguments into positional arguments and options
+    (--NAME VALUE, which can be repeated, or --NAME for a flag)
+
+    Args:
+        args: Command-line arguments (after the command)
+        names: Names of the options that take a value
+        flags: Names of the options that take no value
+
+    Returns: The positional arguments, and the values given to every
+      option (an empty list for options that were not given, and one
+      empty string per use for flags)
+
+    Raises:
+        ValueError: If an option is unknown or is missing its value
+    """
+    positional: list[str] = []
+    options: dict[str, list[str]] = {name: [] for name in [*names, *flags]}
+    remaining = iter(args)
+    for arg in remaining:
+        if not arg.startswith("--"):
+            positional.append(arg)
+        elif arg[2:] in flags:
+            options[arg[2:]].append("")
+        elif arg[2:] in names:
+            value = next(remaining, None)
+            if value is None:
+                raise ValueError(f"missing value for {arg}")
+            options[arg[2:]].append(value)
+        else:
+            raise ValueError(f"unknown option: {arg}")
+    return positional, options
+
+
+def last_option(options: dict[str, list[str]], name: str,
+                default: str) -> str:
+    """
+    Returns: The last value given to an option, or its default
+    """
+    return options[name][-1] if options[name] else default
+
+
+def parse_kind(kind: str) -> str:
+    """
+    Checks a schedule kind given on the command line
+
+    Raises:
+        ValueError: If the kind is not one of generate.KINDS
+    """
+    if kind not in KINDS:
+        raise ValueError(f"unknown schedule kind: {kind}")
+    return kind
+
+
+def generate(args: Sequence[str]) -> None:
+    """
+    Generates a schedule and writes it to PATH
+
+    Raises:
+        ValueError: If the arguments are not valid
+    """
+    positional, options = parse_options(args, ("kind", "seed", "hubs"))
+    if len(positional) != 3:
+        raise ValueError("expected NUM_AIRPORTS NUM_FLIGHTS PATH")
+    num_airports, num_flights, path = positional
+    hubs = last_option(options, "hubs", "")
+    write_schedule(generate_schedule(
+        int(num_airports), int(num_flights),
+        parse_kind(last_option(options, "kind", "random")),
+        int(last_option(options, "seed", "0")),
+        int(hubs) if hubs else None), path)
+
+
+def run(args: Sequence[str]) -> None:
+    """
+    Runs the benchmark and writes a JSON report
+
+    Raises:
+        ValueError: If the arguments are not valid
+    """
+    positional, options = parse_options(
+        args, ("size", "kind", "seed", "queries", "output"), ("no-memory",))
+    if positional:
+        raise ValueError(f"unexpected argument: {positional[0]}")
+    sizes = [parse_size(size) for size in options["size"]
+             or ["100x1000", "500x10000", "1000x50000"]]
+
+    report = run_benchmark(sizes,
+                           parse_kind(last_option(options, "kind", "random")),
+                           int(last_option(options, "seed", "0")),
+                           int(last_option(options, "queries", "100")),
+                           not options["no-memory"])
+    with open(last_option(options, "output", "benchmark.json"), "w",
+              encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+    for result in report["runs"]:
+        for phase in PHASES:
+            measured = result["phases"][phase]
+            peak = measured["peak_bytes"]
+            print(f"{result['num_airports']}x{result['num_flights']} "
+                  f"{phase}: {measured['per_call']:.6f}s per call"
+                  + (f", peak {peak / 2 ** 20:.1f} MiB"
+                     if peak is not None else ""))
+
+
+def compare(args: Sequence[str]) -> None:
+    """
+    Compares two JSON reports
+
+    Raises:
+        ValueError: If the arguments are not valid
+    """
+    positional, _ = parse_options(args, ())
+    if len(positional) != 2:
+        raise ValueError("expected OLD.json NEW.json")
+    old_path, new_path = positional
+    with open(old_path, encoding="utf-8") as old, \
+            open(new_path, encoding="utf-8") as new:
+        lines = compare_reports(json.load(old), json.load(new))
+    for line in lines:
+        print(line)
+
+
+COMMANDS = {"generate": generate, "run": run, "compare": compare}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(__doc__.split("Usage:")[1].rstrip())
+        sys.exit(1)
+
+    try:
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+    except ValueError as err:
+        print(f"Error: {err}")
+        print(__doc__.split("Usage:")[1].rstrip())
+        sys.exit(1)
@@ -0,0 +1,169 @@
+"""
+Module providing a cache for best_itinerary queries.
+
+Answers are cached at two levels:
+
+- A bounded LRU cache of answers, keyed on
+  (origin code, destination code, start time).
+- A bounded LRU cache of shortest-path trees, keyed on
+  (origin code, start time). A single search from an origin answers
+  the query for every destination, so a miss in the first cache
+  usually does not need a new search.
+
+Both caches are cleared whenever a flight is added to or removed from
+one of the airports of the schedule (see flights.ScheduleVersion).
+"""
+from array import array
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from flights import Airport, Flight, ScheduleVersion, TimeOfDay
+from schedule import CompiledSchedule, cheapest_arrival
+
+# Result of best_itinerary
+Itinerary = Optional[tuple[int, list[Flight]]]
+
+
+class CacheInfo(NamedTuple):
+    """
+    Statistics of an ItineraryCache (similar to functools.lru_cache)
+    """
+    hits: int
+    misses: int
+    tree_hits: int
+    tree_misses: int
+    invalidations: int
+    maxsize: int
+    currsize: int
+    tree_maxsize: int
+    tree_currsize: int
+
+
+class ItineraryCache:
+    """
+    Class representing a cache of best_itinerary answers for a schedule
+    """
+
+    __airports: dict[str, Airport]
+    __maxsize: int
+    __tree_maxsize: int
+    __version: ScheduleVersion
+    __schedule: Optional[CompiledSchedule]
+    __answers: OrderedDict[tuple[str, str, TimeOfDay], Itinerary]
+    __trees: OrderedDict[tuple[str, TimeOfDay], tuple[list[int], array]]
+    __hits: int
+    __misses: int
+    __tree_hits: int
+    __tree_misses: int
+    __invalidations: int
+
+    def __init__(self, airports: dict[str, Airport], maxsize: int = 4096,
+                 tree_maxsize: int = 64):
+        """
+        Constructor
+
+        Args:
+            airports: Dictionary mapping airport codes to Airport objects
+            maxsize: Maximum number of answers to keep
+            tree_maxsize: Maximum number of shortest-path trees to keep
+              (each one uses memory proportional to the schedule size)
+        """
+        assert maxsize > 0 and tree_maxsize > 0, "Cache sizes must be positive"
+
+        self.__airports = airports
+        self.__maxsize = maxsize
+        self.__tree_maxsize = tree_maxsize
+        self.__version = ScheduleVersion(airports)
+        self.__schedule = None
+        self.__answers = OrderedDict()
+        self.__trees = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+        self.__tree_hits = 0
+        self.__tree_misses = 0
+        self.__invalidations = 0
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Returns: Hit and miss statistics, and current size of the caches
+        """
+        return CacheInfo(self.__hits, self.__misses, self.__tree_hits,
+                         self.__tree_misses, self.__invalidations,
+                         self.__maxsize, len(self.__answers),
+                         self.__tree_maxsize, len(self.__trees))
+
+    def clear(self) -> None:
+        """
+        Empties the caches (statistics are kept)
+        """
+        self.__schedule = None
+        self.__answers.clear()
+        self.__trees.clear()
+
+    def best_itinerary(self, origin: Airport, destination: Airport,
+                       start: TimeOfDay) -> Itinerary:
+        """
+        Same as hw4.best_itinerary, but using the cache.
+
+        Raises:
+            ValueError: If either airport is not in the schedule
+        """
+        if self.__version.changed():
+            self.__version.reset()
+            self.__invalidations += 1
+            self.clear()
+
+        key = (origin.code, destination.code, start)
+        if key in self.__answers:
+            self.__hits += 1
+            self.__answers.move_to_end(key)
+            return _copy(self.__answers[key])
+
+        self.__misses += 1
+        answer = self.__search(origin, destination, start)
+        self.__answers[key] = answer
+        if len(self.__answers) > self.__maxsize:
+            self.__answers.popitem(last=False)
+
+        return _copy(answer)
+
+    def __search(self, origin: Airport, destination: Airport,
+                 start: TimeOfDay) -> Itinerary:
+        """
+        Answers a query using the shortest-path tree of the origin
+        (computing the tree if it is not cached)
+        """
+        if self.__schedule is None:
+            self.__schedule = CompiledSchedule(self.__airports)
+        schedule = self.__schedule
+
+        origin_id = schedule.airport_id(origin.code)
+        target_id = schedule.airport_id(destination.code)
+        if origin_id == target_id:
+            return 0, []
+
+        tree_key = (origin.code, start)
+        if tree_key in self.__trees:
+            self.__tree_hits += 1
+            self.__trees.move_to_end(tree_key)
+        else:
+            self.__tree_misses += 1
+            self.__trees[tree_key] = schedule.shortest_paths(origin_id, start)
+            if len(self.__trees) > self.__tree_maxsize:
+                self.__trees.popitem(last=False)
+
+        costs, previous = self.__trees[tree_key]
+        state = cheapest_arrival(costs, target_id)
+        if state is None:
+            return None
+
+        return costs[state], schedule.itinerary(previous, state)
+
+
+def _copy(answer: Itinerary) -> Itinerary:
+    """
+    Returns: A copy of a cached answer that callers can safely modify
+    """
+    if answer is None:
+        return None
+    return answer[0], list(answer[1])
@@ -0,0 +1,407 @@
+"""
+Module providing a router that keeps single-source shortest-path trees
+up to date as flights are added and removed, instead of recomputing
+them after every change (see ItineraryCache, which has to throw all
+its answers away).
+
+A tree is built (with Dijkstra's algorithm over the search states)
+the first time an (origin, start time) pair is queried. After that,
+every change to the schedule made through the router is repaired
+incrementally, in the style of the dynamic shortest path algorithm of
+Ramalingam and Reps:
+
+- Adding a flight can only make states cheaper. If the new flight
+  improves the state it arrives at, Dijkstra's algorithm is resumed
+  from that state, and only visits the states that actually improve.
+- Removing a flight only matters if it is in the tree. In that case,
+  only the states below it in the tree (the ones whose cheapest
+  itinerary used it) can get more expensive: their costs are reset,
+  seeded with the cheapest flight into them from a state that was not
+  affected, and Dijkstra's algorithm is run over them again.
+
+Changes made directly to the Airport objects (instead of through the
+router) are detected with flights.ScheduleVersion, and cause every
+tree to be rebuilt. Changes to other schedules are not mistaken for
+them, so they do not undo the incremental repairs.
+"""
+from array import array
+from collections import OrderedDict
+import heapq
+from typing import Optional
+
+from flights import Airport, Flight, ScheduleVersion, TimeOfDay
+from schedule import NUM_TIMES, UNREACHED
+
+
+class _Tree:
+    """
+    A shortest-path tree over the search states: the cost of every
+    state, and the flight (and state) we reach it from.
+    """
+
+    costs: list[int]
+    flights: list[Optional[Flight]]
+    previous: array
+
+    def __init__(self, num_states: int):
+        self.costs = [UNREACHED] * num_states
+        self.flights = [None] * num_states
+        self.previous = array("l", [UNREACHED]) * num_states
+
+    def grow(self, num_states: int) -> None:
+        """
+        Adds unreached states, up to the given number of states
+        """
+        extra = num_states - len(self.costs)
+        self.costs.extend([UNREACHED] * extra)
+        self.flights.extend([None] * extra)
+        self.previous.extend([UNREACHED] * extra)
+
+
+class DynamicRouter:
+    """
+    Class representing a router that answers best_itinerary queries
+    and supports adding and removing flights
+    """
+
+    __airports: dict[str, Airport]
+    __ids: dict[str, int]
+    __nodes: list[Airport]
+    __out: list[list[tuple[Flight, int, int]]]
+    __in: list[list[Flight]]
+    __trees: OrderedDict[tuple[str, TimeOfDay], _Tree]
+    __max_trees: int
+    __version: ScheduleVersion
+    __last_repaired: int
+
+    def __init__(self, airports: dict[str, Airport], max_trees: int = 64):
+        """
+        Constructor
+
+        Args:
+            airports: Dictionary mapping airport codes to Airport objects
+              (airports added to the schedule through the router are
+              added to this dictionary)
+            max_trees: Maximum number of trees to keep up to date (the
+              least recently used ones are dropped)
+        """
+        assert max_trees > 0, "Number of trees must be positive"
+
+        self.__airports = airports
+        self.__version = ScheduleVersion(airports)
+        self.__max_trees = max_trees
+        self.__trees = OrderedDict()
+        self.__last_repaired = 0
+        self.rebuild()
+
+    @property
+    def num_trees(self) -> int:
+        """
+        Returns: Number of shortest-path trees being kept up to date
+        """
+        return len(self.__trees)
+
+    @property
+    def last_repaired(self) -> int:
+        """
+        Returns: Number of states whose cost was recomputed (over all
+          trees) by the last change to the schedule
+        """
+        return self.__last_repaired
+
+    def rebuild(self) -> None:
+        """
+        Rebuilds the graph from the airports, and drops every tree
+        """
+        self.__version.reset()
+        self.__ids = {}
+        self.__nodes = []
+        self.__out = []
+        self.__in = []
+        self.__trees.clear()
+
+        pending = list(self.__airports.values())
+        while pending:
+            airport = pending.pop()
+            if airport.code in self.__ids:
+                continue
+            self.__add_airport(airport)
+            pending.extend(flight.destination for flight in airport.flights)
+
+        for airport in self.__nodes:
+            for flight in sorted(airport.flights):
+                self.__add_edge(flight)
+
+    def add_flight(self, flight: Flight) -> None:
+        """
+        Adds a flight to the schedule (replacing the flight with the
+        same code from the same airport, if there is one), and repairs
+        the trees.
+
+        Args:
+            flight: The new flight
+        """
+        self.__check_version()
+
+        origin = flight.origin
+        try:
+            origin.get_flight_by_code(flight.code)
+        except ValueError:
+            pass
+        else:
+            self.remove_flight(origin, flight.code)
+
+        origin.add_flight(flight)
+        for airport in (origin, flight.destination):
+            if airport.code not in self.__ids:
+                self.__add_airport(airport)
+                self.__airports.setdefault(airport.code, airport)
+        self.__version.reset()
+        self.__add_edge(flight)
+
+        repaired = 0
+        arrival = self.__arrival(flight)
+        for tree in self.__trees.values():
+            heap = []
+            for tail in self.__tails(flight):
+                cost = tree.costs[tail]
+                if cost == UNREACHED:
+                    continue
+                new_cost = cost + flight.cost
+                old_cost = tree.costs[arrival]
+                if old_cost == UNREACHED or new_cost < old_cost:
+                    tree.costs[arrival] = new_cost
+                    tree.flights[arrival] = flight
+                    tree.previous[arrival] = tail
+                    heap.append((new_cost, arrival))
+            repaired += self.__dijkstra(tree, heap)
+
+        self.__last_repaired = repaired
+
+    def remove_flight(self, origin: Airport, code: str) -> Flight:
+        """
+        Removes a flight from the schedule, and repairs the trees.
+
+        Args:
+            origin: Airport the flight departs from
+            code: Flight code
+
+        Raises:
+            ValueError: If no flight with that code departs from
+              the airport
+
+        Returns: The Flight object that was removed
+        """
+        self.__check_version()
+
+        flight = origin.remove_flight(code)
+        self.__version.reset()
+        self.__remove_edge(flight)
+
+        repaired = 0
+        arrival = self.__arrival(flight)
+        for tree in self.__trees.values():
+            if tree.flights[arrival] is flight:
+                repaired += self.__repair_subtree(tree, arrival)
+
+        self.__last_repaired = repaired
+        return flight
+
+    def best_itinerary(self, origin: Airport, destination: Airport,
+                       start: TimeOfDay) \
+            -> Optional[tuple[int, list[Flight]]]:
+        """
+        Same as hw4.best_itinerary, but using (and keeping) the
+        shortest-path tree of the origin.
+
+        Raises:
+            ValueError: If either airport is not in the schedule
+        """
+        self.__check_version()
+
+        origin_id = self.__airport_id(origin.code)
+        target_id = self.__airport_id(destination.code)
+        if origin_id == target_id:
+            return 0, []
+
+        tree = self.__tree(origin_id, start)
+        best = None
+        for state in range(target_id * NUM_TIMES,
+                           (target_id + 1) * NUM_TIMES):
+            cost = tree.costs[state]
+            if cost != UNREACHED and \
+                    (best is None or cost < tree.costs[best]):
+                best = state
+        if best is None:
+            return None
+
+        flights = []
+        state = best
+        while tree.previous[state] != UNREACHED:
+            flight = tree.flights[state]
+            assert flight is not None
+            flights.append(flight)
+            state = tree.previous[state]
+        flights.reverse()
+
+        return tree.costs[best], flights
+
+    def __check_version(self) -> None:
+        """
+        Rebuilds everything if the schedule was changed without going
+        through the router
+        """
+        if self.__version.changed():
+            self.rebuild()
+
+    def __airport_id(self, code: str) -> int:
+        """
+        Raises:
+            ValueError: If the airport is not in the schedule
+        """
+        if code not in self.__ids:
+            raise ValueError(f"No such airport in schedule: {code}")
+
+        return self.__ids[code]
+
+    def __add_airport(self, airport: Airport) -> None:
+        """
+        Adds an airport (with no flights) to the graph
+        """
+        self.__ids[airport.code] = len(self.__nodes)
+        self.__nodes.append(airport)
+        self.__out.extend([] for _ in range(NUM_TIMES))
+        self.__in.extend([] for _ in range(NUM_TIMES))
+        for tree in self.__trees.values():
+            tree.grow(len(self.__nodes) * NUM_TIMES)
+
+    def __add_edge(self, flight: Flight) -> None:
+        """
+        Adds a flight to the adjacency lists
+        """
+        origin_id = self.__ids[flight.origin.code]
+        arrival = self.__arrival(flight)
+        self.__out[origin_id * NUM_TIMES + flight.departure_time] \
+            .append((flight, arrival, flight.cost))
+        self.__in[arrival].append(flight)
+
+    def __remove_edge(self, flight: Flight) -> None:
+        """
+        Removes a flight from the adjacency lists
+        """
+        origin_id = self.__ids[flight.origin.code]
+        edges = self.__out[origin_id * NUM_TIMES + flight.departure_time]
+        edges[:] = [edge for edge in edges if edge[0] is not flight]
+        self.__in[self.__arrival(flight)].remove(flight)
+
+    def __arrival(self, flight: Flight) -> int:
+        """
+        Returns: The state we arrive at by taking a flight
+        """
+        return self.__ids[flight.destination.code] * NUM_TIMES + \
+            (flight.departure_time + 1) % NUM_TIMES
+
+    def __tails(self, flight: Flight) -> tuple[int, int]:
+        """
+        Returns: The states from which a flight can be taken (arriving
+          at its departure time, or in the period before it)
+        """
+        bucket = self.__ids[flight.origin.code] * NUM_TIMES
+        dep = flight.departure_time
+        return bucket + dep, bucket + (dep - 1) % NUM_TIMES
+
+    def __tree(self, origin_id: int, start: TimeOfDay) -> _Tree:
+        """
+        Returns: The tree of an origin and start time (building it if
+          it is not being kept)
+        """
+        key = (self.__nodes[origin_id].code, start)
+        if key in self.__trees:
+            self.__trees.move_to_end(key)
+            return self.__trees[key]
+
+        tree = _Tree(len(self.__nodes) * NUM_TIMES)
+        source = origin_id * NUM_TIMES + start
+        tree.costs[source] = 0
+        self.__dijkstra(tree, [(0, source)])
+
+        self.__trees[key] = tree
+        if len(self.__trees) > self.__max_trees:
+            self.__trees.popitem(last=False)
+        return tree
+
+    def __dijkstra(self, tree: _Tree, heap: list[tuple[int, int]]) -> int:
+        """
+        Runs (or resumes) Dijkstra's algorithm on a tree, starting from
+        the states in the heap (whose costs must already be set).
+
+        Returns: Number of states settled
+        """
+        heapq.heapify(heap)
+        out = self.__out
+        costs = tree.costs
+        settled = 0
+
+        while heap:
+            cost, state = heapq.heappop(heap)
+            if cost != costs[state]:
+                continue
+            settled += 1
+
+            time = state % NUM_TIMES
+            bucket = state - time
+            for dep in (time, (time + 1) % NUM_TIMES):
+                for flight, nxt, flight_cost in out[bucket + dep]:
+                    new_cost = cost + flight_cost
+                    old_cost = costs[nxt]
+                    if old_cost == UNREACHED or new_cost < old_cost:
+                        costs[nxt] = new_cost
+                        tree.flights[nxt] = flight
+                        tree.previous[nxt] = state
+                        heapq.heappush(heap, (new_cost, nxt))
+
+        return settled
+
+    def __repair_subtree(self, tree: _Tree, root: int) -> int:
+        """
+        Recomputes the costs of the states below a state in a tree,
+        after the flight into that state was removed.
+
+        Returns: Number of states whose cost was recomputed
+        """
+        # Find the states whose cheapest itinerary goes through root
+        affected = [root]
+        for state in affected:
+            time = state % NUM_TIMES
+            bucket = state - time
+            for dep in (time, (time + 1) % NUM_TIMES):
+                for flight, nxt, _ in self.__out[bucket + dep]:
+                    if tree.flights[nxt] is flight and \
+                            tree.previous[nxt] == state:
+                        affected.append(nxt)
+
+        for state in affected:
+            tree.costs[state] = UNREACHED
+            tree.flights[state] = None
+            tree.previous[state] = UNREACHED
+
+        # Seed every affected state with its cheapest flight from a
+        # state that was not affected
+        heap = []
+        for state in affected:
+            for flight in self.__in[state]:
+                for tail in self.__tails(flight):
+                    cost = tree.costs[tail]
+                    if cost == UNREACHED:
+                        continue
+                    new_cost = cost + flight.cost
+                    old_cost = tree.costs[state]
+                    if old_cost == UNREACHED or new_cost < old_cost:
+                        tree.costs[state] = new_cost
+                        tree.flights[state] = flight
+                        tree.previous[state] = tail
+            if tree.costs[state] != UNREACHED:
+                heap.append((tree.costs[state], state))
+
+        self.__dijkstra(tree, heap)
+        return len(affected)
@@ -0,0 +1,459 @@
+"""
+Module providing a time-expanded graph built on top of a compiled
+schedule, along with point-to-point searches over it: plain Dijkstra,
+A* (with a lower bound derived from per-airport minimum costs), and
+bidirectional Dijkstra.
+
+Every airport is expanded into NODES_PER_AIRPORT nodes:
+
+- One arrival node per time of day (we have just landed at the
+  airport at that time, or are starting the itinerary there).
+- One departure node per time of day (we are about to take a flight
+  that leaves the airport at that time).
+- A sink node, used as the single target of point-to-point queries.
+
+The layover rule is built into the edges: an arrival node at time t
+is connected (at no cost) to the departure nodes at times t and t + 1,
+and to the airport's sink node. Every flight is an edge from a
+departure node to the arrival node of the flight's destination,
+weighted by the cost of the flight.
+"""
+from array import array
+import heapq
+from typing import Optional
+
+from flights import Airport, Flight, TimeOfDay
+from schedule import CompiledSchedule, NUM_TIMES, UNREACHED
+
+NODES_PER_AIRPORT = 2 * NUM_TIMES + 1
+SINK = 2 * NUM_TIMES
+
+METHODS = ("dijkstra", "astar", "bidirectional")
+
+
+def arrival_node(airport_id: int, time: int) -> int:
+    """
+    Returns: The arrival node of an airport at a given time
+    """
+    return airport_id * NODES_PER_AIRPORT + time
+
+
+def departure_node(airport_id: int, time: int) -> int:
+    """
+    Returns: The departure node of an airport at a given time
+    """
+    return airport_id * NODES_PER_AIRPORT + NUM_TIMES + time
+
+
+def sink_node(airport_id: int) -> int:
+    """
+    Returns: The sink node of an airport
+    """
+    return airport_id * NODES_PER_AIRPORT + SINK
+
+
+class TimeExpandedGraph:
+    """
+    Class representing the time-expanded graph of a compiled schedule.
+
+    Edges are stored in CSR form twice: once by source node (used by
+    forward searches) and once by destination node (used by the
+    backward half of bidirectional searches). Every edge also records
+    the compiled schedule edge of the flight it represents (UNREACHED
+    for layover edges).
+    """
+
+    __schedule: CompiledSchedule
+    __offsets: array
+    __heads: array
+    __weights: array
+    __flight_edges: array
+    __rev_offsets: array
+    __rev_tails: array
+    __rev_edges: array
+    __min_out: array
+    __min_in: array
+    __last_settled: int
+
+    def __init__(self, schedule: CompiledSchedule):
+        """
+        Constructor
+
+        Args:
+            schedule: The compiled schedule to expand
+        """
+        self.__schedule = schedule
+        num_nodes = schedule.num_airports * NODES_PER_AIRPORT
+        sched_offsets = schedule.offsets
+
+        self.__offsets = array("l", [0])
+        self.__heads = array("l")
+        self.__weights = array("l")
+        self.__flight_edges = array("l")
+
+        for airport_id in range(schedule.num_airports):
+            for time in range(NUM_TIMES):
+                for dep in (time, (time + 1) % NUM_TIMES):
+                    self.__add_edge(departure_node(airport_id, dep), 0,
+                                    UNREACHED)
+                self.__add_edge(sink_node(airport_id), 0, UNREACHED)
+                self.__offsets.append(len(self.__heads))
+            for time in range(NUM_TIMES):
+                bucket = airport_id * NUM_TIMES + time
+                for edge in range(sched_offsets[bucket],
+                                  sched_offsets[bucket + 1]):
+                    self.__add_edge(arrival_node(schedule.targets[edge],
+                                                 (time + 1) % NUM_TIMES),
+                                    schedule.costs[edge], edge)
+                self.__offsets.append(len(self.__heads))
+            self.__offsets.append(len(self.__heads))
+
+        in_degree = [0] * (num_nodes + 1)
+        for head in self.__heads:
+            in_degree[head + 1] += 1
+        for node in range(num_nodes):
+            in_degree[node + 1] += in_degree[node]
+        self.__rev_offsets = array("l", in_degree)
+        self.__rev_tails = array("l", [0]) * len(self.__heads)
+        self.__rev_edges = array("l", [0]) * len(self.__heads)
+
+        fill = in_degree[:-1]
+        for node in range(num_nodes):
+            for edge in range(self.__offsets[node], self.__offsets[node + 1]):
+                head = self.__heads[edge]
+                self.__rev_tails[fill[head]] = node
+                self.__rev_edges[fill[head]] = edge
+                fill[head] += 1
+
+        self.__min_out = array("l", [0]) * schedule.num_airports
+        self.__min_in = array("l", [0]) * schedule.num_airports
+        for airport_id in range(schedule.num_airports):
+            first = sched_offsets[airport_id * NUM_TIMES]
+            last = sched_offsets[(airport_id + 1) * NUM_TIMES]
+            if first < last:
+                self.__min_out[airport_id] = min(schedule.costs[first:last])
+        for edge, target in enumerate(schedule.targets):
+            cost = schedule.costs[edge]
+            if self.__min_in[target] == 0 or cost < self.__min_in[target]:
+                self.__min_in[target] = cost
+
+        self.__last_settled = 0
+
+    def __add_edge(self, head: int, weight: int, flight_edge: int) -> None:
+        """
+        Appends an edge leaving the node currently being built
+        """
+        self.__heads.append(head)
+        self.__weights.append(weight)
+        self.__flight_edges.append(flight_edge)
+
+    @property
+    def schedule(self) -> CompiledSchedule:
+        """
+        Returns: The compiled schedule this graph was built from
+        """
+        return self.__schedule
+
+    @property
+    def num_nodes(self) -> int:
+        """
+        Returns: Number of nodes in the graph
+        """
+        return len(self.__offsets) - 1
+
+    @property
+    def num_edges(self) -> int:
+        """
+        Returns: Number of edges in the graph
+        """
+        return len(self.__heads)
+
+    @property
+    def offsets(self) -> array:
+        """
+        Returns: CSR offsets of the edges leaving each node
+        """
+        return self.__offsets
+
+    @property
+    def heads(self) -> array:
+        """
+        Returns: Node each edge points to
+        """
+        return self.__heads
+
+    @property
+    def weights(self) -> array:
+        """
+        Returns: Weight of each edge
+        """
+        return self.__weights
+
+    @property
+    def flight_edges(self) -> array:
+        """
+        Returns: Compiled schedule edge of each edge (UNREACHED for
+          layover edges)
+        """
+        return self.__flight_edges
+
+    @property
+    def rev_offsets(self) -> array:
+        """
+        Returns: CSR offsets of the edges entering each node
+        """
+        return self.__rev_offsets
+
+    @property
+    def rev_tails(self) -> array:
+        """
+        Returns: Node each reverse edge comes from
+        """
+        return self.__rev_tails
+
+    @property
+    def rev_edges(self) -> array:
+        """
+        Returns: Edge id of each reverse edge
+        """
+        return self.__rev_edges
+
+    @property
+    def last_settled(self) -> int:
+        """
+        Returns: Number of nodes settled by the most recent query
+        """
+        return self.__last_settled
+
+    def lower_bound(self, airport_id: int, target_id: int) -> int:
+        """
+        Lower bound on the cost of getting from an airport to a target
+        airport: unless we are already there, we must take at least
+        one flight out of the airport and one flight into the target.
+
+        Args:
+            airport_id: Id of the airport we are at
+            target_id: Id of the airport we want to reach
+
+        Returns: A cost that no itinerary can beat
+        """
+        if airport_id == target_id:
+            return 0
+        return max(self.__min_out[airport_id], self.__min_in[target_id])
+
+    def best_itinerary(self, origin: Airport, destination: Airport,
+                       start: TimeOfDay, method: str = "astar") \
+            -> Optional[tuple[int, list[Flight]]]:
+        """
+        Same as hw4.best_itinerary, but searching the time-expanded graph.
+
+        The cost of the returned itinerary is always the same as the
+        one returned by hw4.best_itinerary. If there are several
+        itineraries with that cost, the flights may differ.
+
+        Args:
+            origin, destination: Airports
+            start: Time at which we start the itinerary
+            method: One of "dijkstra", "astar", or "bidirectional"
+
+        Raises:
+            ValueError: If the method is not valid, or if either airport
+              is not in the schedule
+
+        Returns: Same as hw4.best_itinerary
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown search method: {method}")
+
+        origin_id = self.__schedule.airport_id(origin.code)
+        target_id = self.__schedule.airport_id(destination.code)
+
+        if method == "bidirectional":
+            result = self.bidirectional(origin_id, start, target_id)
+        else:
+            result = self.astar(origin_id, start, target_id,
+                                heuristic=method == "astar")
+
+        if result is None:
+            return None
+
+        cost, edges = result
+        flights = self.__schedule.flights
+        return cost, [flights[self.__flight_edges[e]] for e in edges
+                      if self.__flight_edges[e] != UNREACHED]
+
+    def astar(self, origin_id: int, start: TimeOfDay, target_id: int,
+              heuristic: bool = True) -> Optional[tuple[int, list[int]]]:
+        """
+        A* search from the arrival node of the origin at the start time
+        to the sink node of the target airport. Without the heuristic,
+        this is a plain (early-exit) Dijkstra search.
+
+        Args:
+            origin_id: Id of the origin airport
+            start: Time at which we start the itinerary
+            target_id: Id of the destination airport
+            heuristic: Whether to use lower_bound to guide the search
+
+        Returns: The cost and the list of graph edges of the cheapest
+          path, or None if the target cannot be reached.
+        """
+        offsets = self.__offsets
+        heads = self.__heads
+        weights = self.__weights
+        min_out = self.__min_out
+        min_in_target = self.__min_in[target_id] if heuristic else 0
+
+        source = arrival_node(origin_id, start)
+        target = sink_node(target_id)
+        costs = {source: 0}
+        previous: dict[int, int] = {}
+        settled = set()
+        heap = [(0, source)]
+
+        while heap:
+            _, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            settled.add(node)
+
+            if node == target:
+                self.__last_settled = len(settled)
+                return costs[node], self.__path(previous, node)
+
+            cost = costs[node]
+            for edge in range(offsets[node], offsets[node + 1]):
+                head = heads[edge]
+                new_cost = cost + weights[edge]
+                if head not in costs or new_cost < costs[head]:
+                    costs[head] = new_cost
+                    previous[head] = edge
+                    airport_id = head // NODES_PER_AIRPORT
+                    if airport_id == target_id or not heuristic:
+                        bound = 0
+                    else:
+                        bound = max(min_out[airport_id], min_in_target)
+                    heapq.heappush(heap, (new_cost + bound, head))
+
+        self.__last_settled = len(settled)
+        return None
+
+    def bidirectional(self, origin_id: int, start: TimeOfDay,
+                      target_id: int) -> Optional[tuple[int, list[int]]]:
+        """
+        Bidirectional Dijkstra search from the arrival node of the origin
+        at the start time to the sink node of the target airport. The
+        forward and backward searches take turns (whichever has the
+        smaller tentative cost goes next), and we stop as soon as no
+        path through unsettled nodes can beat the best one found so far.
+
+        Args:
+            origin_id: Id of the origin airport
+            start: Time at which we start the itinerary
+            target_id: Id of the destination airport
+
+        Returns: The cost and the list of graph edges of the cheapest
+          path, or None if the target cannot be reached.
+        """
+        offsets = self.__offsets
+        heads = self.__heads
+        weights = self.__weights
+        rev_offsets = self.__rev_offsets
+        rev_tails = self.__rev_tails
+        rev_edges = self.__rev_edges
+
+        source = arrival_node(origin_id, start)
+        target = sink_node(target_id)
+
+        fwd_costs = {source: 0}
+        bwd_costs = {target: 0}
+        fwd_previous: dict[int, int] = {}
+        bwd_next: dict[int, int] = {}
+        fwd_settled: set[int] = set()
+        bwd_settled: set[int] = set()
+        fwd_heap = [(0, source)]
+        bwd_heap = [(0, target)]
+
+        best: Optional[int] = None
+        meeting = source
+
+        while fwd_heap and bwd_heap:
+            if best is not None and fwd_heap[0][0] + bwd_heap[0][0] >= best:
+                break
+
+            if fwd_heap[0][0] <= bwd_heap[0][0]:
+                cost, node = heapq.heappop(fwd_heap)
+                if node in fwd_settled:
+                    continue
+                fwd_settled.add(node)
+                for edge in range(offsets[node], offsets[node + 1]):
+                    head = heads[edge]
+                    new_cost = cost + weights[edge]
+                    if head not in fwd_costs or new_cost < fwd_costs[head]:
+                        fwd_costs[head] = new_cost
+                        fwd_previous[head] = edge
+                        heapq.heappush(fwd_heap, (new_cost, head))
+                    if head in bwd_costs and \
+                            (best is None or
+                             new_cost + bwd_costs[head] < best):
+                        best = new_cost + bwd_costs[head]
+                        meeting = head
+            else:
+                cost, node = heapq.heappop(bwd_heap)
+                if node in bwd_settled:
+                    continue
+                bwd_settled.add(node)
+                for rev in range(rev_offsets[node], rev_offsets[node + 1]):
+                    tail = rev_tails[rev]
+                    edge = rev_edges[rev]
+                    new_cost = cost + weights[edge]
+                    if tail not in bwd_costs or new_cost < bwd_costs[tail]:
+                        bwd_costs[tail] = new_cost
+                        bwd_next[tail] = edge
+                        heapq.heappush(bwd_heap, (new_cost, tail))
+                    if tail in fwd_costs and \
+                            (best is None or
+                             new_cost + fwd_costs[tail] < best):
+                        best = new_cost + fwd_costs[tail]
+                        meeting = tail
+
+        self.__last_settled = len(fwd_settled) + len(bwd_settled)
+        if best is None:
+            return None
+
+        edges = self.__path(fwd_previous, meeting)
+        node = meeting
+        while node in bwd_next:
+            edge = bwd_next[node]
+            edges.append(edge)
+            node = heads[edge]
+
+        return best, edges
+
+    def __path(self, previous: dict[int, int], node: int) -> list[int]:
+        """
+        Rebuild the list of edges leading to a node, given the
+        predecessor edges recorded by a forward search.
+        """
+        edges = []
+        while node in previous:
+            edge = previous[node]
+            edges.append(edge)
+            node = self.edge_tail(edge)
+        edges.reverse()
+        return edges
+
+    def edge_tail(self, edge: int) -> int:
+        """
+        Returns: The node an edge leaves from (found by binary search
+          over the CSR offsets)
+        """
+        offsets = self.__offsets
+        lo, hi = 0, len(offsets) - 1
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if offsets[mid] <= edge:
+                lo = mid
+            else:
+                hi = mid
+        return lo
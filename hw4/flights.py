@@ -4,6 +4,21 @@ supporting data types. This module also includes functions to
 create sample schedules described in the homework writeup.
 """
 from enum import IntEnum
+from typing import Iterable, ValuesView
+
+# Number of changes made to any airport so far (see ScheduleVersion)
+_changes = 0
+
+
+def schedule_version(airports: Iterable["Airport"]) -> int:
+    """
+    Args:
+        airports: The airports of a schedule
+
+    Returns: A counter that increases every time a flight is added to
+    or removed from one of the airports (the sum of their versions).
+    """
+    return sum(airport.version for airport in airports)
 
 
 class TimeOfDay(IntEnum):
@@ -22,9 +37,14 @@ class Airport:
     Class representing an individual airport
     """
 
+    # Airports and flights use __slots__ (instead of a __dict__ per
+    # object) so that large schedules take less memory
+    __slots__ = ("__name", "__code", "__departures", "__version")
+
     __name: str
     __code: str
-    __flights: dict[str, "Flight"]
+    __departures: tuple[dict[str, "Flight"], ...]
+    __version: int
 
     def __init__(self, name: str, code: str):
         """
@@ -40,7 +60,11 @@ class Airport:
         self.__name = name
         self.__code = code
 
-        self.__flights = {}
+        # Flights indexed by departure time, then by flight code (flight
+        # codes are unique within an airport, so there is no separate
+        # index by code)
+        self.__departures = tuple({} for _ in TimeOfDay)
+        self.__version = 0
 
     def __str__(self) -> str:
         """
@@ -77,12 +101,29 @@ class Airport:
         """
         return self.__code
 
+    @property
+    def version(self) -> int:
+        """
+        Returns: Number of times a flight has been added to or removed
+        from this airport
+        """
+        return self.__version
+
     @property
     def flights(self) -> set["Flight"]:
         """
         Returns: Flights departing from this airport
         """
-        return set(self.__flights.values())
+        return {flight for flights in self.__departures
+                for flight in flights.values()}
+
+    def departures(self, time: TimeOfDay) -> ValuesView["Flight"]:
+        """
+        Returns: Flights departing from this airport at a given time
+        of day. This is a view of the airport's flights (it is not a
+        copy, and it reflects any flights added or removed later).
+        """
+        return self.__departures[time].values()
 
     def add_flight(self, flight: "Flight") -> None:
         """
@@ -95,11 +136,43 @@ class Airport:
         Returns:
 
         """
-        error_msg = f"Can't add flight {flight} to airport {self.__code}. " \
-                    f"Origin airport ({flight.origin.code}) does not match."
-        assert flight.origin == self, error_msg
+        assert flight.origin == self, \
+            f"Can't add flight {flight} to airport {self.__code}. " \
+            f"Origin airport ({flight.origin.code}) does not match."
+
+        global _changes  # pylint: disable=global-statement
+        _changes += 1
+        self.__version += 1
+
+        code = flight.code
+        for flights in self.__departures:
+            flights.pop(code, None)
+
+        self.__departures[flight.departure_time][code] = flight
+
+    def remove_flight(self, code: str) -> "Flight":
+        """
+        Removes a flight from the set of flights departing
+        from this airport.
+
+        Args:
+            code: Flight code
+
+        Raises:
+            ValueError: If no flight with that code departs from
+            the airport
+
+        Returns: The Flight object that was removed
+        """
+        global _changes  # pylint: disable=global-statement
+
+        for flights in self.__departures:
+            if code in flights:
+                _changes += 1
+                self.__version += 1
+                return flights.pop(code)
 
-        self.__flights[flight.code] = flight
+        raise ValueError(f"{self.__code} has no such flight: {code}")
 
     def get_flight_by_code(self, code: str) -> "Flight":
         """
@@ -119,10 +192,11 @@ class Airport:
         and it departs from this airport)
 
         """
-        if code not in self.__flights:
-            raise ValueError(f"{self.__code} has no such flight: {code}")
+        for flights in self.__departures:
+            if code in flights:
+                return flights[code]
 
-        return self.__flights[code]
+        raise ValueError(f"{self.__code} has no such flight: {code}")
 
 
 class Flight:
@@ -130,12 +204,16 @@ class Flight:
     Class representing an individual flight.
     """
 
+    __slots__ = ("__origin", "__destination", "__airline", "__flight_num",
+                 "__departure_time", "__cost", "__code")
+
     __origin: Airport
     __destination: Airport
     __airline: str
     __flight_num: int
     __departure_time: TimeOfDay
     __cost: int
+    __code: str
 
     def __init__(self, origin: Airport, destination: Airport, airline: str,
                  flight_num: int, departure_time: TimeOfDay, cost: int):
@@ -161,6 +239,8 @@ class Flight:
         self.__flight_num = flight_num
         self.__departure_time = departure_time
         self.__cost = cost
+        # The code is used as a key and for sorting, so it is built once
+        self.__code = f"{airline}{flight_num:04}"
 
     def __str__(self) -> str:
         """
@@ -180,7 +260,7 @@ class Flight:
         If we need to sort flights at any point, we will
         do so by the flight code.
         """
-        return self.code < other.code
+        return self.__code < other.__code
 
     @property
     def origin(self) -> Airport:
@@ -217,7 +297,7 @@ class Flight:
         by the flight number (if the flight number has less than 4 digits,
         it is padded with zeros on the left)
         """
-        return f"{self.__airline}{self.__flight_num:04}"
+        return self.__code
 
     @property
     def departure_time(self) -> TimeOfDay:
@@ -234,6 +314,55 @@ class Flight:
         return self.__cost
 
 
+class ScheduleVersion:
+    """
+    Class keeping track of the version of a schedule (see
+    schedule_version), so that indexes built over it can find out if
+    they are stale.
+
+    Summing the versions of the airports takes time proportional to
+    the number of airports, so it is only done after a flight has been
+    added to or removed from some airport (in this schedule or in any
+    other one): checking a schedule that nothing has changed since the
+    last check takes constant time.
+    """
+
+    __airports: dict[str, Airport]
+    __version: int
+    __changes: int
+
+    def __init__(self, airports: dict[str, Airport]):
+        """
+        Constructor
+
+        Args:
+            airports: Dictionary mapping airport codes to Airport objects
+              (only changes to the airports in it are tracked)
+        """
+        self.__airports = airports
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Records the current version of the schedule
+        """
+        self.__changes = _changes
+        self.__version = schedule_version(self.__airports.values())
+
+    def changed(self) -> bool:
+        """
+        Returns: True if the schedule has changed since the last call
+        to reset, False otherwise
+        """
+        if self.__changes == _changes:
+            return False
+        if self.__version != schedule_version(self.__airports.values()):
+            return True
+        # Only other schedules have changed
+        self.__changes = _changes
+        return False
+
+
 def sample_schedule_1() -> dict[str, Airport]:
     """
     Returns: Sample schedule described in the "Flight Schedules" section
@@ -0,0 +1,140 @@
+"""
+Module providing a seeded generator of synthetic flight schedules,
+in the same CSV format as the files in files/ (see loader.COLUMNS).
+
+Two kinds of schedules can be generated:
+
+- random: the origin and destination of every flight are picked
+  uniformly at random among all the airports.
+- hub: a few airports are hubs. Flights either connect two hubs, or
+  connect a hub with one of the other airports (spokes), so going
+  from one spoke to another usually takes at least two flights.
+
+The same arguments (including the seed) always produce the same
+schedule.
+"""
+import csv
+import random
+import string
+from typing import Optional
+
+from flights import TimeOfDay
+from loader import COLUMNS
+
+KINDS = ("random", "hub")
+
+# Largest flight number allowed by the loader
+MAX_FLIGHT_NUM = 9999
+
+# Largest number of flights (every airline uses every flight number)
+MAX_FLIGHTS = MAX_FLIGHT_NUM * len(string.ascii_uppercase) ** 2
+
+# A generated row, with one value per column in COLUMNS
+ScheduleRow = tuple[str, int, str, str, str, str, str, int]
+
+
+def airport_codes(num_airports: int, rng: random.Random) -> list[str]:
+    """
+    Generates distinct 3-letter airport codes.
+
+    Args:
+        num_airports: Number of codes
+        rng: Random number generator
+
+    Raises:
+        ValueError: If there are not enough 3-letter codes
+
+    Returns: The codes, in sorted order
+    """
+    letters = string.ascii_uppercase
+    if not 0 < num_airports <= len(letters) ** 3:
+        raise ValueError(f"invalid number of airports: {num_airports}")
+
+    codes = []
+    for n in rng.sample(range(len(letters) ** 3), num_airports):
+        n, third = divmod(n, len(letters))
+        first, second = divmod(n, len(letters))
+        codes.append(letters[first] + letters[second] + letters[third])
+    return sorted(codes)
+
+
+def generate_schedule(num_airports: int, num_flights: int,
+                      kind: str = "random", seed: int = 0,
+                      num_hubs: Optional[int] = None,
+                      max_cost: int = 500) -> list[ScheduleRow]:
+    """
+    Generates a synthetic schedule.
+
+    Args:
+        num_airports: Number of airports (at least 2)
+        num_flights: Number of flights
+        kind: Kind of schedule (one of KINDS)
+        seed: Seed of the random number generator
+        num_hubs: Number of hubs, for hub schedules (by default, one
+          for every 20 airports, with a minimum of one)
+        max_cost: Largest cost of a flight (costs are between 1 and
+          max_cost)
+
+    Raises:
+        ValueError: If any of the arguments is not valid
+
+    Returns: The rows of the schedule
+    """
+    if kind not in KINDS:
+        raise ValueError(f"invalid kind of schedule: {kind}")
+    if num_airports < 2:
+        raise ValueError(f"invalid number of airports: {num_airports}")
+    if not 0 <= num_flights <= MAX_FLIGHTS:
+        raise ValueError(f"invalid number of flights: {num_flights}")
+    if num_hubs is None:
+        num_hubs = max(1, num_airports // 20)
+    if kind == "hub" and not 0 < num_hubs < num_airports:
+        raise ValueError(f"invalid number of hubs: {num_hubs}")
+
+    rng = random.Random(seed)
+    codes = airport_codes(num_airports, rng)
+    names = {code: f"{code} International" for code in codes}
+    hubs = codes[:num_hubs] if kind == "hub" else []
+    spokes = codes[num_hubs:] if kind == "hub" else []
+    times = [time.name for time in TimeOfDay]
+    letters = string.ascii_uppercase
+
+    rows = []
+    for i in range(num_flights):
+        if kind == "random":
+            origin, destination = rng.sample(codes, 2)
+        elif len(hubs) > 1 and rng.random() < 0.2:
+            origin, destination = rng.sample(hubs, 2)
+        else:
+            origin, destination = rng.choice(hubs), rng.choice(spokes)
+            if rng.random() < 0.5:
+                origin, destination = destination, origin
+
+        # Flight numbers are unique for every airline, so flight codes
+        # are unique in the whole schedule
+        airline_id, flight_num = divmod(i, MAX_FLIGHT_NUM)
+        airline = letters[airline_id // len(letters)] + \
+            letters[airline_id % len(letters)]
+
+        rows.append((airline, flight_num + 1, origin, names[origin],
+                     destination, names[destination], rng.choice(times),
+                     rng.randint(1, max_cost)))
+
+    return rows
+
+
+def write_schedule(rows: list[ScheduleRow], path: str) -> None:
+    """
+    Writes a schedule to a CSV file.
+
+    Args:
+        rows: The rows of the schedule
+        path: Path of the file
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(COLUMNS)
+        writer.writerows(rows)
@@ -0,0 +1,439 @@
+"""
+Module providing a hub labeling of the time-expanded graph of a
+schedule (see expanded.py), which answers cheapest-itinerary queries
+without running a search.
+
+Every node v gets two labels: an out label with pairs (hub, cost of
+the cheapest path from v to the hub), and an in label with pairs
+(hub, cost of the cheapest path from the hub to v). The labels are
+built so that, for any two nodes s and t, some hub on a cheapest path
+from s to t is in both the out label of s and the in label of t. The
+cost of getting from s to t is then the lowest out cost plus in cost
+over the hubs the two labels have in common, which only takes a few
+dictionary lookups. Queries go from the arrival node of the origin to
+the sink node of the destination, so they find the cheapest arrival
+at any time of day.
+
+The labels are computed with pruned landmark labeling (Akiba, Iwata,
+and Yoshida, 2013): nodes are processed in order of decreasing
+degree, and from each one we run a forward and a backward Dijkstra
+search that stops expanding any node whose cost can already be
+answered by the labels built so far. Every label entry also records
+the next edge on the path to (or from) its hub, so the flights of an
+itinerary can be unpacked on demand.
+
+The labels can be saved to a file next to the schedule, and loaded
+back without redoing the preprocessing.
+
+Usage: python3 hublabels.py SCHEDULE.csv LABELS
+"""
+from array import array
+import heapq
+import struct
+import sys
+from time import perf_counter
+from typing import NamedTuple, Optional, Sequence
+import zlib
+
+from flights import Airport, Flight, TimeOfDay
+from expanded import TimeExpandedGraph, arrival_node, sink_node
+from loader import load_schedule
+from schedule import CompiledSchedule, UNREACHED
+
+MAGIC = b"HW4HUBL1"
+
+SECTIONS = ("out_offsets", "out_hubs", "out_costs", "out_edges",
+            "in_offsets", "in_hubs", "in_costs", "in_edges")
+
+# Magic number, byte order, number of airports, number of flights,
+# checksum of the compiled schedule, preprocessing time, and the size
+# (number of integers) of every section
+HEADER = struct.Struct("<8s1s7xqqqd" + "q" * len(SECTIONS))
+
+# Labels of every node while they are being built: hub -> (cost, edge)
+_Labels = list[dict[int, tuple[int, int]]]
+
+
+class LabelStats(NamedTuple):
+    """
+    Size of a hub labeling, and the time it took to build
+    """
+    num_nodes: int
+    out_entries: int
+    in_entries: int
+    max_label: int
+    # Size of the labels when saved to a file
+    index_bytes: int
+    build_seconds: float
+
+    @property
+    def avg_label(self) -> float:
+        """
+        Returns: Average number of entries in a label
+        """
+        return (self.out_entries + self.in_entries) / (2 * self.num_nodes)
+
+
+def schedule_checksum(schedule: CompiledSchedule) -> int:
+    """
+    Returns: A checksum of the arrays of a compiled schedule (used to
+      check that saved labels belong to the schedule)
+    """
+    checksum = zlib.crc32("".join(schedule.codes).encode("ascii"))
+    for values in (schedule.offsets, schedule.arrivals, schedule.costs):
+        checksum = zlib.crc32(array("q", values).tobytes(), checksum)
+    return checksum
+
+
+def _covered(first: dict[int, tuple[int, int]],
+             second: dict[int, tuple[int, int]], cost: int) -> bool:
+    """
+    Returns: Whether two labels have a hub in common with a combined
+      cost of at most the given cost
+    """
+    if len(first) > len(second):
+        first, second = second, first
+
+    for hub, (first_cost, _) in first.items():
+        other = second.get(hub)
+        if other is not None and first_cost + other[0] <= cost:
+            return True
+    return False
+
+
+def _pruned_search(root: int, offsets: Sequence[int], ends: Sequence[int],
+                   weights: Sequence[int], edge_ids: Optional[Sequence[int]],
+                   root_label: dict[int, tuple[int, int]],
+                   labels: _Labels) -> None:
+    """
+    Runs one pruned Dijkstra search of pruned landmark labeling, adding
+    the root as a hub to the labels of the nodes it reaches.
+
+    Args:
+        root: Node the search starts from
+        offsets, ends, weights: Graph to search, in CSR form (the
+          reverse graph, for backward searches)
+        edge_ids: Edge id of every CSR entry (None if the CSR entry
+          number is the edge id)
+        root_label: Label of the root on the opposite side (its out
+          label for forward searches, and its in label for backward
+          searches)
+        labels: Labels being built (in labels for forward searches,
+          and out labels for backward searches)
+    """
+    costs = {root: 0}
+    settled: set[int] = set()
+    heap = [(0, root, UNREACHED)]
+
+    while heap:
+        cost, node, edge = heapq.heappop(heap)
+        if node in settled:
+            continue
+        settled.add(node)
+
+        if node != root and _covered(root_label, labels[node], cost):
+            continue
+        labels[node][root] = (cost, edge)
+
+        for i in range(offsets[node], offsets[node + 1]):
+            end = ends[i]
+            new_cost = cost + weights[i]
+            if end not in costs or new_cost < costs[end]:
+                costs[end] = new_cost
+                heapq.heappush(heap, (new_cost, end,
+                                      i if edge_ids is None else edge_ids[i]))
+
+
+def _flatten(labels: _Labels) -> tuple[array, array, array, array]:
+    """
+    Returns: The labels in CSR form: offsets by node, and the hub,
+      cost, and edge of every entry
+    """
+    offsets, hubs, costs, edges = (array("l", [0]), array("l"),
+                                   array("l"), array("l"))
+    for label in labels:
+        for hub, (cost, edge) in label.items():
+            hubs.append(hub)
+            costs.append(cost)
+            edges.append(edge)
+        offsets.append(len(hubs))
+    return offsets, hubs, costs, edges
+
+
+class HubLabels:
+    """
+    Class representing the hub labeling of a compiled schedule
+    """
+
+    __schedule: CompiledSchedule
+    __graph: TimeExpandedGraph
+    __arrays: dict[str, array]
+    __out: list[dict[int, int]]
+    __in: list[dict[int, int]]
+    __build_seconds: float
+
+    def __init__(self, schedule: CompiledSchedule, graph: TimeExpandedGraph,
+                 arrays: dict[str, array], build_seconds: float):
+        """
+        Constructor (use build_hub_labels or load_hub_labels to get one)
+
+        Args:
+            schedule: The compiled schedule the labels belong to
+            graph: The time-expanded graph of the schedule
+            arrays: The labels in CSR form (one array per section in
+              SECTIONS)
+            build_seconds: Time it took to build the labels
+        """
+        self.__schedule = schedule
+        self.__graph = graph
+        self.__arrays = arrays
+        self.__build_seconds = build_seconds
+
+        # Position of every hub in the label of every node
+        self.__out = []
+        self.__in = []
+        for side, index in (("out", self.__out), ("in", self.__in)):
+            offsets, hubs = arrays[f"{side}_offsets"], arrays[f"{side}_hubs"]
+            for node in range(graph.num_nodes):
+                first, last = offsets[node], offsets[node + 1]
+                index.append(dict(zip(hubs[first:last], range(first, last))))
+
+    @property
+    def schedule(self) -> CompiledSchedule:
+        """
+        Returns: The compiled schedule the labels belong to
+        """
+        return self.__schedule
+
+    @property
+    def arrays(self) -> dict[str, array]:
+        """
+        Returns: The labels in CSR form (one array per section in
+          SECTIONS)
+        """
+        return self.__arrays
+
+    def stats(self) -> LabelStats:
+        """
+        Returns: The size of the labels, and the time it took to build
+          them
+        """
+        sizes = [len(label) for label in self.__out + self.__in]
+        num_ints = sum(len(values) for values in self.__arrays.values())
+        return LabelStats(self.__graph.num_nodes,
+                          len(self.__arrays["out_hubs"]),
+                          len(self.__arrays["in_hubs"]),
+                          max(sizes, default=0),
+                          array("i").itemsize * num_ints,
+                          self.__build_seconds)
+
+    def cost(self, origin: Airport, destination: Airport,
+             start: TimeOfDay) -> Optional[int]:
+        """
+        Args:
+            origin, destination: Airports
+            start: Time at which we start the itinerary
+
+        Raises:
+            ValueError: If either airport is not in the schedule
+
+        Returns: The cost of the cheapest itinerary (the same as the
+          one returned by hw4.best_itinerary), or None if there is none
+        """
+        result = self.__meet(origin, destination, start)
+        return None if result is None else result[0]
+
+    def best_itinerary(self, origin: Airport, destination: Airport,
+                       start: TimeOfDay) \
+            -> Optional[tuple[int, list[Flight]]]:
+        """
+        Same as hw4.best_itinerary, but using the labels (the flights
+        may differ if there are several itineraries with the lowest
+        cost).
+
+        Raises:
+            ValueError: If either airport is not in the schedule
+        """
+        if origin.code == destination.code:
+            return 0, []
+
+        result = self.__meet(origin, destination, start)
+        if result is None:
+            return None
+
+        cost, source, target, hub = result
+        graph = self.__graph
+        out_edges, in_edges = self.__arrays["out_edges"], \
+            self.__arrays["in_edges"]
+
+        edges = []
+        node = source
+        while node != hub:
+            edge = out_edges[self.__out[node][hub]]
+            edges.append(edge)
+            node = graph.heads[edge]
+
+        to_target = []
+        node = target
+        while node != hub:
+            edge = in_edges[self.__in[node][hub]]
+            to_target.append(edge)
+            node = graph.edge_tail(edge)
+        edges.extend(reversed(to_target))
+
+        flights = self.__schedule.flights
+        return cost, [flights[graph.flight_edges[edge]] for edge in edges
+                      if graph.flight_edges[edge] != UNREACHED]
+
+    def __meet(self, origin: Airport, destination: Airport,
+               start: TimeOfDay) -> Optional[tuple[int, int, int, int]]:
+        """
+        Returns: The cost of the cheapest itinerary, its source and
+          target nodes, and the hub where the two labels meet (or None
+          if there is no itinerary)
+        """
+        source = arrival_node(self.__schedule.airport_id(origin.code), start)
+        target = sink_node(self.__schedule.airport_id(destination.code))
+        out_label, in_label = self.__out[source], self.__in[target]
+        out_costs, in_costs = self.__arrays["out_costs"], \
+            self.__arrays["in_costs"]
+
+        best_cost, best_hub = sys.maxsize, UNREACHED
+        if len(out_label) <= len(in_label):
+            for hub, i in out_label.items():
+                j = in_label.get(hub)
+                if j is not None:
+                    cost = out_costs[i] + in_costs[j]
+                    if cost < best_cost:
+                        best_cost, best_hub = cost, hub
+        else:
+            for hub, j in in_label.items():
+                found = out_label.get(hub)
+                if found is not None:
+                    cost = out_costs[found] + in_costs[j]
+                    if cost < best_cost:
+                        best_cost, best_hub = cost, hub
+
+        if best_hub == UNREACHED:
+            return None
+        return best_cost, source, target, best_hub
+
+
+def build_hub_labels(schedule: CompiledSchedule) -> HubLabels:
+    """
+    Builds the hub labeling of a compiled schedule.
+
+    Args:
+        schedule: The compiled schedule
+
+    Returns: The labels
+    """
+    started = perf_counter()
+    graph = TimeExpandedGraph(schedule)
+    num_nodes = graph.num_nodes
+    offsets, rev_offsets = graph.offsets, graph.rev_offsets
+
+    # Nodes with more edges are more likely to be on many cheapest
+    # paths, so they are processed (and become hubs) first
+    order = sorted(range(num_nodes),
+                   key=lambda node: (offsets[node] - offsets[node + 1] +
+                                     rev_offsets[node] -
+                                     rev_offsets[node + 1], node))
+    rev_weights = array("l", (graph.weights[edge]
+                              for edge in graph.rev_edges))
+
+    out_labels: _Labels = [{} for _ in range(num_nodes)]
+    in_labels: _Labels = [{} for _ in range(num_nodes)]
+    for root in order:
+        _pruned_search(root, offsets, graph.heads, graph.weights, None,
+                       out_labels[root], in_labels)
+        _pruned_search(root, rev_offsets, graph.rev_tails, rev_weights,
+                       graph.rev_edges, in_labels[root], out_labels)
+
+    arrays = dict(zip(SECTIONS, _flatten(out_labels) + _flatten(in_labels)))
+    return HubLabels(schedule, graph, arrays, perf_counter() - started)
+
+
+def save_hub_labels(labels: HubLabels, path: str) -> None:
+    """
+    Writes hub labels to a file.
+
+    Args:
+        labels: The labels
+        path: Path of the file
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    schedule = labels.schedule
+    sections = [array("i", labels.arrays[name]) for name in SECTIONS]
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, sys.byteorder[0].encode("ascii"),
+                               schedule.num_airports, schedule.num_flights,
+                               schedule_checksum(schedule),
+                               labels.stats().build_seconds,
+                               *[len(values) for values in sections]))
+        for values in sections:
+            values.tofile(file)
+
+
+def load_hub_labels(schedule: CompiledSchedule, path: str) -> HubLabels:
+    """
+    Loads hub labels written by save_hub_labels.
+
+    Args:
+        schedule: The compiled schedule the labels were built from
+        path: Path of the file
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file does not contain hub labels, or if
+          they were built from a different schedule
+
+    Returns: The labels
+    """
+    with open(path, "rb") as file:
+        header = file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ValueError(f"{path} does not contain hub labels")
+
+        magic, byteorder, num_airports, num_flights, checksum, \
+            build_seconds, *sizes = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} does not contain hub labels")
+        if byteorder != sys.byteorder[0].encode("ascii"):
+            raise ValueError(f"{path} was written on a machine with a "
+                             f"different byte order")
+        if (num_airports, num_flights, checksum) != \
+                (schedule.num_airports, schedule.num_flights,
+                 schedule_checksum(schedule)):
+            raise ValueError(f"{path} was built from a different schedule")
+
+        arrays: dict[str, array] = {}
+        for name, size in zip(SECTIONS, sizes):
+            values = array("i")
+            try:
+                values.fromfile(file, size)
+            except EOFError as err:
+                raise ValueError(f"{path} is truncated") from err
+            arrays[name] = array("l", values)
+
+    return HubLabels(schedule, TimeExpandedGraph(schedule), arrays,
+                     build_seconds)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python3 hublabels.py SCHEDULE.csv LABELS")
+        sys.exit(1)
+
+    hub_labels = build_hub_labels(
+        CompiledSchedule(load_schedule(sys.argv[1]).airports))
+    save_hub_labels(hub_labels, sys.argv[2])
+
+    stats = hub_labels.stats()
+    print(f"Built in {stats.build_seconds:.2f}s: {stats.num_nodes} nodes, "
+          f"{stats.out_entries + stats.in_entries} label entries "
+          f"(average {stats.avg_label:.1f}, largest {stats.max_label}), "
+          f"{stats.index_bytes / 2 ** 20:.1f} MiB")
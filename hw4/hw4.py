@@ -13,10 +13,26 @@ Online resources consulted:
 """
 
 import heapq
-import csv
+from itertools import chain
+import os
+from time import perf_counter
 from typing import Optional
 
 from flights import Airport, Flight, TimeOfDay
+import instrument
+from loader import load_schedule
+
+def arrival_time(flight: Flight) -> TimeOfDay:
+    """
+    Given a flight, return the time of day at which it arrives at its
+    destination (every flight lands in the period after it departs)
+
+    Args:
+        flight: A flight
+
+    Returns: Time of day when the flight arrives
+    """
+    return TimeOfDay((flight.departure_time + 1) % len(TimeOfDay))
 
 def valid_flights(airport: Airport, arrival_time: TimeOfDay) -> set[Flight]:
     """
@@ -31,7 +47,9 @@ def valid_flights(airport: Airport, arrival_time: TimeOfDay) -> set[Flight]:
     Returns: A set of flights
 
     """
-    raise NotImplementedError
+    next_time = TimeOfDay((arrival_time + 1) % len(TimeOfDay))
+
+    return {*airport.departures(arrival_time), *airport.departures(next_time)}
 
 def process_itinerary(origin: Airport, start: TimeOfDay,
                       flight_codes: list[str]) -> Optional[Airport]:
@@ -60,7 +78,23 @@ def process_itinerary(origin: Airport, start: TimeOfDay,
     Returns: The Airport object for the final airport, if the itinerary
       is valid, otherwise returns None.
     """
-    raise NotImplementedError
+    airport = origin
+    time = start
+
+    for code in flight_codes:
+        try:
+            flight = airport.get_flight_by_code(code)
+        except ValueError:
+            return None
+
+        if flight.departure_time not in \
+                (time, TimeOfDay((time + 1) % len(TimeOfDay))):
+            return None
+
+        airport = flight.destination
+        time = arrival_time(flight)
+
+    return airport
 
 def is_reachable(origin: Airport, destination: Airport,
                  start: TimeOfDay) -> bool:
@@ -80,7 +114,39 @@ def is_reachable(origin: Airport, destination: Airport,
     Returns: True if I can reach the destination from the origin,
              False otherwise.
     """
-    raise NotImplementedError
+    if origin == destination:
+        return True
+
+    collect = instrument.enabled()
+    started = perf_counter() if collect else 0.0
+    pops = relaxed = 0
+
+    visited = {(origin, start)}
+    stack = [(origin, start)]
+    found = False
+
+    while stack and not found:
+        airport, time = stack.pop()
+        pops += 1
+        next_time = TimeOfDay((time + 1) % len(TimeOfDay))
+        departures = airport.departures(time)
+        next_departures = airport.departures(next_time)
+        relaxed += len(departures) + len(next_departures)
+        for flight in chain(departures, next_departures):
+            if flight.destination == destination:
+                found = True
+                break
+            state = (flight.destination, arrival_time(flight))
+            if state not in visited:
+                visited.add(state)
+                stack.append(state)
+
+    if collect:
+        instrument.record(instrument.QueryStats(
+            "is_reachable", pops, relaxed, len(visited), pops, 0,
+            {"search": perf_counter() - started}))
+
+    return found
 
 def best_itinerary(origin: Airport, destination: Airport, start: TimeOfDay) \
         -> Optional[tuple[int, list[Flight]]]:
@@ -97,8 +163,64 @@ def best_itinerary(origin: Airport, destination: Airport, start: TimeOfDay) \
         return a tuple with the total cost of the itinerary, and a list
         of flights that make up the itinerary. Otherwise, return None.
     """
-
-    raise NotImplementedError
+    if origin == destination:
+        return 0, []
+
+    collect = instrument.enabled()
+    started = perf_counter() if collect else 0.0
+    pops = stale = relaxed = 0
+
+    costs = {(origin, start): 0}
+    previous: dict[tuple[Airport, TimeOfDay],
+                   tuple[Airport, TimeOfDay, Flight]] = {}
+    heap = [(0, origin, start)]
+    found = None
+
+    while heap:
+        cost, airport, time = heapq.heappop(heap)
+        pops += 1
+        if cost > costs[(airport, time)]:
+            stale += 1
+            continue
+
+        if airport == destination:
+            found = (cost, (airport, time))
+            break
+
+        next_time = TimeOfDay((time + 1) % len(TimeOfDay))
+        candidates = sorted(chain(airport.departures(time),
+                                  airport.departures(next_time)))
+        relaxed += len(candidates)
+        for flight in candidates:
+            arrival = arrival_time(flight)
+            state = (flight.destination, arrival)
+            new_cost = cost + flight.cost
+            if state not in costs or new_cost < costs[state]:
+                costs[state] = new_cost
+                previous[state] = (airport, time, flight)
+                heapq.heappush(heap, (new_cost, flight.destination, arrival))
+
+    searched = perf_counter() if collect else 0.0
+
+    result = None
+    if found is not None:
+        cost, state = found
+        flights = []
+        while state in previous:
+            prev_airport, prev_time, flight = previous[state]
+            flights.append(flight)
+            state = (prev_airport, prev_time)
+        flights.reverse()
+        result = (cost, flights)
+
+    if collect:
+        # Every entry that was popped or is still in the heap was pushed
+        instrument.record(instrument.QueryStats(
+            "best_itinerary", pops - stale, relaxed, pops + len(heap), pops,
+            stale, {"search": searched - started,
+                    "path": perf_counter() - searched}))
+
+    return result
 
 def load_flights(flights_file_path: str) -> Optional[dict[str, Airport]]:
     """
@@ -112,4 +234,7 @@ def load_flights(flights_file_path: str) -> Optional[dict[str, Airport]]:
     Returns: Dictionary of Airport objects if the file exists. None if
       no such file exists.
     """
-    raise NotImplementedError
+    if not os.path.isfile(flights_file_path):
+        return None
+
+    return load_schedule(flights_file_path).airports
@@ -0,0 +1,151 @@
+"""
+Module providing opt-in instrumentation of the search functions
+(hw4.is_reachable, hw4.best_itinerary, and schedule.shortest_paths).
+
+Instrumentation is enabled with the instrument context manager:
+
+    with instrument() as stats:
+        best_itinerary(origin, destination, start)
+    print(stats.settled, stats.phases)
+
+While it is enabled, every instrumented search records a QueryStats
+with its counters (states settled, flights relaxed, heap pushes and
+pops, and stale heap entries skipped) and the wall time of each of its
+phases. These are added up in the Collector returned by the context
+manager, and can also be passed to a callback (for example, to log
+slow queries).
+
+When instrumentation is not enabled, the searches only check
+enabled() once per call, and keep a few integer counters per settled
+state (never per flight), so the overhead is negligible.
+"""
+from contextlib import contextmanager
+from typing import Callable, Iterator, NamedTuple, Optional
+
+
+class QueryStats(NamedTuple):
+    """
+    Counters and timings of a single search
+    """
+    # Name of the search function
+    function: str
+    # States (airport and time of day) settled
+    settled: int
+    # Flights considered from the settled states
+    relaxed: int
+    # Entries pushed to the heap (or stack), including the start state
+    pushes: int
+    # Entries popped from the heap (or stack)
+    pops: int
+    # Popped entries skipped because the state was already settled
+    stale: int
+    # Wall time of each phase of the search, in seconds
+    phases: dict[str, float]
+
+    @property
+    def seconds(self) -> float:
+        """
+        Returns: Total wall time of the search, in seconds
+        """
+        return sum(self.phases.values())
+
+
+class Collector:
+    """
+    Class representing the statistics collected while instrumentation
+    is enabled (see instrument)
+    """
+
+    __callback: Optional[Callable[[QueryStats], None]]
+    queries: int
+    settled: int
+    relaxed: int
+    pushes: int
+    pops: int
+    stale: int
+    phases: dict[str, float]
+    slowest: Optional[QueryStats]
+    history: Optional[list[QueryStats]]
+
+    def __init__(self, callback: Optional[Callable[[QueryStats], None]],
+                 keep: bool):
+        """
+        Constructor
+
+        Args:
+            callback: Function called with the statistics of every search
+            keep: Whether to keep the statistics of every search
+              (in history)
+        """
+        self.__callback = callback
+        self.queries = 0
+        self.settled = 0
+        self.relaxed = 0
+        self.pushes = 0
+        self.pops = 0
+        self.stale = 0
+        self.phases = {}
+        self.slowest = None
+        self.history = [] if keep else None
+
+    def add(self, stats: QueryStats) -> None:
+        """
+        Adds the statistics of a search
+        """
+        self.queries += 1
+        self.settled += stats.settled
+        self.relaxed += stats.relaxed
+        self.pushes += stats.pushes
+        self.pops += stats.pops
+        self.stale += stats.stale
+        for phase, seconds in stats.phases.items():
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+        if self.slowest is None or stats.seconds > self.slowest.seconds:
+            self.slowest = stats
+        if self.history is not None:
+            self.history.append(stats)
+        if self.__callback is not None:
+            self.__callback(stats)
+
+
+# Collectors of the instrument blocks currently active (innermost last)
+_collectors: list[Collector] = []
+
+
+def enabled() -> bool:
+    """
+    Returns: True if instrumentation is enabled, False otherwise
+    """
+    return bool(_collectors)
+
+
+def record(stats: QueryStats) -> None:
+    """
+    Records the statistics of a search in every active collector (called
+    by the instrumented search functions)
+    """
+    for collector in _collectors:
+        collector.add(stats)
+
+
+@contextmanager
+def instrument(callback: Optional[Callable[[QueryStats], None]] = None,
+               keep: bool = False) -> Iterator[Collector]:
+    """
+    Enables instrumentation of the search functions inside a with block.
+    Blocks can be nested (searches are recorded by every active block).
+
+    Args:
+        callback: Function called with the statistics of every search
+        keep: Whether to keep the statistics of every search
+
+    Returns: A Collector with the statistics of the searches run inside
+      the block
+    """
+    collector = Collector(callback, keep)
+    _collectors.append(collector)
+    try:
+        yield collector
+    finally:
+        _collectors.remove(collector)
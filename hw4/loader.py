@@ -0,0 +1,352 @@
+"""
+Module providing a streaming loader for flight schedule CSV files
+(in the same format as the files in files/).
+
+Files are split into chunks of roughly chunk_size bytes (a chunk owns
+every line that starts inside it), and each chunk is parsed into
+compact tuples before the Airport and Flight objects are created, so
+memory use is bounded by the size of a chunk rather than the size of
+the file. Chunks can be parsed by a pool of worker processes, in which
+case the parent process merges their results (in order) into a single
+dictionary of airports.
+
+Rows that cannot be loaded are skipped and reported, instead of
+stopping the whole load.
+"""
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+import csv
+import operator
+import os
+import sys
+from typing import Iterator, NamedTuple, Optional, Sequence
+
+from flights import Airport, Flight, TimeOfDay
+
+COLUMNS = ("airline", "flight_num", "origin_code", "origin_name",
+           "destination_code", "destination_name", "departure_time", "cost")
+
+DEFAULT_CHUNK_SIZE = 1 << 22
+
+TIMES = {time.name: time for time in TimeOfDay}
+
+# A validated row: airline, flight number, origin code, origin name,
+# destination code, destination name, departure time, and cost
+FlightRecord = tuple[str, int, str, str, str, str, TimeOfDay, int]
+
+
+class RowError(NamedTuple):
+    """
+    A row that could not be loaded
+    """
+    path: str
+    line: int
+    message: str
+
+
+class LoadResult(NamedTuple):
+    """
+    Result of loading one or more schedule files
+    """
+    airports: dict[str, Airport]
+    num_flights: int
+    errors: list[RowError]
+
+
+# Result of parsing one chunk: the records and the errors (each one
+# with its line number relative to the start of the chunk), and the
+# number of lines in the chunk
+ChunkResult = tuple[list[tuple[int, FlightRecord]], list[tuple[int, str]],
+                    int]
+
+
+def parse_fields(fields: Sequence[str]) -> FlightRecord:
+    """
+    Validates the fields of a CSV row and converts them into a
+    FlightRecord.
+
+    Args:
+        fields: Fields of the row, in the order of COLUMNS
+
+    Raises:
+        ValueError: If the fields are not valid
+    """
+    if len(fields) != len(COLUMNS):
+        raise ValueError(f"expected {len(COLUMNS)} fields, got {len(fields)}")
+
+    airline, num, origin_code, origin_name, dest_code, dest_name, \
+        time, cost = fields
+
+    if len(airline) != 2:
+        raise ValueError(f"invalid airline code: {airline!r}")
+    for code in (origin_code, dest_code):
+        if len(code) != 3 or not (code.isalpha() and code.isupper()):
+            raise ValueError(f"invalid airport code: {code!r}")
+    if origin_code == dest_code:
+        raise ValueError(f"origin and destination are the same: {dest_code}")
+    if time not in TIMES:
+        raise ValueError(f"invalid departure time: {time!r}")
+
+    flight_num = int(num)
+    if not 0 < flight_num < 10000:
+        raise ValueError(f"invalid flight number: {flight_num}")
+    flight_cost = int(cost)
+    if flight_cost <= 0:
+        raise ValueError(f"invalid cost: {flight_cost}")
+
+    return (airline, flight_num, origin_code, origin_name, dest_code,
+            dest_name, TIMES[time], flight_cost)
+
+
+def read_header(path: str) -> tuple[list[int], int]:
+    """
+    Reads the header of a schedule file.
+
+    Args:
+        path: Path to the file
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the header is missing any of the COLUMNS
+
+    Returns: The index of each of the COLUMNS, and the size in bytes
+      of the header line
+    """
+    with open(path, "rb") as file:
+        line = file.readline()
+
+    header = next(csv.reader([line.decode("utf-8-sig")]), [])
+    header = [name.strip() for name in header]
+    missing = [name for name in COLUMNS if name not in header]
+    if missing:
+        raise ValueError(f"{path}: missing columns: {', '.join(missing)}")
+
+    return [header.index(name) for name in COLUMNS], len(line)
+
+
+def chunk_ranges(path: str, start: int,
+                 chunk_size: int) -> list[tuple[int, int]]:
+    """
+    Splits a file into byte ranges of (roughly) the same size.
+
+    Args:
+        path: Path to the file
+        start: Offset of the first byte to include
+        chunk_size: Size of each range, in bytes
+
+    Returns: List of (start, end) ranges covering the file
+    """
+    size = os.path.getsize(path)
+    return [(offset, min(offset + chunk_size, size))
+            for offset in range(start, size, chunk_size)]
+
+
+def read_chunk(path: str, start: int, end: int) -> list[str]:
+    """
+    Reads the lines that start in a byte range of a file. Combined
+    with chunk_ranges, every line of the file is read exactly once.
+
+    Args:
+        path: Path to the file
+        start, end: Byte range
+
+    Returns: The lines in the range
+    """
+    with open(path, "rb") as file:
+        if start > 0:
+            # Skip the rest of a line that started in the previous range
+            file.seek(start - 1)
+            file.readline()
+        position = file.tell()
+        if position >= end:
+            return []
+        data = file.read(end - position)
+        if not data.endswith(b"\n"):
+            # Finish the last line, which may extend past the range
+            data += file.readline()
+
+    return data.decode("utf-8").splitlines(keepends=True)
+
+
+def parse_chunk(path: str, start: int, end: int,
+                columns: Sequence[int]) -> ChunkResult:
+    """
+    Reads and parses a byte range of a schedule file. This is the work
+    done by each worker process.
+
+    Args:
+        path: Path to the file
+        start, end: Byte range
+        columns: Index of each of the COLUMNS in a row
+
+    Returns: See ChunkResult
+    """
+    lines = read_chunk(path, start, end)
+    records = []
+    errors = []
+    pick = operator.itemgetter(*columns)
+    num_fields = max(columns) + 1
+
+    for line_num, row in enumerate(csv.reader(lines)):
+        if not row:
+            continue
+        if len(row) < num_fields:
+            errors.append((line_num, f"expected {num_fields} fields, "
+                                     f"got {len(row)}"))
+            continue
+        try:
+            records.append((line_num, parse_fields(pick(row))))
+        except ValueError as err:
+            errors.append((line_num, str(err)))
+
+    return records, errors, len(lines)
+
+
+class _Builder:
+    """
+    Builds Airport and Flight objects from records, interning airport
+    names, airport codes, and airline codes so that there is only one
+    copy of each string.
+    """
+
+    airports: dict[str, Airport]
+    num_flights: int
+    names: dict[str, str]
+    airlines: dict[str, str]
+    seen: set[tuple[str, str, int]]
+
+    def __init__(self) -> None:
+        self.airports = {}
+        self.num_flights = 0
+        self.names = {}
+        self.airlines = {}
+        self.seen = set()
+
+    def airport(self, code: str, name: str) -> Airport:
+        """
+        Returns: The airport with the given code (creating it if needed)
+
+        Raises:
+            ValueError: If the airport exists with a different name
+        """
+        airport = self.airports.get(code)
+        if airport is None:
+            code = sys.intern(code)
+            airport = Airport(sys.intern(name), code)
+            self.airports[code] = airport
+            self.names[code] = airport.name
+        elif self.names[code] != name:
+            raise ValueError(f"airport {code} is already named "
+                             f"{airport.name!r}, not {name!r}")
+        return airport
+
+    def add(self, records: list[tuple[int, FlightRecord]],
+            errors: list[tuple[int, str]]) -> None:
+        """
+        Adds the flights described by the records of a chunk. Records
+        that cannot be added are reported in errors.
+        """
+        seen = self.seen
+        airlines = self.airlines
+
+        for line_num, record in records:
+            airline, flight_num, origin_code, origin_name, dest_code, \
+                dest_name, time, cost = record
+
+            try:
+                origin = self.airport(origin_code, origin_name)
+                destination = self.airport(dest_code, dest_name)
+            except ValueError as err:
+                errors.append((line_num, str(err)))
+                continue
+
+            key = (origin_code, airline, flight_num)
+            if key in seen:
+                errors.append((line_num, f"duplicate flight "
+                                         f"{airline}{flight_num:04} "
+                                         f"from {origin_code}"))
+                continue
+            seen.add(key)
+
+            airline = airlines.setdefault(airline, airline)
+            origin.add_flight(Flight(origin, destination, airline,
+                                     flight_num, time, cost))
+            self.num_flights += 1
+
+
+def _parallel_parse(executor: Executor,
+                    tasks: list[tuple[str, int, int, list[int]]],
+                    max_pending: int) -> Iterator[ChunkResult]:
+    """
+    Parses chunks in worker processes, yielding the results in order.
+    Unlike Executor.map, at most max_pending chunks are submitted ahead
+    of the one being consumed, so memory stays bounded even if the
+    workers are faster than the consumer.
+    """
+    pending: deque[Future[ChunkResult]] = deque()
+    for task in tasks:
+        pending.append(executor.submit(parse_chunk, *task))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def load_schedule(paths: str | Sequence[str],
+                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  workers: int = 1) -> LoadResult:
+    """
+    Loads one or more schedule files into a single dictionary of airports.
+
+    Args:
+        paths: Path (or list of paths) to CSV files
+        chunk_size: Approximate number of bytes parsed at a time
+        workers: Number of worker processes used to parse the files.
+          If 1, everything is parsed in the current process.
+
+    Raises:
+        OSError: If a file cannot be read
+        ValueError: If a file does not have the expected header
+
+    Returns: The airports, the number of flights loaded, and the rows
+      that could not be loaded
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+
+    tasks = []
+    for path in paths:
+        columns, header_size = read_header(path)
+        for start, end in chunk_ranges(path, header_size, chunk_size):
+            tasks.append((path, start, end, columns))
+
+    builder = _Builder()
+    errors: list[RowError] = []
+
+    executor: Optional[Executor] = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    try:
+        if executor is not None:
+            results = _parallel_parse(executor, tasks, 2 * workers)
+        else:
+            results = (parse_chunk(*task) for task in tasks)
+
+        line_offset = 1
+        current_path = None
+        for (path, _, _, _), (records, chunk_errors, num_lines) in \
+                zip(tasks, results):
+            if path != current_path:
+                current_path = path
+                line_offset = 1
+            builder.add(records, chunk_errors)
+            chunk_errors.sort()
+            errors.extend(RowError(path, line_offset + line_num + 1, message)
+                          for line_num, message in chunk_errors)
+            line_offset += num_lines
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    return LoadResult(builder.airports, builder.num_flights, errors)
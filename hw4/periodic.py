@@ -0,0 +1,211 @@
+"""
+Module providing a periodic (multi-day) view of a compiled schedule.
+
+The four time slots of flights.TimeOfDay only describe a single day,
+and the layover rule of hw4 never lets us wait longer than one period
+at an airport. In a periodic schedule, the same flights run every day
+for a given number of days, and we can wait at an airport for as long
+as we want (for example, overnight), as long as we depart before the
+last day is over.
+
+Times are absolute slot numbers: slot day * NUM_TIMES + time is the
+given time of day on the given day (day 0 being the first one). A
+flight that departs at slot s arrives at slot s + 1, like in hw4.
+
+Queries find the itinerary that arrives at the destination as early
+as possible. Because we can always wait, arriving at an airport
+earlier never makes us arrive anywhere later (the schedule is FIFO),
+so a time-dependent version of Dijkstra's algorithm, keyed on arrival
+time, only has to settle every airport once: when we settle an
+airport at slot t, the next departure of a flight that leaves at time
+of day d is at slot t + (d - t) % NUM_TIMES, and every flight in the
+compiled schedule is looked at most once. The flights are never
+copied for every day, so memory use does not depend on the number of
+days.
+"""
+from array import array
+import heapq
+from typing import NamedTuple, Optional
+
+from flights import Airport, Flight, TimeOfDay
+from schedule import CompiledSchedule, NUM_TIMES, UNREACHED
+
+
+class Leg(NamedTuple):
+    """
+    A flight taken on a given day
+    """
+    day: int
+    flight: Flight
+
+
+class PeriodicItinerary(NamedTuple):
+    """
+    An itinerary in a periodic schedule
+    """
+    # Slot at which we arrive at the destination
+    arrival: int
+    # Total cost of the flights
+    cost: int
+    legs: list[Leg]
+
+
+def slot(day: int, time: TimeOfDay) -> int:
+    """
+    Returns: The absolute slot of a time of day on a given day
+    """
+    return day * NUM_TIMES + time
+
+
+def day_and_time(absolute_slot: int) -> tuple[int, TimeOfDay]:
+    """
+    Returns: The day and time of day of an absolute slot
+    """
+    day, time = divmod(absolute_slot, NUM_TIMES)
+    return day, TimeOfDay(time)
+
+
+class PeriodicSchedule:
+    """
+    Class representing a compiled schedule that repeats every day for
+    a number of days
+    """
+
+    __schedule: CompiledSchedule
+    __days: int
+
+    def __init__(self, schedule: CompiledSchedule, days: int):
+        """
+        Constructor
+
+        Args:
+            schedule: The schedule of a single day
+            days: Number of days the schedule runs for (flights can
+              depart on days 0 to days - 1)
+
+        Raises:
+            ValueError: If the number of days is not positive
+        """
+        if days < 1:
+            raise ValueError(f"invalid number of days: {days}")
+
+        self.__schedule = schedule
+        self.__days = days
+
+    @property
+    def schedule(self) -> CompiledSchedule:
+        """
+        Returns: The schedule of a single day
+        """
+        return self.__schedule
+
+    @property
+    def days(self) -> int:
+        """
+        Returns: Number of days the schedule runs for
+        """
+        return self.__days
+
+    def earliest_arrivals(self, origin_id: int, start: int,
+                          target_id: Optional[int] = None) \
+            -> tuple[array, array]:
+        """
+        Run the time-dependent version of Dijkstra's algorithm from an
+        airport, starting at a given slot.
+
+        Args:
+            origin_id: Id of the origin airport
+            start: Slot at which we are at the origin
+            target_id: If provided, stop as soon as this airport is
+              settled.
+
+        Returns: A tuple with the earliest slot at which we can be at
+          every airport (UNREACHED for airports that cannot be reached)
+          and the edge used to get to every airport (UNREACHED for the
+          origin and for airports that cannot be reached). If
+          target_id was provided, only the slots of settled airports
+          are final.
+        """
+        schedule = self.__schedule
+        offsets, targets = schedule.offsets, schedule.targets
+        last_departure = self.__days * NUM_TIMES - 1
+
+        arrivals = array("l", [UNREACHED]) * schedule.num_airports
+        previous = array("l", [UNREACHED]) * schedule.num_airports
+        settled = bytearray(schedule.num_airports)
+
+        arrivals[origin_id] = start
+        heap = [(start, origin_id)]
+
+        while heap:
+            now, airport_id = heapq.heappop(heap)
+            if settled[airport_id]:
+                continue
+            settled[airport_id] = 1
+            if airport_id == target_id:
+                break
+
+            bucket = airport_id * NUM_TIMES
+            for wait in range(NUM_TIMES):
+                departure = now + wait
+                if departure > last_departure:
+                    break
+                time = departure % NUM_TIMES
+                for edge in range(offsets[bucket + time],
+                                  offsets[bucket + time + 1]):
+                    nxt = targets[edge]
+                    old = arrivals[nxt]
+                    if old == UNREACHED or departure + 1 < old:
+                        arrivals[nxt] = departure + 1
+                        previous[nxt] = edge
+                        heapq.heappush(heap, (departure + 1, nxt))
+
+        return arrivals, previous
+
+    def earliest_itinerary(self, origin: Airport, destination: Airport,
+                           start: TimeOfDay, day: int = 0) \
+            -> Optional[PeriodicItinerary]:
+        """
+        Find the itinerary that gets to the destination as early as
+        possible (if there are several, the one found first, which is
+        not necessarily the cheapest).
+
+        Args:
+            origin, destination: Airports
+            start: Time at which we start the itinerary
+            day: Day on which we start the itinerary
+
+        Raises:
+            ValueError: If either airport is not in the schedule, or if
+              the day is not one of the days of the schedule
+
+        Returns: The itinerary, or None if the destination cannot be
+          reached before the schedule ends. If the origin and
+          destination are the same, the itinerary has no legs.
+        """
+        if not 0 <= day < self.__days:
+            raise ValueError(f"invalid day: {day}")
+
+        origin_id = self.__schedule.airport_id(origin.code)
+        target_id = self.__schedule.airport_id(destination.code)
+        arrivals, previous = self.earliest_arrivals(
+            origin_id, slot(day, start), target_id)
+        if arrivals[target_id] == UNREACHED:
+            return None
+
+        edges = []
+        airport_id = target_id
+        while previous[airport_id] != UNREACHED:
+            edge = previous[airport_id]
+            edges.append(edge)
+            airport_id = self.__schedule.buckets[edge] // NUM_TIMES
+        edges.reverse()
+
+        legs = []
+        flights = self.__schedule.flights
+        for edge in edges:
+            departure = arrivals[self.__schedule.targets[edge]] - 1
+            legs.append(Leg(departure // NUM_TIMES, flights[edge]))
+
+        return PeriodicItinerary(arrivals[target_id],
+                                 sum(leg.flight.cost for leg in legs), legs)
@@ -0,0 +1,245 @@
+"""
+Module providing a precomputed reachability index over the search
+states (airport, time of day) of a schedule, so that is_reachable
+queries can be answered with a single bit test.
+
+The index is built by finding the strongly connected components of
+the state graph (with Tarjan's algorithm), and then computing, for
+every component, the set of airports reachable from it as a bitset
+(a Python int where bit i is set if the airport with id i can be
+reached). Tarjan's algorithm emits components in reverse topological
+order, so every component's successors have been computed by the
+time we get to it.
+"""
+from array import array
+from typing import Callable, Iterable, Sequence
+
+from flights import Airport, ScheduleVersion, TimeOfDay
+from schedule import CompiledSchedule, NUM_TIMES
+
+
+def strongly_connected_components(
+        num_nodes: int,
+        successors: Callable[[int], Iterable[int]]) -> list[list[int]]:
+    """
+    Find the strongly connected components of a graph, using an
+    iterative version of Tarjan's algorithm (so that large graphs do
+    not run into Python's recursion limit).
+
+    Args:
+        num_nodes: Number of nodes (nodes are 0 to num_nodes - 1)
+        successors: Function returning the successors of a node
+
+    Returns: List of components (each one a list of nodes), in reverse
+      topological order: no component has an edge to a component that
+      comes after it in the list.
+    """
+    index = array("l", [-1]) * num_nodes
+    lowlink = array("l", [0]) * num_nodes
+    on_stack = bytearray(num_nodes)
+    stack: list[int] = []
+    components: list[list[int]] = []
+    counter = 0
+
+    for root in range(num_nodes):
+        if index[root] != -1:
+            continue
+
+        index[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [(root, iter(successors(root)))]
+
+        while work:
+            node, neighbors = work[-1]
+            for neighbor in neighbors:
+                if index[neighbor] == -1:
+                    index[neighbor] = lowlink[neighbor] = counter
+                    counter += 1
+                    stack.append(neighbor)
+                    on_stack[neighbor] = 1
+                    work.append((neighbor, iter(successors(neighbor))))
+                    break
+                if on_stack[neighbor] and index[neighbor] < lowlink[node]:
+                    lowlink[node] = index[neighbor]
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+    return components
+
+
+def state_successors(
+        schedule: CompiledSchedule) -> Callable[[int], Sequence[int]]:
+    """
+    Args:
+        schedule: A compiled schedule
+
+    Returns: Function returning the states that can be reached from a
+      state with a single flight (departing at its time of day or in
+      the next one, as in schedule.valid_edges)
+    """
+    offsets, arrivals = schedule.offsets, schedule.arrivals
+
+    def successors(state: int) -> Sequence[int]:
+        time = state % NUM_TIMES
+        bucket = state - time
+        first = offsets[bucket + time]
+        if time == NUM_TIMES - 1:
+            return arrivals[first:offsets[bucket + NUM_TIMES]] + \
+                arrivals[offsets[bucket]:offsets[bucket + 1]]
+        return arrivals[first:offsets[bucket + time + 2]]
+
+    return successors
+
+
+def component_reach(
+        schedule: CompiledSchedule) -> tuple[list[list[int]], array,
+                                             list[int]]:
+    """
+    Find the strongly connected components of the state graph of a
+    schedule, and the airports that can be reached from each one.
+
+    Args:
+        schedule: A compiled schedule
+
+    Returns: The components (see strongly_connected_components), the
+      component id (position in the list) of every state, and the
+      bitset of the airports reachable from every component (bit i is
+      set if the airport with id i can be reached)
+    """
+    successors = state_successors(schedule)
+    components = strongly_connected_components(schedule.num_states,
+                                               successors)
+
+    component_of = array("l", [0]) * schedule.num_states
+    for comp_id, component in enumerate(components):
+        for state in component:
+            component_of[state] = comp_id
+
+    # Components come in reverse topological order, so the successors
+    # of every component have been computed by the time we get to it
+    reach: list[int] = []
+    for comp_id, component in enumerate(components):
+        bits = 0
+        for state in component:
+            bits |= 1 << (state // NUM_TIMES)
+            for nxt in successors(state):
+                other = component_of[nxt]
+                if other != comp_id:
+                    bits |= reach[other]
+        reach.append(bits)
+
+    return components, component_of, reach
+
+
+class ReachabilityIndex:
+    """
+    Class representing a reachability index over a schedule. The index
+    remembers the schedule version it was built at (see
+    flights.ScheduleVersion), and is rebuilt automatically the first
+    time it is queried after a flight has been added to or removed from
+    one of its airports.
+    """
+
+    __airports: dict[str, Airport]
+    __schedule: CompiledSchedule
+    __version: ScheduleVersion
+    __component: array
+    __reach: list[int]
+
+    def __init__(self, airports: dict[str, Airport]):
+        """
+        Constructor
+
+        Args:
+            airports: Dictionary mapping airport codes to Airport objects
+        """
+        self.__airports = airports
+        self.__version = ScheduleVersion(airports)
+        self.rebuild()
+
+    @property
+    def schedule(self) -> CompiledSchedule:
+        """
+        Returns: The compiled schedule the index is currently built on
+        """
+        return self.__schedule
+
+    @property
+    def num_components(self) -> int:
+        """
+        Returns: Number of strongly connected components of the
+          state graph
+        """
+        return len(self.__reach)
+
+    @property
+    def stale(self) -> bool:
+        """
+        Returns: True if the schedule has changed since the index was
+          built, False otherwise
+        """
+        return self.__version.changed()
+
+    def rebuild(self) -> None:
+        """
+        (Re)builds the index from the current schedule
+        """
+        self.__version.reset()
+        self.__schedule = CompiledSchedule(self.__airports)
+        _, self.__component, self.__reach = \
+            component_reach(self.__schedule)
+
+    def reachable_airports(self, origin: Airport,
+                           start: TimeOfDay) -> set[str]:
+        """
+        Args:
+            origin: An airport
+            start: Time at which we start the itinerary
+
+        Raises:
+            ValueError: If the airport is not in the schedule
+
+        Returns: Codes of all the airports that can be reached from the
+          origin (including the origin itself)
+        """
+        if self.stale:
+            self.rebuild()
+
+        state = self.__schedule.airport_id(origin.code) * NUM_TIMES + start
+        reach = self.__reach[self.__component[state]]
+        return {code for i, code in enumerate(self.__schedule.codes)
+                if reach >> i & 1}
+
+    def is_reachable(self, origin: Airport, destination: Airport,
+                     start: TimeOfDay) -> bool:
+        """
+        Same as hw4.is_reachable, but using the index.
+
+        Raises:
+            ValueError: If either airport is not in the schedule
+        """
+        if self.stale:
+            self.rebuild()
+
+        if origin.code == destination.code:
+            return True
+
+        schedule = self.__schedule
+        state = schedule.airport_id(origin.code) * NUM_TIMES + start
+        target_id = schedule.airport_id(destination.code)
+        return bool(self.__reach[self.__component[state]] >> target_id & 1)
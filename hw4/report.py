@@ -0,0 +1,565 @@
+"""
+Module providing a connectivity report of a schedule, for network
+planning:
+
+- For every start time, the airports that cannot be reached from
+  each airport.
+- The strongly connected components of the state graph (airport and
+  time of day): within a component, every state can reach every other.
+- The critical flights: cancelling any of them leaves some airport
+  unreachable from some origin at some start time (following flights
+  in their direction, so a flight that is the only way into an airport
+  is critical even if there is a flight back).
+- The flights that are bridges of the time-expanded graph (see
+  expanded.py), ignoring the direction of its edges: every such flight
+  is the only link between two parts of the network, so cancelling it
+  leaves no way at all of getting from an airport on one side to an
+  airport on the other.
+
+The components, and the airports reachable from every component (as
+bitsets, for all the start times together), are computed as in
+reachability.py. Most flights are shown not to be critical from those
+bitsets and from the dominator trees of the components (see
+_critical_edges); only the rest are checked by searching again without
+them. The bridges are found with Tarjan's bridge-finding algorithm.
+
+Usage: python3 report.py SCHEDULE.csv
+"""
+from array import array
+import sys
+from typing import NamedTuple, Sequence
+
+from flights import Airport, Flight, TimeOfDay
+from expanded import TimeExpandedGraph
+from loader import load_schedule
+from reachability import component_reach
+from schedule import CompiledSchedule, NUM_TIMES, UNREACHED
+
+
+class ScheduleReport(NamedTuple):
+    """
+    Connectivity report of a schedule
+    """
+    # For every start time, maps every airport to the sorted codes of
+    # the airports it cannot reach (airports that can reach every
+    # other airport are left out)
+    unreachable: dict[TimeOfDay, dict[str, list[str]]]
+    # Strongly connected components of the state graph, each as a
+    # sorted list of (airport code, time of day) states, largest first
+    components: list[list[tuple[str, TimeOfDay]]]
+    # Flights whose cancellation makes some airport unreachable from
+    # some origin at some start time, sorted by flight code
+    critical: list[Flight]
+    # Flights that are bridges (ignoring the direction of flights),
+    # sorted by flight code
+    bridges: list[Flight]
+
+    def num_unreachable(self, start: TimeOfDay) -> int:
+        """
+        Returns: Number of (origin, destination) pairs that cannot be
+          reached at a given start time
+        """
+        return sum(len(codes) for codes in self.unreachable[start].values())
+
+
+def bridges(num_nodes: int, tails: Sequence[int],
+            heads: Sequence[int]) -> list[int]:
+    """
+    Find the bridges of a graph, ignoring the direction of its edges,
+    using an iterative version of Tarjan's bridge-finding algorithm.
+    Parallel edges are never bridges.
+
+    Args:
+        num_nodes: Number of nodes (nodes are 0 to num_nodes - 1)
+        tails, heads: The two ends of every edge
+
+    Returns: The ids (positions in tails and heads) of the bridges,
+      in increasing order
+    """
+    # Undirected adjacency lists in CSR form, with the edge id of
+    # every entry
+    degree = [0] * (num_nodes + 1)
+    for tail, head in zip(tails, heads):
+        if tail != head:
+            degree[tail + 1] += 1
+            degree[head + 1] += 1
+    for node in range(num_nodes):
+        degree[node + 1] += degree[node]
+    neighbors = array("l", [0]) * degree[-1]
+    edge_ids = array("l", [0]) * degree[-1]
+    fill = degree[:-1]
+    for edge, (tail, head) in enumerate(zip(tails, heads)):
+        if tail != head:
+            neighbors[fill[tail]], edge_ids[fill[tail]] = head, edge
+            fill[tail] += 1
+            neighbors[fill[head]], edge_ids[fill[head]] = tail, edge
+            fill[head] += 1
+
+    index = array("l", [-1]) * num_nodes
+    lowlink = array("l", [0]) * num_nodes
+    found = []
+    counter = 0
+
+    for root in range(num_nodes):
+        if index[root] != -1:
+            continue
+
+        index[root] = lowlink[root] = counter
+        counter += 1
+        # Node, edge we got to it through, and next adjacency entry
+        work = [(root, UNREACHED, degree[root])]
+
+        while work:
+            node, via, position = work[-1]
+            if position < degree[node + 1]:
+                work[-1] = (node, via, position + 1)
+                edge = edge_ids[position]
+                if edge == via:
+                    continue
+                neighbor = neighbors[position]
+                if index[neighbor] == -1:
+                    index[neighbor] = lowlink[neighbor] = counter
+                    counter += 1
+                    work.append((neighbor, edge, degree[neighbor]))
+                elif index[neighbor] < lowlink[node]:
+                    lowlink[node] = index[neighbor]
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+                    if lowlink[node] > index[parent]:
+                        found.append(via)
+
+    found.sort()
+    return found
+
+
+def _unreachable_at(codes: list[str],
+                    reach: list[int]) -> dict[str, list[str]]:
+    """
+    Expands the airports reachable from every origin at one start time
+    into the airports they cannot reach.
+
+    Args:
+        codes: Airport codes, indexed by airport id
+        reach: Bitset of the airports reachable from every airport
+          (bit i is set if the airport with id i can be reached)
+
+    Returns: See ScheduleReport.unreachable
+    """
+    everything = (1 << len(codes)) - 1
+    unreachable = {}
+    for origin_id, origin_reach in enumerate(reach):
+        missing = everything & ~origin_reach
+        if missing:
+            unreachable[codes[origin_id]] = \
+                [code for i, code in enumerate(codes) if missing >> i & 1]
+    return unreachable
+
+
+def _flight_bridges(num_nodes: int, heads: array, offsets: array,
+                    flight_edges: array) -> list[int]:
+    """
+    Finds the bridges of a time-expanded graph that are flights.
+
+    Returns: The compiled schedule edges of the bridges
+    """
+    tails = array("l", [0]) * len(heads)
+    for node in range(num_nodes):
+        for edge in range(offsets[node], offsets[node + 1]):
+            tails[edge] = node
+    return [flight_edges[edge] for edge in bridges(num_nodes, tails, heads)
+            if flight_edges[edge] != UNREACHED]
+
+
+def _breaks_reach(offsets: array, arrivals: array, component_of: array,
+                  reach: list[int], source: int, skipped: int) -> bool:
+    """
+    Determines whether removing an edge of a compiled schedule changes
+    the airports that can be reached from a state.
+
+    Only the component of the state needs to be searched again: edges
+    only lead to the same component or to components that come before
+    it (see strongly_connected_components), and those cannot get back
+    to the state, so their reach does not depend on the edge. The
+    search stops as soon as it finds another way to the state the edge
+    leads to (or, if that state is in an earlier component, to any
+    state of that component, since they all have the same reach).
+
+    Args:
+        offsets, arrivals: Arrays of a CompiledSchedule
+        component_of, reach: As returned by component_reach
+        source: The state
+        skipped: The edge that is removed
+
+    Returns: True if some airport can no longer be reached, False
+      otherwise
+    """
+    comp_id = component_of[source]
+    head = arrivals[skipped]
+    head_comp = component_of[head]
+    target = reach[comp_id]
+    bits = 0
+    seen = {source}
+    pending = [source]
+    while pending:
+        state = pending.pop()
+        bits |= 1 << (state // NUM_TIMES)
+        time = state % NUM_TIMES
+        bucket = state - time
+        for dep in (time, (time + 1) % NUM_TIMES):
+            for edge in range(offsets[bucket + dep],
+                              offsets[bucket + dep + 1]):
+                if edge == skipped:
+                    continue
+                nxt = arrivals[edge]
+                if nxt == head:
+                    return False
+                other = component_of[nxt]
+                if other != comp_id:
+                    if other == head_comp:
+                        return False
+                    bits |= reach[other]
+                elif nxt not in seen:
+                    seen.add(nxt)
+                    pending.append(nxt)
+        if bits == target:
+            return False
+    return True
+
+
+def _dominator_order(num_nodes: int, successors: list[list[int]],
+                     root: int) -> tuple[list[int], list[int]]:
+    """
+    Computes the dominator tree of a graph where every node can be
+    reached from the root (with the iterative algorithm of Cooper,
+    Harvey, and Kennedy), and numbers its nodes so that dominance can
+    be checked in constant time: a dominates b (every path from the
+    root to b goes through a) if and only if first[a] <= first[b] and
+    last[b] <= last[a].
+
+    Args:
+        num_nodes: Number of nodes (nodes are 0 to num_nodes - 1)
+        successors: Successors of every node
+        root: The root
+
+    Returns: first and last, indexed by node
+    """
+    # Postorder of a depth-first search from the root
+    order: list[int] = []
+    post = [0] * num_nodes
+    visited = bytearray(num_nodes)
+    visited[root] = 1
+    work = [(root, iter(successors[root]))]
+    while work:
+        node, neighbors = work[-1]
+        for neighbor in neighbors:
+            if not visited[neighbor]:
+                visited[neighbor] = 1
+                work.append((neighbor, iter(successors[neighbor])))
+                break
+        else:
+            work.pop()
+            post[node] = len(order)
+            order.append(node)
+
+    predecessors: list[list[int]] = [[] for _ in range(num_nodes)]
+    for node in range(num_nodes):
+        for neighbor in successors[node]:
+            predecessors[neighbor].append(node)
+
+    idom = [-1] * num_nodes
+    idom[root] = root
+    changed = True
+    while changed:
+        changed = False
+        for node in reversed(order):
+            if node == root:
+                continue
+            new_idom = -1
+            for pred in predecessors[node]:
+                if idom[pred] == -1:
+                    continue
+                if new_idom == -1:
+                    new_idom = pred
+                    continue
+                # Closest common ancestor of pred and new_idom
+                a, b = pred, new_idom
+                while a != b:
+                    while post[a] < post[b]:
+                        a = idom[a]
+                    while post[b] < post[a]:
+                        b = idom[b]
+                new_idom = a
+            if idom[node] != new_idom:
+                idom[node] = new_idom
+                changed = True
+
+    children: list[list[int]] = [[] for _ in range(num_nodes)]
+    for node in range(num_nodes):
+        if node != root:
+            children[idom[node]].append(node)
+    first = [0] * num_nodes
+    last = [0] * num_nodes
+    counter = 1
+    work = [(root, iter(children[root]))]
+    while work:
+        node, kids = work[-1]
+        for kid in kids:
+            first[kid] = counter
+            counter += 1
+            work.append((kid, iter(children[kid])))
+            break
+        else:
+            work.pop()
+            last[node] = counter
+    return first, last
+
+
+class _ComponentDominators(NamedTuple):
+    """
+    Edges and dominator trees of one strongly connected component of
+    the state graph, used by _critical_edges (states are numbered from
+    0 within the component, and state 0 is the root)
+    """
+    # Maps the states of the component to their numbers
+    local: dict[int, int]
+    # (state, edge) pairs of the edges into and out of every state,
+    # within the component
+    in_edges: list[list[tuple[int, int]]]
+    out_edges: list[list[tuple[int, int]]]
+    # Dominator trees (see _dominator_order) from the root, following
+    # the edges forwards and backwards
+    forward: tuple[list[int], list[int]]
+    backward: tuple[list[int], list[int]]
+    # Airports of the states before position i (prefix[i]) and from
+    # position i on (suffix[i]) in the forward dominator tree order,
+    # together with the airports reachable from them through edges
+    # that leave the component
+    prefix: list[int]
+    suffix: list[int]
+
+
+def _component_dominators(offsets: array, arrivals: array,
+                          component: list[int], component_of: array,
+                          reach: list[int]) -> _ComponentDominators:
+    """
+    Returns: The edges and dominator trees of a component
+    """
+    local = {state: i for i, state in enumerate(component)}
+    comp_id = component_of[component[0]]
+    in_edges: list[list[tuple[int, int]]] = [[] for _ in component]
+    out_edges: list[list[tuple[int, int]]] = [[] for _ in component]
+    bits = [0] * len(component)
+    for i, state in enumerate(component):
+        bits[i] = 1 << (state // NUM_TIMES)
+        time = state % NUM_TIMES
+        bucket = state - time
+        for dep in (time, (time + 1) % NUM_TIMES):
+            for edge in range(offsets[bucket + dep],
+                              offsets[bucket + dep + 1]):
+                nxt = arrivals[edge]
+                if component_of[nxt] == comp_id:
+                    out_edges[i].append((local[nxt], edge))
+                    in_edges[local[nxt]].append((i, edge))
+                else:
+                    bits[i] |= reach[component_of[nxt]]
+
+    forward = _dominator_order(
+        len(component), [[j for j, _ in edges] for edges in out_edges], 0)
+    backward = _dominator_order(
+        len(component), [[j for j, _ in edges] for edges in in_edges], 0)
+
+    in_order = [0] * len(component)
+    for i, position in enumerate(forward[0]):
+        in_order[position] = bits[i]
+    prefix = [0] * (len(component) + 1)
+    suffix = [0] * (len(component) + 1)
+    for position, state_bits in enumerate(in_order):
+        prefix[position + 1] = prefix[position] | state_bits
+    for position in range(len(component) - 1, -1, -1):
+        suffix[position] = suffix[position + 1] | in_order[position]
+    return _ComponentDominators(local, in_edges, out_edges, forward,
+                                backward, prefix, suffix)
+
+
+def _keeps_reach(doms: _ComponentDominators, target: int,
+                 tails: list[int], head: int, skipped: int) -> bool:
+    """
+    Checks a sufficient condition for an edge inside a component to be
+    removable without changing the airports reachable from the states
+    it can be taken from:
+
+    - Every one of those states can still get to the root of the
+      component without going through the state the edge leads to.
+    - The root can still get to the airports reachable from the
+      component. If it can still get to the state the edge leads to
+      (without going through that state), it can get everywhere it
+      used to. Otherwise, it can get everywhere except the states
+      dominated by that state, which come right after it in the
+      forward dominator tree order.
+
+    Args:
+        doms: The component
+        target: The airports reachable from the component
+        tails: The (local) states the edge can be taken from
+        head: The (local) state it leads to
+        skipped: The edge
+
+    Returns: True if the airports reachable do not change, False if it
+      is not known
+    """
+    def dominates(order: tuple[list[int], list[int]], a: int,
+                  b: int) -> bool:
+        first, last = order
+        return first[a] <= first[b] and last[b] <= last[a]
+
+    if not all(tail == 0 or any(
+            edge != skipped and
+            (nxt == head or not dominates(doms.backward, head, nxt))
+            for nxt, edge in doms.out_edges[tail]) for tail in tails):
+        return False
+    if head == 0 or any(
+            edge != skipped and not dominates(doms.forward, head, pred)
+            for pred, edge in doms.in_edges[head]):
+        return True
+    first, last = doms.forward
+    return doms.prefix[first[head]] | doms.suffix[last[head]] == target
+
+
+def _critical_edges(offsets: array, arrivals: array, buckets: array,
+                    components: list[list[int]], component_of: array,
+                    reach: list[int]) -> list[int]:
+    """
+    Finds the edges of a compiled schedule whose removal changes the
+    airports that can be reached from some state.
+
+    Removing an edge can only change the reach of the states it can be
+    taken from if it changes the reach of their components. For a
+    component that the edge leaves, that happens when no other edge
+    out of the component (and none of its own airports) covers some
+    airport the edge leads to. For the component the edge is in, if
+    any, _keeps_reach rules it out for most edges. The few edges left
+    are checked with a search (see _breaks_reach).
+
+    Returns: The critical edges, in increasing order
+    """
+    num_components = len(components)
+    own = [0] * num_components
+    for comp_id, component in enumerate(components):
+        for state in component:
+            own[comp_id] |= 1 << (state // NUM_TIMES)
+
+    def edge_tails(edge: int) -> list[int]:
+        # The flight can be taken from the state of its departure time,
+        # and from the one right before it
+        bucket = buckets[edge]
+        time = bucket % NUM_TIMES
+        return [bucket, bucket - time + (time - 1) % NUM_TIMES]
+
+    # Airports reached by edges out of every component: by at least
+    # one edge, and by at least two
+    once = [0] * num_components
+    twice = [0] * num_components
+    for edge in range(len(buckets)):
+        head_comp = component_of[arrivals[edge]]
+        for comp_id in {component_of[tail] for tail in edge_tails(edge)}:
+            if comp_id != head_comp:
+                twice[comp_id] |= once[comp_id] & reach[head_comp]
+                once[comp_id] |= reach[head_comp]
+
+    dominators: dict[int, _ComponentDominators] = {}
+    critical = []
+    for edge in range(len(buckets)):
+        tails = edge_tails(edge)
+        head = arrivals[edge]
+        head_comp = component_of[head]
+        head_reach = reach[head_comp]
+
+        inside = []
+        lost = False
+        for tail in tails:
+            comp_id = component_of[tail]
+            if comp_id != head_comp:
+                lost = lost or bool(head_reach & ~(twice[comp_id] |
+                                                   own[comp_id]))
+            elif tail != head:
+                inside.append(tail)
+        if not lost and inside:
+            if head_comp not in dominators:
+                dominators[head_comp] = _component_dominators(
+                    offsets, arrivals, components[head_comp], component_of,
+                    reach)
+            doms = dominators[head_comp]
+            if not _keeps_reach(doms, head_reach,
+                                [doms.local[tail] for tail in inside],
+                                doms.local[head], edge):
+                lost = any(_breaks_reach(offsets, arrivals, component_of,
+                                         reach, tail, edge)
+                           for tail in tails)
+        if lost:
+            critical.append(edge)
+    return critical
+
+
+def schedule_report(airports: dict[str, Airport]) -> ScheduleReport:
+    """
+    Builds the connectivity report of a schedule.
+
+    Args:
+        airports: Dictionary mapping airport codes to Airport objects
+
+    Returns: The report
+    """
+    schedule = CompiledSchedule(airports)
+    components, component_of, reach = component_reach(schedule)
+
+    unreachable = {time: _unreachable_at(
+        schedule.codes, [reach[component_of[origin_id * NUM_TIMES + time]]
+                         for origin_id in range(schedule.num_airports)])
+                   for time in TimeOfDay}
+    critical_edges = _critical_edges(schedule.offsets, schedule.arrivals,
+                                     schedule.buckets, components,
+                                     component_of, reach)
+    graph = TimeExpandedGraph(schedule)
+    bridge_edges = _flight_bridges(graph.num_nodes, graph.heads,
+                                   graph.offsets, graph.flight_edges)
+
+    bridge_flights = sorted(schedule.flights[edge] for edge in bridge_edges)
+    critical_flights = sorted(schedule.flights[edge]
+                              for edge in critical_edges)
+
+    codes = schedule.codes
+    state_lists = [sorted((codes[state // NUM_TIMES],
+                           TimeOfDay(state % NUM_TIMES))
+                          for state in component)
+                   for component in components]
+    state_lists.sort(key=lambda states: (-len(states), states))
+
+    return ScheduleReport(unreachable, state_lists, critical_flights,
+                          bridge_flights)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python3 report.py SCHEDULE.csv")
+        sys.exit(1)
+
+    report = schedule_report(load_schedule(sys.argv[1]).airports)
+    for start_time in TimeOfDay:
+        print(f"{start_time.name}: {report.num_unreachable(start_time)} "
+              f"unreachable pairs, from "
+              f"{len(report.unreachable[start_time])} airports")
+    print(f"{len(report.components)} strongly connected components "
+          f"(largest: {len(report.components[0]) if report.components else 0}"
+          f" states)")
+    print(f"{len(report.critical)} critical flights (cancelling one leaves "
+          "some airport unreachable from some origin):")
+    for flight in report.critical:
+        print(f"  {flight}")
+    print(f"{len(report.bridges)} bridges (the only link between two "
+          "parts of the network, in either direction):")
+    for flight in report.bridges:
+        print(f"  {flight}")
@@ -0,0 +1,430 @@
+"""
+Module providing a compiled, array-backed representation of a flight
+schedule. A CompiledSchedule is built once from the dictionary of
+airports returned by load_flights (or by the sample_schedule_*
+functions), and answers routing queries using flat arrays of integers
+instead of Airport and Flight objects.
+
+Airports are identified by an integer id (ids are assigned in airport
+code order, so comparing ids is the same as comparing codes). A search
+state is an airport combined with the time of day at which we arrive
+at it, and is encoded as the integer airport_id * NUM_TIMES + time.
+"""
+from array import array
+import heapq
+from time import perf_counter
+from typing import Iterator, Optional, Sequence
+
+from flights import Airport, Flight, TimeOfDay
+import instrument
+
+NUM_TIMES = len(TimeOfDay)
+
+# Cost used for states that have not been reached by a search
+UNREACHED = -1
+
+
+def shortest_paths(offsets: Sequence[int], arrivals: Sequence[int],
+                   edge_costs: Sequence[int], source: int,
+                   target_id: Optional[int] = None) \
+        -> tuple[list[int], array]:
+    """
+    Run Dijkstra's algorithm over the search states of a compiled
+    schedule, given only its arrays (so that it can also run in
+    processes that do not have the Airport and Flight objects).
+
+    Args:
+        offsets, arrivals, edge_costs: Arrays of a CompiledSchedule
+        source: Start state
+        target_id: If provided, stop as soon as any state of this
+          airport is settled.
+
+    Returns: See CompiledSchedule.shortest_paths
+    """
+    num_states = len(offsets) - 1
+
+    costs = [UNREACHED] * num_states
+    previous = array("l", [UNREACHED]) * num_states
+    settled = bytearray(num_states)
+
+    collect = instrument.enabled()
+    started = perf_counter() if collect else 0.0
+    pops = stale = relaxed = 0
+
+    costs[source] = 0
+    heap = [(0, source)]
+
+    while heap:
+        cost, state = heapq.heappop(heap)
+        pops += 1
+        if settled[state]:
+            stale += 1
+            continue
+        settled[state] = 1
+
+        airport_id, time = divmod(state, NUM_TIMES)
+        if airport_id == target_id:
+            break
+
+        bucket = state - time
+        for dep in (time, (time + 1) % NUM_TIMES):
+            first, last = offsets[bucket + dep], offsets[bucket + dep + 1]
+            relaxed += last - first
+            for edge in range(first, last):
+                nxt = arrivals[edge]
+                new_cost = cost + edge_costs[edge]
+                old_cost = costs[nxt]
+                if old_cost == UNREACHED or new_cost < old_cost:
+                    costs[nxt] = new_cost
+                    previous[nxt] = edge * 2 + (dep != time)
+                    heapq.heappush(heap, (new_cost, nxt))
+
+    if collect:
+        instrument.record(instrument.QueryStats(
+            "shortest_paths", pops - stale, relaxed, pops + len(heap), pops,
+            stale, {"search": perf_counter() - started}))
+
+    return costs, previous
+
+
+def cheapest_arrival(costs: Sequence[int], airport_id: int) -> Optional[int]:
+    """
+    Given the costs computed by shortest_paths, find the cheapest state
+    in which we can arrive at an airport.
+
+    Args:
+        costs: Cost of every state
+        airport_id: Airport id
+
+    Returns: The cheapest state of the airport (if there are ties, the
+      earliest time of day), or None if the airport cannot be reached.
+    """
+    best = None
+    for state in range(airport_id * NUM_TIMES, (airport_id + 1) * NUM_TIMES):
+        if costs[state] != UNREACHED and \
+                (best is None or costs[state] < costs[best]):
+            best = state
+    return best
+
+
+def reachable(offsets: Sequence[int], arrivals: Sequence[int],
+              source: int, target_id: int) -> bool:
+    """
+    Determine whether any state of an airport can be reached from a
+    given state, using only the arrays of a compiled schedule.
+
+    Args:
+        offsets, arrivals: Arrays of a CompiledSchedule
+        source: Start state
+        target_id: Id of the airport we want to reach
+
+    Returns: True if the airport can be reached, False otherwise
+    """
+    visited = bytearray(len(offsets) - 1)
+    visited[source] = 1
+    stack = [source]
+
+    while stack:
+        state = stack.pop()
+        time = state % NUM_TIMES
+        bucket = state - time
+        for dep in (time, (time + 1) % NUM_TIMES):
+            for edge in range(offsets[bucket + dep],
+                              offsets[bucket + dep + 1]):
+                nxt = arrivals[edge]
+                if nxt // NUM_TIMES == target_id:
+                    return True
+                if not visited[nxt]:
+                    visited[nxt] = 1
+                    stack.append(nxt)
+
+    return False
+
+
+def itinerary_edges(buckets: Sequence[int], previous: Sequence[int],
+                    state: int) -> list[int]:
+    """
+    Rebuild the list of edges leading to a state, given the predecessor
+    table computed by shortest_paths.
+
+    Predecessor entries are encoded as edge * 2 + waited, where waited
+    is 1 if the passenger departed in the period after the one they
+    arrived in (and 0 if they departed in the same period). Together
+    with the bucket of the edge, this tells us the previous state.
+
+    Args:
+        buckets: Bucket of every edge (see CompiledSchedule.buckets)
+        previous: Predecessor table, as returned by shortest_paths
+        state: The final state of the itinerary
+
+    Returns: List of edges, in the order they are taken
+    """
+    edges = []
+    while previous[state] != UNREACHED:
+        edge, waited = divmod(previous[state], 2)
+        edges.append(edge)
+        bucket = buckets[edge]
+        time = bucket % NUM_TIMES
+        state = bucket - time + (time - waited) % NUM_TIMES
+
+    edges.reverse()
+    return edges
+
+
+class CompiledSchedule:
+    """
+    Class representing an immutable, compiled flight schedule.
+
+    Outgoing flights are stored in CSR (compressed sparse row) form,
+    bucketed by airport and departure time: the flights departing
+    from airport a at time t are the edges in
+    range(offsets[a * NUM_TIMES + t], offsets[a * NUM_TIMES + t + 1]),
+    sorted by flight code. For each edge we store the destination
+    airport, the state we arrive at, the cost of the flight, and the
+    bucket it departs from.
+    """
+
+    __codes: list[str]
+    __ids: dict[str, int]
+    __airports: list[Airport]
+    __offsets: array
+    __targets: array
+    __arrivals: array
+    __costs: array
+    __buckets: array
+    __flights: list[Flight]
+
+    def __init__(self, airports: dict[str, Airport]):
+        """
+        Constructor
+
+        Args:
+            airports: Dictionary mapping airport codes to Airport objects.
+              Airports that are only reachable as the destination of
+              a flight are included as well.
+        """
+        by_code: dict[str, Airport] = {}
+        pending = list(airports.values())
+        while pending:
+            airport = pending.pop()
+            if airport.code in by_code:
+                continue
+            by_code[airport.code] = airport
+            pending.extend(flight.destination for flight in airport.flights)
+
+        self.__codes = sorted(by_code)
+        self.__ids = {code: i for i, code in enumerate(self.__codes)}
+        self.__airports = [by_code[code] for code in self.__codes]
+
+        buckets: list[list[Flight]] = \
+            [[] for _ in range(len(self.__codes) * NUM_TIMES)]
+        for i, airport in enumerate(self.__airports):
+            for time in TimeOfDay:
+                buckets[i * NUM_TIMES + time].extend(airport.departures(time))
+
+        self.__offsets = array("l", [0])
+        self.__targets = array("l")
+        self.__arrivals = array("l")
+        self.__costs = array("l")
+        self.__buckets = array("l")
+        self.__flights = []
+
+        for bucket_id, bucket in enumerate(buckets):
+            arrival = (bucket_id % NUM_TIMES + 1) % NUM_TIMES
+            for flight in sorted(bucket):
+                target = self.__ids[flight.destination.code]
+                self.__targets.append(target)
+                self.__arrivals.append(target * NUM_TIMES + arrival)
+                self.__costs.append(flight.cost)
+                self.__buckets.append(bucket_id)
+                self.__flights.append(flight)
+            self.__offsets.append(len(self.__flights))
+
+    @property
+    def num_airports(self) -> int:
+        """
+        Returns: Number of airports in the schedule
+        """
+        return len(self.__codes)
+
+    @property
+    def num_flights(self) -> int:
+        """
+        Returns: Number of flights in the schedule
+        """
+        return len(self.__flights)
+
+    @property
+    def num_states(self) -> int:
+        """
+        Returns: Number of (airport, time of day) search states
+        """
+        return len(self.__codes) * NUM_TIMES
+
+    @property
+    def codes(self) -> list[str]:
+        """
+        Returns: Airport codes, indexed by airport id
+        """
+        return self.__codes
+
+    @property
+    def offsets(self) -> array:
+        """
+        Returns: CSR offsets, indexed by airport_id * NUM_TIMES + time
+        """
+        return self.__offsets
+
+    @property
+    def targets(self) -> array:
+        """
+        Returns: Destination airport id of each edge
+        """
+        return self.__targets
+
+    @property
+    def arrivals(self) -> array:
+        """
+        Returns: State reached by taking each edge
+        """
+        return self.__arrivals
+
+    @property
+    def costs(self) -> array:
+        """
+        Returns: Cost of each edge
+        """
+        return self.__costs
+
+    @property
+    def buckets(self) -> array:
+        """
+        Returns: Bucket (airport_id * NUM_TIMES + departure time) of
+          each edge
+        """
+        return self.__buckets
+
+    @property
+    def flights(self) -> list[Flight]:
+        """
+        Returns: Flight object of each edge
+        """
+        return self.__flights
+
+    def airport_id(self, code: str) -> int:
+        """
+        Given an airport code, return its id in the compiled schedule
+
+        Args:
+            code: Airport's 3-letter code
+
+        Raises:
+            ValueError: If the airport is not in the schedule
+
+        Returns: Airport id
+        """
+        if code not in self.__ids:
+            raise ValueError(f"No such airport in schedule: {code}")
+
+        return self.__ids[code]
+
+    def airport(self, airport_id: int) -> Airport:
+        """
+        Returns: The Airport object with the given id
+        """
+        return self.__airports[airport_id]
+
+    def valid_edges(self, airport_id: int,
+                    arrival_time: TimeOfDay) -> Iterator[int]:
+        """
+        Given an airport id, yield the ids of the edges (flights) that
+        a passenger arriving at that airport at a given time could take.
+
+        Args:
+            airport_id: Airport id
+            arrival_time: Time of day when the passenger arrives
+
+        Returns: Iterator over edge ids
+        """
+        offsets = self.__offsets
+        bucket = airport_id * NUM_TIMES
+        for time in (arrival_time, (arrival_time + 1) % NUM_TIMES):
+            yield from range(offsets[bucket + time],
+                             offsets[bucket + time + 1])
+
+    def valid_flights(self, airport: Airport,
+                      arrival_time: TimeOfDay) -> set[Flight]:
+        """
+        Same as hw4.valid_flights, but using the compiled schedule.
+        """
+        airport_id = self.airport_id(airport.code)
+        return {self.__flights[e]
+                for e in self.valid_edges(airport_id, arrival_time)}
+
+    def shortest_paths(self, origin_id: int, start: TimeOfDay,
+                       target_id: Optional[int] = None) \
+            -> tuple[list[int], array]:
+        """
+        Run Dijkstra's algorithm over the search states, starting at
+        a given airport and time.
+
+        Args:
+            origin_id: Id of the origin airport
+            start: Time at which we start the itinerary
+            target_id: If provided, stop as soon as any state of this
+              airport is settled.
+
+        Returns: A tuple with the lowest cost of every state (UNREACHED
+          for states that cannot be reached) and the edge used to
+          reach every state, encoded as described in itinerary_edges
+          (UNREACHED for the start state and for states
+          that cannot be reached). If target_id was provided, only
+          the costs of settled states are final.
+        """
+        return shortest_paths(self.__offsets, self.__arrivals, self.__costs,
+                              origin_id * NUM_TIMES + start, target_id)
+
+    def itinerary(self, previous: array, state: int) -> list[Flight]:
+        """
+        Rebuild the list of flights leading to a state, given the
+        predecessor table computed by shortest_paths.
+
+        Args:
+            previous: Predecessor table, as returned by shortest_paths
+            state: The final state of the itinerary
+
+        Returns: List of flights, in the order they are taken
+        """
+        return [self.__flights[e]
+                for e in itinerary_edges(self.__buckets, previous, state)]
+
+    def best_itinerary(self, origin: Airport, destination: Airport,
+                       start: TimeOfDay) \
+            -> Optional[tuple[int, list[Flight]]]:
+        """
+        Same as hw4.best_itinerary, but using the compiled schedule.
+        """
+        if origin.code == destination.code:
+            return 0, []
+
+        origin_id = self.airport_id(origin.code)
+        target_id = self.airport_id(destination.code)
+        costs, previous = self.shortest_paths(origin_id, start, target_id)
+
+        best = cheapest_arrival(costs, target_id)
+        if best is None:
+            return None
+
+        return costs[best], self.itinerary(previous, best)
+
+    def is_reachable(self, origin: Airport, destination: Airport,
+                     start: TimeOfDay) -> bool:
+        """
+        Same as hw4.is_reachable, but using the compiled schedule.
+        """
+        if origin.code == destination.code:
+            return True
+
+        return reachable(self.__offsets, self.__arrivals,
+                         self.airport_id(origin.code) * NUM_TIMES + start,
+                         self.airport_id(destination.code))
@@ -0,0 +1,322 @@
+"""
+Module providing a query server: it loads a schedule once, and answers
+process_itinerary, is_reachable, and best_itinerary queries over a
+Unix socket, so many clients can share one warm process (see the
+--serve option of tui.py).
+
+The protocol is line-delimited JSON. Every request is one line with a
+JSON object, for example:
+
+    {"id": 1, "query": "best_itinerary", "origin": "ORD",
+     "destination": "SFO", "start": "MORNING"}
+    {"id": 2, "query": "is_reachable", "origin": "ORD",
+     "destination": "SFO", "start": "MORNING"}
+    {"id": 3, "query": "process_itinerary", "origin": "ORD",
+     "start": "MORNING", "flights": ["UC0001", "UC0004"]}
+
+and gets back one line with either {"id": ..., "result": ...} or
+{"id": ..., "error": "..."}. The results are the destination code (or
+null) for process_itinerary, true or false for is_reachable, and
+{"cost": ..., "flights": [...]} (or null) for best_itinerary. The id
+is optional, and is copied to the response as is: responses are sent
+as soon as they are ready, so they may not be in the same order as
+the requests.
+
+The server runs on asyncio. process_itinerary only follows a few
+flights, so it is answered right away; the searches (is_reachable and
+best_itinerary) are sent to a pool of worker processes, each with its
+own copy of the schedule, so a slow search does not hold up the
+queries behind it (or the other clients).
+"""
+import asyncio
+from concurrent.futures import BrokenExecutor, Executor, ProcessPoolExecutor
+import json
+import os
+import signal
+from typing import Any, Optional
+
+from flights import Airport, TimeOfDay
+from hw4 import best_itinerary, is_reachable, load_flights, process_itinerary
+
+QUERIES = ("process_itinerary", "is_reachable", "best_itinerary")
+
+# Queries that are sent to the worker processes
+SEARCHES = ("is_reachable", "best_itinerary")
+
+# Longest request line accepted (in bytes)
+MAX_LINE = 2 ** 20
+
+# A parsed query: its name, the airport codes and start time, and the
+# flight codes (for process_itinerary)
+Query = tuple[str, str, str, int, list[str]]
+
+# Schedule loaded by _init_worker in every worker process
+_worker_airports: Optional[dict[str, Airport]] = None
+
+
+def _init_worker(schedule_file: str) -> None:
+    """
+    Initializer for worker processes: loads the schedule once.
+    """
+    global _worker_airports  # pylint: disable=global-statement
+    _worker_airports = load_flights(schedule_file)
+
+
+def _worker_ready() -> bool:
+    """
+    Returns: Whether the worker process loaded the schedule
+    """
+    return _worker_airports is not None
+
+
+def _worker_query(query: Query) -> Any:
+    """
+    Answers one query inside a worker process.
+    """
+    assert _worker_airports is not None, "Worker could not load schedule"
+    return answer_query(_worker_airports, query)
+
+
+def parse_query(airports: dict[str, Airport], request: Any) -> Query:
+    """
+    Validates a request.
+
+    Args:
+        airports: Dictionary mapping airport codes to Airport objects
+        request: The decoded JSON request
+
+    Raises:
+        ValueError: If the request is not valid
+
+    Returns: The query
+    """
+    if not isinstance(request, dict):
+        raise ValueError("request must be a JSON object")
+
+    name = request.get("query")
+    if name not in QUERIES:
+        raise ValueError(f"unknown query: {name}")
+
+    start = request.get("start")
+    if not isinstance(start, str) or start not in TimeOfDay.__members__:
+        raise ValueError(f"invalid start time: {start}")
+
+    fields = ["origin"] if name == "process_itinerary" \
+        else ["origin", "destination"]
+    for field in fields:
+        code = request.get(field)
+        if not isinstance(code, str) or code not in airports:
+            raise ValueError(f"no such airport: {code}")
+
+    flight_codes: list[str] = []
+    if name == "process_itinerary":
+        raw = request.get("flights")
+        if not isinstance(raw, list) or \
+                not all(isinstance(code, str) for code in raw):
+            raise ValueError("flights must be a list of flight codes")
+        flight_codes = raw
+
+    return (name, request["origin"], request.get("destination", ""),
+            int(TimeOfDay[start]), flight_codes)
+
+
+def answer_query(airports: dict[str, Airport], query: Query) -> Any:
+    """
+    Answers a query (see parse_query).
+
+    Returns: The result, as a JSON-serializable value
+    """
+    name, origin_code, destination_code, start, flight_codes = query
+    origin = airports[origin_code]
+
+    if name == "process_itinerary":
+        destination = process_itinerary(origin, TimeOfDay(start),
+                                        flight_codes)
+        return None if destination is None else destination.code
+
+    destination = airports[destination_code]
+    if name == "is_reachable":
+        return is_reachable(origin, destination, TimeOfDay(start))
+
+    itinerary = best_itinerary(origin, destination, TimeOfDay(start))
+    if itinerary is None:
+        return None
+    cost, flights = itinerary
+    return {"cost": cost, "flights": [flight.code for flight in flights]}
+
+
+class QueryServer:
+    """
+    Class representing a query server for one schedule
+    """
+
+    __schedule_file: str
+    __airports: dict[str, Airport]
+    __workers: Optional[int]
+    __executor: Optional[Executor]
+    __server: Optional[asyncio.AbstractServer]
+    __socket_path: Optional[str]
+
+    def __init__(self, schedule_file: str, airports: dict[str, Airport],
+                 workers: Optional[int] = None):
+        """
+        Constructor
+
+        Args:
+            schedule_file: Path to the schedule (loaded again by every
+              worker process)
+            airports: The schedule, already loaded from schedule_file
+            workers: Number of worker processes for the searches (if
+              None, one per CPU). If 0, searches run in the server
+              process itself, and block it while they run.
+        """
+        assert workers is None or workers >= 0, \
+            "Number of workers cannot be negative"
+
+        self.__schedule_file = schedule_file
+        self.__airports = airports
+        self.__workers = workers
+        self.__executor = None
+        self.__server = None
+        self.__socket_path = None
+
+    async def start(self, socket_path: str) -> None:
+        """
+        Starts the worker processes, and starts listening on a Unix
+        socket (replacing a stale socket file, if there is one)
+
+        Raises:
+            RuntimeError: If the workers could not load the schedule
+        """
+        assert self.__server is None, "Server already started"
+
+        workers = self.__workers
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers > 0:
+            self.__executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                initargs=(self.__schedule_file,))
+            # Start the workers (and load the schedule in them) before
+            # accepting connections: otherwise they would be forked on
+            # the first search, and inherit the sockets of the clients
+            # connected at the time (keeping them open after we close
+            # them)
+            loop = asyncio.get_running_loop()
+            ready = await asyncio.gather(
+                *[loop.run_in_executor(self.__executor, _worker_ready)
+                  for _ in range(workers)])
+            if not all(ready):
+                await self.close()
+                raise RuntimeError("Workers could not load "
+                                   f"{self.__schedule_file}")
+        self.__server = await asyncio.start_unix_server(
+            self.__handle_client, path=socket_path, limit=MAX_LINE)
+        self.__socket_path = socket_path
+
+    async def close(self) -> None:
+        """
+        Stops listening, shuts down the workers, and removes the socket
+        """
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+        if self.__executor is not None:
+            self.__executor.shutdown(cancel_futures=True)
+            self.__executor = None
+        if self.__socket_path is not None:
+            if os.path.exists(self.__socket_path):
+                os.remove(self.__socket_path)
+            self.__socket_path = None
+
+    async def answer(self, line: bytes) -> dict[str, Any]:
+        """
+        Answers a single request line.
+
+        Returns: The response (with either a result or an error)
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {"id": None, "error": "request is not valid JSON"}
+
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            query = parse_query(self.__airports, request)
+            if query[0] in SEARCHES and self.__executor is not None:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self.__executor,
+                                                    _worker_query, query)
+            else:
+                result = answer_query(self.__airports, query)
+        except ValueError as err:
+            return {"id": request_id, "error": str(err)}
+        except BrokenExecutor:
+            return {"id": request_id, "error": "worker process failed"}
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            # Any other failure is a bug, but it must not leave the
+            # client waiting for a response that never comes
+            return {"id": request_id,
+                    "error": f"internal error: {type(err).__name__}"}
+        return {"id": request_id, "result": result}
+
+    async def __handle_client(self, reader: asyncio.StreamReader,
+                              writer: asyncio.StreamWriter) -> None:
+        """
+        Answers the requests from one client, concurrently, until it
+        closes its end of the connection
+        """
+        async def respond(line: bytes) -> None:
+            response = await self.answer(line)
+            writer.write(json.dumps(response).encode() + b"\n")
+            await writer.drain()
+
+        pending: set[asyncio.Task[None]] = set()
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(respond(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        except (ValueError, ConnectionError):
+            # Line too long, or the client went away
+            for task in pending:
+                task.cancel()
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def run_server(schedule_file: str, airports: dict[str, Airport],
+               socket_path: str, workers: Optional[int] = None) -> None:
+    """
+    Runs a query server until it gets SIGINT (Ctrl-C) or SIGTERM.
+
+    Args:
+        schedule_file: Path to the schedule
+        airports: The schedule, already loaded from schedule_file
+        socket_path: Path of the Unix socket
+        workers: Number of worker processes (see QueryServer)
+    """
+    async def serve() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+
+        server = QueryServer(schedule_file, airports, workers)
+        await server.start(socket_path)
+        print(f"Serving {schedule_file} on {socket_path}", flush=True)
+        try:
+            await stop.wait()
+        finally:
+            await server.close()
+
+    asyncio.run(serve())
@@ -0,0 +1,350 @@
+"""
+Module providing a compact binary snapshot format for schedules.
+
+A snapshot is written once from a loaded schedule (save_snapshot) and
+can then be opened with mmap (open_snapshot), which takes time that
+does not depend on the size of the schedule: nothing is parsed and no
+Airport or Flight objects are created. Routing queries run directly
+on the memory-mapped arrays; Airport and Flight objects are only
+created if the whole schedule is explicitly materialized.
+
+A snapshot file contains a fixed-size header followed by a number of
+sections (each one starting at an 8-byte boundary):
+
+- codes: 3-byte airport codes, indexed by airport id
+- name_offsets, names: airport names (UTF-8), indexed by airport id
+- offsets, arrivals, costs, buckets: the CSR arrays of the compiled
+  schedule (see schedule.CompiledSchedule), as 32-bit integers
+- records: one fixed-width FLIGHT_RECORD per flight, in edge order
+
+Integers are stored in the byte order of the machine that wrote the
+snapshot, so that the arrays can be used without conversion; opening
+a snapshot on a machine with a different byte order fails.
+
+Usage: python3 snapshot.py SCHEDULE.csv SNAPSHOT
+"""
+from array import array
+import mmap
+import struct
+import sys
+from typing import Optional
+
+from flights import Airport, Flight, TimeOfDay
+from loader import load_schedule
+from schedule import (CompiledSchedule, NUM_TIMES, cheapest_arrival,
+                      itinerary_edges, reachable, shortest_paths)
+
+MAGIC = b"HW4SNAP1"
+
+SECTIONS = ("codes", "name_offsets", "names", "offsets", "arrivals",
+            "costs", "buckets", "records")
+
+# Magic number, byte order, number of airports, number of flights, and
+# the offset and size of every section
+HEADER = struct.Struct("<8s1s7xqq" + "qq" * len(SECTIONS))
+
+# Airline code, flight number, origin id, destination id, departure
+# time, and cost
+FLIGHT_RECORD = struct.Struct("=2sHiiB3xi")
+
+
+def _pad(size: int) -> int:
+    """
+    Returns: The size rounded up to a multiple of 8
+    """
+    return (size + 7) // 8 * 8
+
+
+def save_snapshot(airports: dict[str, Airport], path: str) -> None:
+    """
+    Writes a snapshot of a schedule.
+
+    Args:
+        airports: Dictionary mapping airport codes to Airport objects
+        path: Path of the snapshot file
+
+    Raises:
+        OSError: If the file cannot be written
+    """
+    schedule = CompiledSchedule(airports)
+
+    names = [schedule.airport(i).name.encode("utf-8")
+             for i in range(schedule.num_airports)]
+    name_offsets = array("i", [0])
+    for name in names:
+        name_offsets.append(name_offsets[-1] + len(name))
+
+    records = bytearray()
+    for edge, flight in enumerate(schedule.flights):
+        records += FLIGHT_RECORD.pack(flight.airline.encode("ascii"),
+                                      flight.flight_num,
+                                      schedule.buckets[edge] // NUM_TIMES,
+                                      schedule.targets[edge],
+                                      flight.departure_time,
+                                      flight.cost)
+
+    sections = {
+        "codes": "".join(schedule.codes).encode("ascii"),
+        "name_offsets": name_offsets.tobytes(),
+        "names": b"".join(names),
+        "offsets": array("i", schedule.offsets).tobytes(),
+        "arrivals": array("i", schedule.arrivals).tobytes(),
+        "costs": array("i", schedule.costs).tobytes(),
+        "buckets": array("i", schedule.buckets).tobytes(),
+        "records": bytes(records),
+    }
+
+    table = []
+    position = HEADER.size
+    for section in SECTIONS:
+        position = _pad(position)
+        table += [position, len(sections[section])]
+        position += len(sections[section])
+
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, sys.byteorder[0].encode("ascii"),
+                               schedule.num_airports, schedule.num_flights,
+                               *table))
+        for section in SECTIONS:
+            file.write(b"\0" * (_pad(file.tell()) - file.tell()))
+            file.write(sections[section])
+
+
+class Snapshot:
+    """
+    Class representing an open, memory-mapped schedule snapshot.
+
+    Airports are referred to by their code, and flights by their
+    flight code, since no Airport or Flight objects are created
+    (see materialize).
+    """
+
+    __mmap: mmap.mmap
+    __views: dict[str, memoryview]
+    __num_airports: int
+    __num_flights: int
+    __codes: list[str]
+    __ids: dict[str, int]
+
+    def __init__(self, path: str):
+        """
+        Constructor (use open_snapshot to open a snapshot)
+
+        Args:
+            path: Path of the snapshot file
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If the file is not a valid snapshot
+        """
+        with open(path, "rb") as file:
+            self.__mmap = mmap.mmap(file.fileno(), 0,
+                                    access=mmap.ACCESS_READ)
+
+        if len(self.__mmap) < HEADER.size:
+            self.__mmap.close()
+            raise ValueError(f"{path} is not a schedule snapshot")
+
+        magic, byteorder, num_airports, num_flights, *table = \
+            HEADER.unpack_from(self.__mmap)
+        if magic != MAGIC:
+            self.__mmap.close()
+            raise ValueError(f"{path} is not a schedule snapshot")
+        if byteorder != sys.byteorder[0].encode("ascii"):
+            self.__mmap.close()
+            raise ValueError(f"{path} was written on a machine with a "
+                             f"different byte order")
+
+        self.__num_airports = num_airports
+        self.__num_flights = num_flights
+
+        buffer = memoryview(self.__mmap)
+        self.__views = {}
+        for i, name in enumerate(SECTIONS):
+            start, size = table[2 * i], table[2 * i + 1]
+            self.__views[name] = buffer[start:start + size]
+        buffer.release()
+
+        for name in ("name_offsets", "offsets", "arrivals", "costs",
+                     "buckets"):
+            view = self.__views[name]
+            self.__views[name] = view.cast("i")
+            view.release()
+
+        codes = bytes(self.__views["codes"]).decode("ascii")
+        self.__codes = [codes[i:i + 3] for i in range(0, len(codes), 3)]
+        self.__ids = {code: i for i, code in enumerate(self.__codes)}
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Unmaps the snapshot. The snapshot cannot be used afterwards.
+        """
+        for view in self.__views.values():
+            view.release()
+        self.__views = {}
+        self.__mmap.close()
+
+    @property
+    def num_airports(self) -> int:
+        """
+        Returns: Number of airports in the snapshot
+        """
+        return self.__num_airports
+
+    @property
+    def num_flights(self) -> int:
+        """
+        Returns: Number of flights in the snapshot
+        """
+        return self.__num_flights
+
+    @property
+    def codes(self) -> list[str]:
+        """
+        Returns: Airport codes, indexed by airport id
+        """
+        return self.__codes
+
+    def airport_id(self, code: str) -> int:
+        """
+        Given an airport code, return its id in the snapshot
+
+        Raises:
+            ValueError: If the airport is not in the snapshot
+        """
+        if code not in self.__ids:
+            raise ValueError(f"No such airport in schedule: {code}")
+
+        return self.__ids[code]
+
+    def airport_name(self, code: str) -> str:
+        """
+        Returns: The name of the airport with the given code
+        """
+        airport_id = self.airport_id(code)
+        offsets = self.__views["name_offsets"]
+        name = self.__views["names"][offsets[airport_id]:
+                                     offsets[airport_id + 1]]
+        return bytes(name).decode("utf-8")
+
+    def flight_record(self, edge: int) -> tuple[str, int, str, str,
+                                                TimeOfDay, int]:
+        """
+        Args:
+            edge: Edge id (flights are numbered in CSR order)
+
+        Returns: The airline code, flight number, origin code,
+          destination code, departure time, and cost of a flight
+        """
+        airline, flight_num, origin_id, dest_id, time, cost = \
+            FLIGHT_RECORD.unpack_from(self.__views["records"],
+                                      edge * FLIGHT_RECORD.size)
+        return (airline.decode("ascii"), flight_num, self.__codes[origin_id],
+                self.__codes[dest_id], TimeOfDay(time), cost)
+
+    def flight_code(self, edge: int) -> str:
+        """
+        Returns: The flight code of an edge
+        """
+        airline, flight_num, *_ = self.flight_record(edge)
+        return f"{airline}{flight_num:04}"
+
+    def valid_flights(self, code: str, arrival_time: TimeOfDay) -> list[str]:
+        """
+        Same as hw4.valid_flights, but returning flight codes.
+
+        Args:
+            code: Airport code
+            arrival_time: Time of day when the passenger arrives
+
+        Returns: Codes of the flights the passenger could take
+        """
+        offsets = self.__views["offsets"]
+        bucket = self.airport_id(code) * NUM_TIMES
+        return [self.flight_code(edge)
+                for time in (arrival_time, (arrival_time + 1) % NUM_TIMES)
+                for edge in range(offsets[bucket + time],
+                                  offsets[bucket + time + 1])]
+
+    def is_reachable(self, origin: str, destination: str,
+                     start: TimeOfDay) -> bool:
+        """
+        Same as hw4.is_reachable, but taking airport codes.
+        """
+        if origin == destination:
+            return True
+
+        return reachable(self.__views["offsets"], self.__views["arrivals"],
+                         self.airport_id(origin) * NUM_TIMES + start,
+                         self.airport_id(destination))
+
+    def best_itinerary(self, origin: str, destination: str,
+                       start: TimeOfDay) -> Optional[tuple[int, list[str]]]:
+        """
+        Same as hw4.best_itinerary, but taking airport codes and
+        returning flight codes.
+        """
+        if origin == destination:
+            return 0, []
+
+        target_id = self.airport_id(destination)
+        costs, previous = shortest_paths(
+            self.__views["offsets"], self.__views["arrivals"],
+            self.__views["costs"],
+            self.airport_id(origin) * NUM_TIMES + start, target_id)
+
+        state = cheapest_arrival(costs, target_id)
+        if state is None:
+            return None
+
+        edges = itinerary_edges(self.__views["buckets"], previous, state)
+        return costs[state], [self.flight_code(edge) for edge in edges]
+
+    def materialize(self) -> dict[str, Airport]:
+        """
+        Creates the Airport and Flight objects for the whole schedule.
+
+        Returns: Dictionary mapping airport codes to Airport objects
+        """
+        airports = {code: Airport(self.airport_name(code), code)
+                    for code in self.__codes}
+
+        for edge in range(self.__num_flights):
+            airline, flight_num, origin, destination, time, cost = \
+                self.flight_record(edge)
+            airports[origin].add_flight(Flight(airports[origin],
+                                               airports[destination],
+                                               airline, flight_num, time,
+                                               cost))
+
+        return airports
+
+
+def open_snapshot(path: str) -> Snapshot:
+    """
+    Opens a snapshot written by save_snapshot.
+
+    Args:
+        path: Path of the snapshot file
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not a valid snapshot
+
+    Returns: The open snapshot
+    """
+    return Snapshot(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python3 snapshot.py SCHEDULE.csv SNAPSHOT")
+        sys.exit(1)
+
+    save_snapshot(load_schedule(sys.argv[1]).airports, sys.argv[2])
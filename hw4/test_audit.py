@@ -0,0 +1,63 @@
+"""
+Tests for batch itinerary validation
+"""
+
+from flights import TimeOfDay, sample_schedule_1, sample_schedule_3
+
+from hw4 import process_itinerary
+from audit import FlightIndex, ItineraryCheck, Status, process_itineraries
+
+
+def test_process_itineraries_matches_hw4() -> None:
+    """
+    Checks that every itinerary made of two or fewer flights of
+    Schedule 3 gets the same result as hw4.process_itinerary
+    """
+    airports = sample_schedule_3()
+    codes = sorted({flight.code for airport in airports.values()
+                    for flight in airport.flights}) + ["XX9999"]
+
+    itineraries: list[list[str]] = \
+        [[]] + [[code] for code in codes] + \
+        [[code1, code2] for code1 in codes for code2 in codes]
+    batch = [(origin, time, itinerary)
+             for origin in airports.values()
+             for time in TimeOfDay
+             for itinerary in itineraries]
+    results = process_itineraries(batch)
+
+    assert len(results) == len(batch)
+    for (origin, time, itinerary), result in zip(batch, results):
+        expected = process_itinerary(origin, time, itinerary)
+        assert result.destination is expected
+        assert (result.status is Status.VALID) == (expected is not None)
+        assert (result.leg is None) == (expected is not None)
+
+
+def test_process_itineraries_reasons() -> None:
+    """
+    Checks the reason and the leg reported for invalid itineraries
+    """
+    airports = sample_schedule_1()
+    index = FlightIndex(airports)
+    ord_, lga = airports["ORD"], airports["LGA"]
+    morning = TimeOfDay.MORNING
+
+    results = process_itineraries([
+        (ord_, morning, ["UC0001", "UC0003"]),
+        (ord_, morning, ["UC0001", "UC0004"]),
+        (ord_, morning, ["UC0001", "UC0004", "UC0007"]),
+        (ord_, morning, ["UC0001", "UC0004", "UC0006", "UC0007"]),
+        (ord_, TimeOfDay.EVENING, ["UC0001", "UC0004"]),
+        (lga, morning, []),
+    ], index)
+
+    assert results == [
+        ItineraryCheck(None, Status.MISSED_CONNECTION, 1),
+        ItineraryCheck(airports["LAX"], Status.VALID, None),
+        ItineraryCheck(None, Status.UNKNOWN_FLIGHT, 2),
+        ItineraryCheck(ord_, Status.VALID, None),
+        ItineraryCheck(None, Status.MISSED_CONNECTION, 0),
+        ItineraryCheck(lga, Status.VALID, None),
+    ]
+    assert len(index) == 7
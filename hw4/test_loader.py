@@ -0,0 +1,180 @@
+"""
+Tests for the streaming schedule loader, schedule snapshots, and the
+schedule generator
+"""
+
+from pathlib import Path
+
+import pytest
+
+from flights import TimeOfDay, sample_schedule_1, sample_schedule_3
+from hw4 import best_itinerary, is_reachable
+from loader import COLUMNS, RowError, load_schedule
+from snapshot import open_snapshot, save_snapshot
+from generate import generate_schedule, write_schedule
+
+
+def test_load_in_chunks() -> None:
+    """
+    Checks that loading a file in small chunks (and in several worker
+    processes) produces the same schedule as loading it in one go
+    """
+    expected = sample_schedule_3()
+
+    for chunk_size, workers in [(1 << 20, 1), (64, 1), (64, 2)]:
+        result = load_schedule("files/sample-3.csv", chunk_size, workers)
+        assert result.errors == []
+        assert result.num_flights == \
+            sum(len(airport.flights) for airport in expected.values())
+        assert set(result.airports) == set(expected)
+        for code, airport in expected.items():
+            assert {str(f) for f in result.airports[code].flights} == \
+                {str(f) for f in airport.flights}
+
+
+def test_load_multiple_files() -> None:
+    """
+    Checks that loading several files merges them into one schedule
+    (sample-1.csv and sample-2.csv share ORD, LGA, and SFO)
+    """
+    result = load_schedule(["files/sample-1.csv", "files/sample-2.csv"])
+
+    assert result.errors == []
+    assert result.num_flights == 11
+    assert set(result.airports) == {"ORD", "LGA", "LAX", "SFO"}
+    assert len(result.airports["ORD"].flights) == 5
+
+
+def test_load_reports_errors(tmp_path: Path) -> None:
+    """
+    Checks that invalid rows are reported (with their line numbers)
+    without stopping the load
+    """
+    path = tmp_path / "schedule.csv"
+    path.write_text(",".join(COLUMNS) + "\n"
+                    "UC,1,ORD,Chicago O'Hare,LGA,New York,MORNING,200\n"
+                    "UC,2,ORD,Chicago O'Hare,ORD,Chicago O'Hare,MORNING,200\n"
+                    "UC,3,ORD,Chicago O'Hare,LGA,New York,LUNCHTIME,200\n"
+                    "UC,4,ORD,Chicago O'Hare,LGA,New York,MORNING,free\n"
+                    "UC,1,ORD,Chicago O'Hare,LGA,New York,NIGHT,100\n"
+                    "UC,5,ORD,Chicago Midway,LGA,New York,MORNING,200\n"
+                    "UC,6,ORD\n"
+                    "\n"
+                    "UC,7,LGA,New York,ORD,Chicago O'Hare,EVENING,300\n"
+                    "UC,8,AB1,Digits,LGA,New York,MORNING,200\n"
+                    "UC,9,LGA,New York,O2D,Digits,MORNING,200\n",
+                    encoding="utf-8")
+
+    result = load_schedule(str(path), chunk_size=100)
+
+    assert result.num_flights == 2
+    assert [error.line for error in result.errors] == \
+        [3, 4, 5, 6, 7, 8, 11, 12]
+    assert all(isinstance(error, RowError) for error in result.errors)
+    assert "duplicate" in result.errors[3].message
+    assert "'AB1'" in result.errors[6].message
+    assert "'O2D'" in result.errors[7].message
+
+
+def test_load_missing_columns(tmp_path: Path) -> None:
+    """
+    Checks that a file without the expected header is rejected
+    """
+    path = tmp_path / "schedule.csv"
+    path.write_text("airline,flight_num\nUC,1\n", encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        load_schedule(str(path))
+
+
+def test_snapshot_queries(tmp_path: Path) -> None:
+    """
+    Checks that queries on a snapshot of Schedule 3 match hw4.py
+    """
+    airports = sample_schedule_3()
+    path = str(tmp_path / "schedule.snap")
+    save_snapshot(airports, path)
+
+    with open_snapshot(path) as snapshot:
+        assert snapshot.num_airports == len(airports)
+        assert sorted(snapshot.codes) == sorted(airports)
+
+        for origin in airports.values():
+            assert snapshot.airport_name(origin.code) == origin.name
+            for destination in airports.values():
+                for time in TimeOfDay:
+                    assert snapshot.is_reachable(origin.code,
+                                                 destination.code, time) == \
+                        is_reachable(origin, destination, time)
+
+                    expected = best_itinerary(origin, destination, time)
+                    actual = snapshot.best_itinerary(origin.code,
+                                                     destination.code, time)
+                    if expected is None:
+                        assert actual is None
+                    else:
+                        assert actual == (expected[0],
+                                          [f.code for f in expected[1]])
+
+
+def test_snapshot_materialize(tmp_path: Path) -> None:
+    """
+    Checks that materializing a snapshot recreates the original schedule
+    """
+    airports = sample_schedule_1()
+    path = str(tmp_path / "schedule.snap")
+    save_snapshot(airports, path)
+
+    with open_snapshot(path) as snapshot:
+        loaded = snapshot.materialize()
+
+    assert set(loaded) == set(airports)
+    for code, airport in airports.items():
+        assert loaded[code].name == airport.name
+        assert {str(f) for f in loaded[code].flights} == \
+            {str(f) for f in airport.flights}
+
+
+def test_snapshot_invalid_file() -> None:
+    """
+    Checks that opening a file that is not a snapshot fails
+    """
+    with pytest.raises(ValueError):
+        open_snapshot("files/sample-1.csv")
+
+
+@pytest.mark.parametrize("kind", ["random", "hub"])
+def test_generate_schedule(kind: str, tmp_path: Path) -> None:
+    """
+    Checks that generated schedules are reproducible, and can be loaded
+    without errors
+    """
+    rows = generate_schedule(40, 2000, kind, seed=7)
+    assert rows == generate_schedule(40, 2000, kind, seed=7)
+    assert rows != generate_schedule(40, 2000, kind, seed=8)
+
+    path = str(tmp_path / "schedule.csv")
+    write_schedule(rows, path)
+    result = load_schedule(path)
+
+    assert result.errors == []
+    assert result.num_flights == 2000
+    assert len(result.airports) <= 40
+
+    if kind == "hub":
+        # With 40 airports there are two hubs (the first two codes)
+        hubs = sorted(result.airports)[:2]
+        for row in rows:
+            assert row[2] in hubs or row[4] in hubs
+
+
+def test_generate_schedule_invalid() -> None:
+    """
+    Checks that invalid arguments are rejected
+    """
+    with pytest.raises(ValueError):
+        generate_schedule(1, 10)
+    with pytest.raises(ValueError):
+        generate_schedule(10, 10, "mesh")
+    with pytest.raises(ValueError):
+        generate_schedule(10, 10, "hub", num_hubs=10)
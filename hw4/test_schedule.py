@@ -0,0 +1,775 @@
+"""
+Tests for the compiled schedule and the searches built on top of it
+"""
+
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from flights import (Airport, Flight, TimeOfDay, sample_schedule_1,
+                     sample_schedule_2, sample_schedule_3, sample_schedule_4)
+
+from hw4 import (valid_flights, process_itinerary, is_reachable,
+                 best_itinerary)
+from schedule import CompiledSchedule, NUM_TIMES
+from expanded import METHODS, TimeExpandedGraph
+from batch import itinerary_matrix
+from reachability import ReachabilityIndex
+from cache import ItineraryCache
+from alternatives import AlternativeItineraries
+from dynamic import DynamicRouter
+from instrument import QueryStats, enabled, instrument
+from hublabels import build_hub_labels, load_hub_labels, save_hub_labels
+from periodic import PeriodicSchedule, slot
+from report import bridges, schedule_report
+
+SCHEDULES = [sample_schedule_1, sample_schedule_2,
+             sample_schedule_3, sample_schedule_4]
+
+
+@pytest.mark.parametrize("make_schedule", SCHEDULES)
+def test_compiled_matches_hw4(
+        make_schedule: Callable[[], dict[str, Airport]]) -> None:
+    """
+    Checks that every query on the compiled schedule returns the same
+    result as the functions in hw4.py
+    """
+    airports = make_schedule()
+    compiled = CompiledSchedule(airports)
+
+    for origin in airports.values():
+        for time in TimeOfDay:
+            assert compiled.valid_flights(origin, time) == \
+                valid_flights(origin, time)
+            for destination in airports.values():
+                assert compiled.is_reachable(origin, destination, time) == \
+                    is_reachable(origin, destination, time)
+                assert compiled.best_itinerary(origin, destination, time) == \
+                    best_itinerary(origin, destination, time)
+
+
+def test_compiled_layout() -> None:
+    """
+    Checks the CSR layout of sample schedule 1
+    """
+    compiled = CompiledSchedule(sample_schedule_1())
+
+    assert compiled.num_airports == 4
+    assert compiled.num_flights == 7
+    assert compiled.codes == ["LAX", "LGA", "ORD", "SFO"]
+    assert len(compiled.offsets) == 4 * len(TimeOfDay) + 1
+
+    ord_id = compiled.airport_id("ORD")
+    edges = list(compiled.valid_edges(ord_id, TimeOfDay.MORNING))
+    assert [compiled.flights[e].code for e in edges] == ["UC0001", "UC0002"]
+
+
+def test_compiled_unknown_airport() -> None:
+    """
+    Checks that querying an airport that is not in the schedule fails
+    """
+    compiled = CompiledSchedule(sample_schedule_1())
+
+    with pytest.raises(ValueError):
+        compiled.airport_id("MDW")
+
+    with pytest.raises(ValueError):
+        compiled.is_reachable(Airport("Chicago Midway", "MDW"),
+                              Airport("Chicago O'Hare", "ORD"),
+                              TimeOfDay.MORNING)
+
+
+@pytest.mark.parametrize("make_schedule", SCHEDULES)
+@pytest.mark.parametrize("method", METHODS)
+def test_expanded_matches_hw4(
+        make_schedule: Callable[[], dict[str, Airport]], method: str) -> None:
+    """
+    Checks that every search method on the time-expanded graph finds
+    an itinerary with the same cost as hw4.best_itinerary
+    """
+    airports = make_schedule()
+    graph = TimeExpandedGraph(CompiledSchedule(airports))
+
+    for origin in airports.values():
+        for destination in airports.values():
+            for time in TimeOfDay:
+                expected = best_itinerary(origin, destination, time)
+                actual = graph.best_itinerary(origin, destination, time,
+                                              method)
+                if expected is None:
+                    assert actual is None
+                    continue
+
+                assert actual is not None
+                cost, flights = actual
+                assert cost == expected[0]
+                assert sum(f.cost for f in flights) == cost
+                codes = [f.code for f in flights]
+                assert process_itinerary(origin, time, codes) == destination
+
+
+def test_expanded_unknown_method() -> None:
+    """
+    Checks that an unknown search method is rejected
+    """
+    airports = sample_schedule_1()
+    graph = TimeExpandedGraph(CompiledSchedule(airports))
+
+    with pytest.raises(ValueError):
+        graph.best_itinerary(airports["ORD"], airports["SFO"],
+                             TimeOfDay.MORNING, "bfs")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_itinerary_matrix(workers: int) -> None:
+    """
+    Checks that a batch query on Schedule 3 returns the same results as
+    calling hw4.best_itinerary for every origin, destination, and time
+    """
+    airports = sample_schedule_3()
+    codes = sorted(airports)
+    matrix = itinerary_matrix(CompiledSchedule(airports), codes, codes,
+                              predecessors=True, workers=workers)
+
+    for origin in codes:
+        for destination in codes:
+            for time in TimeOfDay:
+                expected = best_itinerary(airports[origin],
+                                          airports[destination], time)
+                assert matrix.best_itinerary(origin, destination, time) == \
+                    expected
+                assert matrix.cost(origin, destination, time) == \
+                    (None if expected is None else expected[0])
+
+    assert len(matrix.costs(TimeOfDay.MORNING)) == len(codes)
+
+
+def test_itinerary_matrix_without_predecessors() -> None:
+    """
+    Checks that itineraries cannot be rebuilt (but costs are available)
+    if predecessors are not kept, and that queries outside the batch fail
+    """
+    airports = sample_schedule_1()
+    matrix = itinerary_matrix(CompiledSchedule(airports), ["ORD"], ["SFO"],
+                              [TimeOfDay.MORNING], workers=1)
+
+    assert matrix.cost("ORD", "SFO", TimeOfDay.MORNING) == 600
+
+    with pytest.raises(ValueError):
+        matrix.best_itinerary("ORD", "SFO", TimeOfDay.MORNING)
+
+    with pytest.raises(ValueError):
+        matrix.cost("ORD", "SFO", TimeOfDay.NIGHT)
+
+
+def test_itinerary_matrix_repeated_airports() -> None:
+    """
+    Checks that repeated origins and destinations each get their own
+    row and column
+    """
+    airports = sample_schedule_1()
+    matrix = itinerary_matrix(CompiledSchedule(airports),
+                              ["ORD", "LGA", "ORD"], ["SFO", "ORD", "SFO"],
+                              [TimeOfDay.MORNING], workers=1)
+    rows = matrix.costs(TimeOfDay.MORNING)
+    assert len(rows) == 3 and all(len(row) == 3 for row in rows)
+    assert rows[0] == rows[2] == [600, 0, 600]
+    assert rows[1][1] == matrix.cost("LGA", "ORD", TimeOfDay.MORNING)
+    assert matrix.costs(TimeOfDay.NIGHT) == []
+
+
+@pytest.mark.parametrize("make_schedule", SCHEDULES)
+def test_reachability_index(
+        make_schedule: Callable[[], dict[str, Airport]]) -> None:
+    """
+    Checks that the reachability index agrees with hw4.is_reachable
+    """
+    airports = make_schedule()
+    index = ReachabilityIndex(airports)
+
+    for origin in airports.values():
+        for time in TimeOfDay:
+            reachable = {code for code, destination in airports.items()
+                         if is_reachable(origin, destination, time)}
+            assert index.reachable_airports(origin, time) == reachable
+            for destination in airports.values():
+                assert index.is_reachable(origin, destination, time) == \
+                    (destination.code in reachable)
+
+
+def test_reachability_index_rebuild() -> None:
+    """
+    Checks that the reachability index is rebuilt after adding a flight
+    """
+    airports = sample_schedule_3()
+    index = ReachabilityIndex(airports)
+    msp, mia = airports["MSP"], airports["MIA"]
+
+    assert not index.is_reachable(msp, mia, TimeOfDay.MORNING)
+    assert not index.stale
+
+    # Changes to another schedule do not make the index stale
+    other = sample_schedule_3()
+    other["MSP"].add_flight(Flight(other["MSP"], other["MIA"], "UC", 9999,
+                                   TimeOfDay.AFTERNOON, 100))
+    assert not index.stale
+    schedule = index.schedule
+
+    msp.add_flight(Flight(msp, mia, "UC", 9999, TimeOfDay.AFTERNOON, 100))
+    assert index.stale
+    assert index.stale
+    assert index.schedule is schedule
+    assert index.is_reachable(msp, mia, TimeOfDay.MORNING)
+    assert not index.stale
+    assert index.schedule is not schedule
+    assert not index.is_reachable(msp, mia, TimeOfDay.EVENING)
+
+
+@pytest.mark.parametrize("make_schedule", SCHEDULES)
+def test_itinerary_cache(
+        make_schedule: Callable[[], dict[str, Airport]]) -> None:
+    """
+    Checks that the itinerary cache agrees with hw4.best_itinerary, and
+    that a single search is done per (origin, start time)
+    """
+    airports = make_schedule()
+    cache = ItineraryCache(airports)
+
+    for _ in range(2):
+        for origin in airports.values():
+            for time in TimeOfDay:
+                for destination in airports.values():
+                    assert cache.best_itinerary(origin, destination, time) \
+                        == best_itinerary(origin, destination, time)
+
+    info = cache.cache_info()
+    num_queries = len(airports) ** 2 * len(TimeOfDay)
+    assert info.misses == num_queries
+    assert info.hits == num_queries
+    assert info.tree_misses == len(airports) * len(TimeOfDay)
+    assert info.currsize == num_queries
+
+
+def test_itinerary_cache_eviction() -> None:
+    """
+    Checks that the cache stays within its maximum size, and evicts the
+    least recently used answers first
+    """
+    airports = sample_schedule_1()
+    cache = ItineraryCache(airports, maxsize=2, tree_maxsize=1)
+    ord_, lga, sfo = airports["ORD"], airports["LGA"], airports["SFO"]
+
+    cache.best_itinerary(ord_, lga, TimeOfDay.MORNING)
+    cache.best_itinerary(ord_, sfo, TimeOfDay.MORNING)
+    cache.best_itinerary(ord_, lga, TimeOfDay.MORNING)
+    cache.best_itinerary(lga, sfo, TimeOfDay.MORNING)
+    cache.best_itinerary(ord_, lga, TimeOfDay.MORNING)
+
+    info = cache.cache_info()
+    assert info.currsize == 2
+    assert info.tree_currsize == 1
+    assert (info.hits, info.misses) == (2, 3)
+    assert info.tree_misses == 2
+
+    # Trivial queries do not need a tree
+    assert cache.best_itinerary(sfo, sfo, TimeOfDay.MORNING) == (0, [])
+    info = cache.cache_info()
+    assert info.tree_misses == 2 and info.tree_hits == 1
+    with pytest.raises(ValueError):
+        cache.best_itinerary(sfo, Airport("Nowhere", "XXX"),
+                             TimeOfDay.MORNING)
+
+
+def test_itinerary_cache_invalidation() -> None:
+    """
+    Checks that cached answers are dropped after adding a flight
+    """
+    airports = sample_schedule_3()
+    cache = ItineraryCache(airports)
+    msp, mia = airports["MSP"], airports["MIA"]
+
+    assert cache.best_itinerary(msp, mia, TimeOfDay.MORNING) is None
+
+    other = sample_schedule_3()
+    other["MSP"].add_flight(Flight(other["MSP"], other["MIA"], "UC", 9999,
+                                   TimeOfDay.AFTERNOON, 100))
+    assert cache.best_itinerary(msp, mia, TimeOfDay.MORNING) is None
+    assert cache.cache_info().invalidations == 0
+    assert cache.cache_info().hits == 1
+
+    flight = Flight(msp, mia, "UC", 9999, TimeOfDay.AFTERNOON, 100)
+    msp.add_flight(flight)
+    assert cache.best_itinerary(msp, mia, TimeOfDay.MORNING) == \
+        best_itinerary(msp, mia, TimeOfDay.MORNING)
+    assert cache.cache_info().invalidations == 1
+
+
+@pytest.mark.parametrize("make_schedule", SCHEDULES)
+def test_alternative_itineraries(
+        make_schedule: Callable[[], dict[str, Airport]]) -> None:
+    """
+    Checks that the k cheapest and the Pareto optimal itineraries are
+    valid, sorted, and start with the cheapest itinerary
+    """
+    airports = make_schedule()
+    alternatives = AlternativeItineraries(CompiledSchedule(airports))
+
+    for origin in airports.values():
+        for destination in airports.values():
+            for time in TimeOfDay:
+                best = best_itinerary(origin, destination, time)
+                cheapest = alternatives.k_cheapest(origin, destination,
+                                                   time, 5)
+                pareto = alternatives.pareto(origin, destination, time)
+                if best is None:
+                    assert cheapest == [] and pareto == []
+                    continue
+
+                assert cheapest[0][0] == pareto[0][0] == best[0]
+                assert len(cheapest) <= 5
+                assert [cost for cost, _ in cheapest] == \
+                    sorted(cost for cost, _ in cheapest)
+                assert len({tuple(flights) for _, flights in cheapest}) == \
+                    len(cheapest)
+                for cost, flights in cheapest + pareto:
+                    assert sum(flight.cost for flight in flights) == cost
+                    assert process_itinerary(
+                        origin, time,
+                        [flight.code for flight in flights]) is destination
+
+                for (cost1, flights1), (cost2, flights2) in \
+                        zip(pareto, pareto[1:]):
+                    assert cost1 < cost2 and len(flights1) > len(flights2)
+
+
+def test_alternative_itineraries_sample() -> None:
+    """
+    Checks the alternatives from ORD to SFO in sample schedule 1
+    """
+    airports = sample_schedule_1()
+    alternatives = AlternativeItineraries(CompiledSchedule(airports))
+    ord_, sfo = airports["ORD"], airports["SFO"]
+
+    cheapest = alternatives.k_cheapest(ord_, sfo, TimeOfDay.MORNING, 3)
+    assert [(cost, [flight.code for flight in flights])
+            for cost, flights in cheapest] == [
+                (600, ["UC0001", "UC0004", "UC0006"]),
+                (5800, ["UC0001", "UC0004", "UC0005", "UC0003", "UC0006"]),
+                (5900, ["UC0001", "UC0004", "UC0005", "UC0004", "UC0006"])]
+
+    pareto = alternatives.pareto(ord_, sfo, TimeOfDay.MORNING)
+    assert [(cost, len(flights)) for cost, flights in pareto] == [(600, 3)]
+
+    with pytest.raises(ValueError):
+        alternatives.k_cheapest(ord_, sfo, TimeOfDay.MORNING, 0)
+
+
+def test_pareto_itineraries_tradeoff() -> None:
+    """
+    Checks that a direct flight is kept as an alternative to a cheaper
+    itinerary with a connection
+    """
+    ord_ = Airport("Chicago O'Hare", "ORD")
+    lga = Airport("New York LaGuardia", "LGA")
+    sfo = Airport("San Francisco", "SFO")
+    ord_.add_flight(Flight(ord_, sfo, "UC", 1, TimeOfDay.MORNING, 500))
+    ord_.add_flight(Flight(ord_, lga, "UC", 2, TimeOfDay.MORNING, 100))
+    lga.add_flight(Flight(lga, sfo, "UC", 3, TimeOfDay.AFTERNOON, 150))
+    airports = {"ORD": ord_, "LGA": lga, "SFO": sfo}
+    alternatives = AlternativeItineraries(CompiledSchedule(airports))
+
+    pareto = alternatives.pareto(ord_, sfo, TimeOfDay.MORNING)
+    assert [(cost, [flight.code for flight in flights])
+            for cost, flights in pareto] == [(250, ["UC0002", "UC0003"]),
+                                             (500, ["UC0001"])]
+
+
+def check_router(router: DynamicRouter, airports: dict[str, Airport]) -> None:
+    """
+    Checks that the router finds itineraries with the same cost as
+    hw4.best_itinerary (and that those itineraries are valid)
+    """
+    for origin in airports.values():
+        for destination in airports.values():
+            for time in TimeOfDay:
+                expected = best_itinerary(origin, destination, time)
+                actual = router.best_itinerary(origin, destination, time)
+                if expected is None:
+                    assert actual is None
+                    continue
+                assert actual is not None and actual[0] == expected[0]
+                assert process_itinerary(
+                    origin, time,
+                    [flight.code for flight in actual[1]]) is destination
+
+
+def test_dynamic_router() -> None:
+    """
+    Checks that the router stays correct as flights are added and
+    removed through it
+    """
+    airports = sample_schedule_3()
+    router = DynamicRouter(airports)
+    check_router(router, airports)
+    assert router.num_trees == len(airports) * len(TimeOfDay)
+
+    msp, mia, ord_ = airports["MSP"], airports["MIA"], airports["ORD"]
+    router.add_flight(Flight(msp, mia, "UC", 9999, TimeOfDay.AFTERNOON, 100))
+    check_router(router, airports)
+
+    for flight in sorted(ord_.flights)[:3]:
+        assert router.remove_flight(ord_, flight.code) is flight
+        check_router(router, airports)
+
+    # Replacing a flight with a cheaper one with the same code
+    flight = sorted(msp.flights)[0]
+    router.add_flight(Flight(msp, flight.destination, flight.airline,
+                             flight.flight_num, flight.departure_time, 1))
+    check_router(router, airports)
+    assert router.num_trees == len(airports) * len(TimeOfDay)
+
+    with pytest.raises(ValueError):
+        router.remove_flight(msp, "XX9999")
+
+
+def test_dynamic_router_repairs_locally() -> None:
+    """
+    Checks that removing a flight that is not in any tree does not
+    recompute anything, and that removing one that is only recomputes
+    the states below it
+    """
+    airports = sample_schedule_1()
+    router = DynamicRouter(airports)
+    ord_, lga, sfo = airports["ORD"], airports["LGA"], airports["SFO"]
+
+    assert router.best_itinerary(ord_, sfo, TimeOfDay.MORNING) is not None
+    # UC0007 arrives at ORD in the morning, where the tree starts
+    router.remove_flight(sfo, "UC0007")
+    assert router.last_repaired == 0
+
+    router.remove_flight(lga, "UC0004")
+    assert 0 < router.last_repaired < 4 * len(airports)
+    check_router(router, airports)
+
+
+def test_dynamic_router_external_change() -> None:
+    """
+    Checks that changes made without going through the router are
+    picked up
+    """
+    airports = sample_schedule_3()
+    router = DynamicRouter(airports)
+    msp, mia = airports["MSP"], airports["MIA"]
+
+    assert router.best_itinerary(msp, mia, TimeOfDay.MORNING) is None
+    router.best_itinerary(mia, msp, TimeOfDay.MORNING)
+    assert router.num_trees == 2
+
+    # Changes to another schedule keep the trees
+    other = sample_schedule_3()
+    other["MSP"].add_flight(Flight(other["MSP"], other["MIA"], "UC", 9999,
+                                   TimeOfDay.AFTERNOON, 100))
+    router.best_itinerary(msp, mia, TimeOfDay.MORNING)
+    assert router.num_trees == 2
+
+    msp.add_flight(Flight(msp, mia, "UC", 9999, TimeOfDay.AFTERNOON, 100))
+    router.best_itinerary(msp, mia, TimeOfDay.MORNING)
+    assert router.num_trees == 1
+    check_router(router, airports)
+
+
+def test_airport_departures() -> None:
+    """
+    Checks that the departures of an airport stay grouped by time of
+    day as flights are added, replaced, and removed
+    """
+    airports = sample_schedule_1()
+    ord_, lga = airports["ORD"], airports["LGA"]
+
+    for airport in airports.values():
+        for time in TimeOfDay:
+            assert set(airport.departures(time)) == \
+                {flight for flight in airport.flights
+                 if flight.departure_time == time}
+
+    morning = ord_.departures(TimeOfDay.MORNING)
+    assert [flight.code for flight in morning] == ["UC0001"]
+
+    ord_.add_flight(Flight(ord_, lga, "UC", 1, TimeOfDay.NIGHT, 100))
+    assert len(morning) == 0
+    assert [flight.code for flight in ord_.departures(TimeOfDay.NIGHT)] == \
+        ["UC0001"]
+
+    ord_.remove_flight("UC0001")
+    assert len(ord_.departures(TimeOfDay.NIGHT)) == 0
+    assert {flight.code for flight in ord_.flights} == {"UC0002"}
+
+
+def test_compact_objects() -> None:
+    """
+    Checks that airports and flights do not have a __dict__, and that
+    flight codes are built only once
+    """
+    airports = sample_schedule_1()
+    flight = airports["ORD"].get_flight_by_code("UC0001")
+
+    assert not hasattr(airports["ORD"], "__dict__")
+    assert not hasattr(flight, "__dict__")
+    assert flight.code == "UC0001"
+    assert flight.code is flight.code
+
+
+def test_instrumentation() -> None:
+    """
+    Checks the counters recorded by the instrumented searches
+    """
+    airports = sample_schedule_3()
+    compiled = CompiledSchedule(airports)
+    ord_, mia = airports["ORD"], airports["MIA"]
+    logged: list[QueryStats] = []
+
+    assert not enabled()
+    with instrument(logged.append, keep=True) as stats:
+        assert enabled()
+        best_itinerary(ord_, mia, TimeOfDay.MORNING)
+        with instrument() as inner:
+            is_reachable(ord_, mia, TimeOfDay.MORNING)
+            compiled.shortest_paths(compiled.airport_id("ORD"),
+                                    TimeOfDay.MORNING)
+    assert not enabled()
+
+    assert [query.function for query in logged] == \
+        ["best_itinerary", "is_reachable", "shortest_paths"]
+    assert stats.history == logged
+    assert stats.queries == 3 and inner.queries == 2
+    for query in logged:
+        assert query.settled > 0 and query.relaxed > 0
+        assert query.pops == query.settled + query.stale
+        assert query.pushes >= query.pops
+    assert stats.settled == sum(query.settled for query in logged)
+    assert set(stats.phases) == {"search", "path"}
+    assert stats.slowest in logged
+
+    best_itinerary(ord_, mia, TimeOfDay.MORNING)
+    assert stats.queries == 3
+
+
+@pytest.mark.parametrize("make_schedule", SCHEDULES)
+def test_hub_labels(make_schedule: Callable[[], dict[str, Airport]]) -> None:
+    """
+    Checks that the hub labels find itineraries with the same cost as
+    hw4.best_itinerary
+    """
+    airports = make_schedule()
+    labels = build_hub_labels(CompiledSchedule(airports))
+
+    for origin in airports.values():
+        for destination in airports.values():
+            for time in TimeOfDay:
+                expected = best_itinerary(origin, destination, time)
+                actual = labels.best_itinerary(origin, destination, time)
+                if expected is None:
+                    assert actual is None
+                    assert labels.cost(origin, destination, time) is None
+                    continue
+
+                assert actual is not None
+                cost, flights = actual
+                assert cost == expected[0]
+                assert labels.cost(origin, destination, time) == cost
+                assert sum(f.cost for f in flights) == cost
+                codes = [f.code for f in flights]
+                assert process_itinerary(origin, time, codes) == destination
+
+
+def test_hub_labels_save_load(tmp_path: Path) -> None:
+    """
+    Checks that saved hub labels can be loaded back, but only for the
+    schedule they were built from
+    """
+    airports = sample_schedule_3()
+    compiled = CompiledSchedule(airports)
+    labels = build_hub_labels(compiled)
+    path = str(tmp_path / "sample-3.labels")
+    save_hub_labels(labels, path)
+
+    loaded = load_hub_labels(CompiledSchedule(airports), path)
+    assert loaded.stats() == labels.stats()
+    assert loaded.stats().num_nodes == 90
+    assert loaded.best_itinerary(airports["ORD"], airports["MIA"],
+                                 TimeOfDay.MORNING) == \
+        labels.best_itinerary(airports["ORD"], airports["MIA"],
+                              TimeOfDay.MORNING)
+
+    with pytest.raises(ValueError):
+        load_hub_labels(CompiledSchedule(sample_schedule_1()), path)
+    with pytest.raises(ValueError):
+        load_hub_labels(compiled, "files/sample-3.csv")
+
+
+def periodic_arrivals(airports: dict[str, Airport], origin: Airport,
+                      start: int, days: int) -> dict[str, int]:
+    """
+    Finds the earliest slot at which every airport can be reached in a
+    periodic schedule, by going through the slots one at a time (the
+    slow way, used to check PeriodicSchedule).
+    """
+    arrivals = {origin.code: start}
+    for now in range(start, days * NUM_TIMES):
+        time = TimeOfDay(now % NUM_TIMES)
+        for code in [code for code, arrival in arrivals.items()
+                     if arrival <= now]:
+            for flight in airports[code].departures(time):
+                destination = flight.destination.code
+                if destination not in arrivals or \
+                        now + 1 < arrivals[destination]:
+                    arrivals[destination] = now + 1
+    return arrivals
+
+
+@pytest.mark.parametrize("make_schedule", SCHEDULES)
+@pytest.mark.parametrize("days", [1, 3])
+def test_periodic_schedule(make_schedule: Callable[[], dict[str, Airport]],
+                           days: int) -> None:
+    """
+    Checks the earliest itineraries in a periodic schedule
+    """
+    airports = make_schedule()
+    periodic = PeriodicSchedule(CompiledSchedule(airports), days)
+
+    for origin in airports.values():
+        for day in range(days):
+            for time in TimeOfDay:
+                start = slot(day, time)
+                expected = periodic_arrivals(airports, origin, start, days)
+                for destination in airports.values():
+                    actual = periodic.earliest_itinerary(origin, destination,
+                                                         time, day)
+                    if destination.code not in expected:
+                        assert actual is None
+                        continue
+
+                    assert actual is not None
+                    assert actual.arrival == expected[destination.code]
+                    assert actual.cost == \
+                        sum(leg.flight.cost for leg in actual.legs)
+
+                    airport, now = origin, start
+                    for leg in actual.legs:
+                        departure = slot(leg.day, leg.flight.departure_time)
+                        assert leg.flight.origin is airport
+                        assert now <= departure < days * NUM_TIMES
+                        airport, now = leg.flight.destination, departure + 1
+                    assert airport is destination
+                    assert now == actual.arrival
+
+
+def test_periodic_overnight() -> None:
+    """
+    Checks that a periodic schedule can wait overnight, which the
+    layover rule of hw4 does not allow
+    """
+    airports = sample_schedule_1()
+    ord_, lga = airports["ORD"], airports["LGA"]
+    periodic = PeriodicSchedule(CompiledSchedule(airports), 2)
+
+    assert best_itinerary(ord_, lga, TimeOfDay.EVENING) is None
+    itinerary = periodic.earliest_itinerary(ord_, lga, TimeOfDay.EVENING)
+    assert itinerary is not None
+    assert [(leg.day, leg.flight.code) for leg in itinerary.legs] == \
+        [(1, "UC0001")]
+    assert itinerary.arrival == slot(1, TimeOfDay.AFTERNOON)
+
+    assert PeriodicSchedule(CompiledSchedule(airports), 1) \
+        .earliest_itinerary(ord_, lga, TimeOfDay.EVENING) is None
+    with pytest.raises(ValueError):
+        PeriodicSchedule(CompiledSchedule(airports), 0)
+    with pytest.raises(ValueError):
+        periodic.earliest_itinerary(ord_, lga, TimeOfDay.MORNING, 2)
+
+
+@pytest.mark.parametrize("make_schedule", SCHEDULES)
+def test_schedule_report(
+        make_schedule: Callable[[], dict[str, Airport]]) -> None:
+    """
+    Checks the unreachable airports and the strongly connected
+    components in the report of a schedule
+    """
+    airports = make_schedule()
+    report = schedule_report(airports)
+
+    for time in TimeOfDay:
+        for origin in airports.values():
+            unreachable = report.unreachable[time].get(origin.code, [])
+            assert unreachable == sorted(unreachable)
+            for destination in airports.values():
+                assert (destination.code in unreachable) == \
+                    (not is_reachable(origin, destination, time))
+
+    compiled = CompiledSchedule(airports)
+
+    def reachable_states(state: int) -> set[int]:
+        seen = {state}
+        pending = [state]
+        while pending:
+            airport_id, time = divmod(pending.pop(), NUM_TIMES)
+            for edge in compiled.valid_edges(airport_id, TimeOfDay(time)):
+                if compiled.arrivals[edge] not in seen:
+                    seen.add(compiled.arrivals[edge])
+                    pending.append(compiled.arrivals[edge])
+        return seen
+
+    states = [[compiled.airport_id(code) * NUM_TIMES + time
+               for code, time in component]
+              for component in report.components]
+    assert sorted(state for component in states for state in component) \
+        == list(range(compiled.num_states))
+    for component in states:
+        for state in component:
+            reach = reachable_states(state)
+            assert set(component) <= reach
+            for other in reach - set(component):
+                assert state not in reachable_states(other)
+
+
+def test_schedule_report_bridges() -> None:
+    """
+    Checks the bridges in the report of a schedule
+    """
+    # 0 -> 1 is a bridge, 1 -> 2 and 2 -> 1 are parallel edges
+    assert bridges(4, [0, 1, 2, 3], [1, 2, 1, 3]) == [0]
+
+    report = schedule_report(sample_schedule_3())
+    assert [flight.code for flight in report.bridges] == ["UC2093"]
+    assert "UC2093" in [flight.code for flight in report.critical]
+    assert schedule_report(sample_schedule_1()).bridges == []
+
+
+@pytest.mark.parametrize("make_schedule", SCHEDULES)
+def test_schedule_report_critical(
+        make_schedule: Callable[[], dict[str, Airport]]) -> None:
+    """
+    Checks the critical flights in the report of a schedule against
+    cancelling every flight in turn
+    """
+    airports = make_schedule()
+    report = schedule_report(airports)
+
+    def reachable_pairs() -> set[tuple[str, str, TimeOfDay]]:
+        return {(origin.code, destination.code, time)
+                for origin in airports.values()
+                for destination in airports.values()
+                for time in TimeOfDay
+                if is_reachable(origin, destination, time)}
+
+    before = reachable_pairs()
+    expected = []
+    for flight in sorted({flight for airport in airports.values()
+                          for flight in airport.flights}):
+        flight.origin.remove_flight(flight.code)
+        if reachable_pairs() != before:
+            expected.append(flight.code)
+        flight.origin.add_flight(flight)
+
+    assert [flight.code for flight in report.critical] == expected
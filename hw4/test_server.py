@@ -0,0 +1,146 @@
+"""
+Tests for the query server
+"""
+import asyncio
+import json
+import os
+import tempfile
+from typing import Any
+
+import pytest
+
+from flights import TimeOfDay
+from hw4 import best_itinerary, is_reachable, load_flights, process_itinerary
+from server import QueryServer
+
+SCHEDULE = "files/sample-1.csv"
+
+
+def run_requests(requests: list[Any], workers: int) -> dict[Any, Any]:
+    """
+    Starts a server on sample-1.csv, sends all the requests on one
+    connection (without waiting for the responses), and collects the
+    responses.
+
+    Returns: Dictionary mapping request ids to responses
+    """
+    airports = load_flights(SCHEDULE)
+    assert airports is not None
+
+    async def session() -> list[dict[str, Any]]:
+        server = QueryServer(SCHEDULE, airports, workers)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "server.sock")
+            await server.start(path)
+            try:
+                reader, writer = await asyncio.open_unix_connection(path)
+                for request in requests:
+                    line = request if isinstance(request, str) \
+                        else json.dumps(request)
+                    writer.write(line.encode() + b"\n")
+                await writer.drain()
+                writer.write_eof()
+                responses = [json.loads(line)
+                             async for line in reader]
+                writer.close()
+                await writer.wait_closed()
+            finally:
+                await server.close()
+            assert not os.path.exists(path)
+        return responses
+
+    responses = asyncio.run(session())
+    assert len(responses) == len(requests)
+    return {response["id"]: response for response in responses}
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_server_matches_hw4(workers: int) -> None:
+    """
+    Checks that every query on Schedule 1 gets the same answer from the
+    server as from the functions in hw4.py
+    """
+    airports = load_flights(SCHEDULE)
+    assert airports is not None
+
+    requests: list[Any] = []
+    expected: list[Any] = []
+    for origin in airports.values():
+        for time in TimeOfDay:
+            for flight in sorted(origin.flights):
+                requests.append({"id": len(requests),
+                                 "query": "process_itinerary",
+                                 "origin": origin.code, "start": time.name,
+                                 "flights": [flight.code]})
+                destination = process_itinerary(origin, time, [flight.code])
+                expected.append(None if destination is None
+                                else destination.code)
+
+            for destination in airports.values():
+                requests.append({"id": len(requests),
+                                 "query": "is_reachable",
+                                 "origin": origin.code,
+                                 "destination": destination.code,
+                                 "start": time.name})
+                expected.append(is_reachable(origin, destination, time))
+
+                requests.append({"id": len(requests),
+                                 "query": "best_itinerary",
+                                 "origin": origin.code,
+                                 "destination": destination.code,
+                                 "start": time.name})
+                itinerary = best_itinerary(origin, destination, time)
+                expected.append(None if itinerary is None else
+                                {"cost": itinerary[0],
+                                 "flights": [flight.code
+                                             for flight in itinerary[1]]})
+
+    responses = run_requests(requests, workers)
+    for request_id, result in enumerate(expected):
+        assert responses[request_id] == {"id": request_id, "result": result}
+
+
+def test_server_errors() -> None:
+    """
+    Checks that invalid requests get an error (and do not stop the
+    server from answering the requests after them)
+    """
+    requests: list[Any] = [
+        "not json",
+        {"id": 1, "query": "cheapest_flight", "origin": "ORD",
+         "destination": "SFO", "start": "MORNING"},
+        {"id": 2, "query": "is_reachable", "origin": "MDW",
+         "destination": "SFO", "start": "MORNING"},
+        {"id": 3, "query": "best_itinerary", "origin": "ORD",
+         "destination": "SFO", "start": "LUNCHTIME"},
+        {"id": 4, "query": "process_itinerary", "origin": "ORD",
+         "start": "MORNING", "flights": "UC0001"},
+        {"id": 5, "query": "is_reachable", "origin": [],
+         "destination": "ORD", "start": "MORNING"},
+        {"id": 6, "query": "best_itinerary", "origin": "ORD",
+         "destination": {}, "start": "MORNING"},
+        {"id": 7, "query": "best_itinerary", "origin": "ORD",
+         "destination": "SFO", "start": "MORNING"},
+    ]
+    responses = run_requests(requests, workers=1)
+
+    assert "error" in responses[None]
+    for request_id in range(1, 7):
+        assert "error" in responses[request_id]
+        assert "result" not in responses[request_id]
+    assert responses[7]["result"]["cost"] == 600
+
+
+def test_server_internal_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Checks that an unexpected exception while answering a query is
+    sent back as an error (instead of leaving the client waiting)
+    """
+    def fail(*_: Any) -> Any:
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr("server.answer_query", fail)
+    responses = run_requests(
+        [{"id": 1, "query": "is_reachable", "origin": "ORD",
+          "destination": "SFO", "start": "MORNING"}], workers=0)
+    assert responses[1] == {"id": 1, "error": "internal error: RuntimeError"}
@@ -1,12 +1,173 @@
 """
 CMSC 14200, Winter 2024
 Homework #4
+
+Usage:
+    python3 tui.py SCHEDULE
+    python3 tui.py SCHEDULE --serve SOCKET [--workers N]
+
+The first form runs the interactive TUI. The second one loads the
+schedule once and answers queries over a Unix socket (see server.py).
 """
 
 import sys
+from typing import Optional
+
 from flights import Airport, Flight, TimeOfDay
 from hw4 import process_itinerary, is_reachable, best_itinerary, load_flights
 
-#
-# Implement your TUI here
-#
+ERROR = "Error"
+
+
+def parse_time(token: str) -> Optional[TimeOfDay]:
+    """
+    Parses a time of day written as @NAME (e.g., @MORNING)
+
+    Returns: The time of day, or None if the token is not valid
+    """
+    if not token.startswith("@") or token[1:] not in TimeOfDay.__members__:
+        return None
+    return TimeOfDay[token[1:]]
+
+
+def parse_route(airports: dict[str, Airport], route: str, separator: str) \
+        -> Optional[tuple[Airport, Airport]]:
+    """
+    Parses a route written as ORIGIN<separator>DESTINATION
+
+    Returns: The origin and destination airports, or None if the route
+      is not valid
+    """
+    codes = route.split(separator)
+    if len(codes) != 2 or not all(code in airports for code in codes):
+        return None
+    return airports[codes[0]], airports[codes[1]]
+
+
+def format_itinerary(itinerary: tuple[int, list[Flight]]) -> list[str]:
+    """
+    Returns: The lines printed for a best itinerary (one per flight,
+      followed by the total cost)
+    """
+    cost, flights = itinerary
+    return [str(flight) for flight in flights] + [f"TOTAL: ${cost}"]
+
+
+def run_command(airports: dict[str, Airport], command: str) -> list[str]:
+    """
+    Runs a single TUI command.
+
+    Args:
+        airports: Dictionary mapping airport codes to Airport objects
+        command: The command, in one of these forms:
+          CODE?                  (flights departing from an airport)
+          CODE CODE/.../CODE @T  (check an itinerary)
+          ORIGIN??DEST @T        (check whether DEST is reachable)
+          ORIGIN>>DEST @T        (find the cheapest itinerary)
+
+    Returns: The lines to print
+    """
+    tokens = command.split()
+
+    if len(tokens) == 1 and tokens[0].endswith("?"):
+        code = tokens[0][:-1]
+        if code not in airports:
+            return [ERROR]
+        return [str(flight) for flight in sorted(airports[code].flights)]
+
+    if len(tokens) == 2:
+        start = parse_time(tokens[1])
+        if start is None:
+            return [ERROR]
+
+        if "??" in tokens[0]:
+            route = parse_route(airports, tokens[0], "??")
+            if route is None:
+                return [ERROR]
+            if is_reachable(*route, start):
+                return ["OK"]
+            return ["NOT REACHABLE"]
+
+        if ">>" in tokens[0]:
+            route = parse_route(airports, tokens[0], ">>")
+            if route is None:
+                return [ERROR]
+            itinerary = best_itinerary(*route, start)
+            if itinerary is None:
+                return ["NOT FEASIBLE"]
+            return format_itinerary(itinerary)
+
+    if len(tokens) == 3:
+        start = parse_time(tokens[2])
+        if start is None or tokens[0] not in airports:
+            return [ERROR]
+        destination = process_itinerary(airports[tokens[0]], start,
+                                        tokens[1].split("/"))
+        if destination is None:
+            return ["NOT VALID"]
+        return [f"{destination.name} ({destination.code})"]
+
+    return [ERROR]
+
+
+def tui(airports: dict[str, Airport]) -> None:
+    """
+    Runs the interactive TUI until the EXIT command (or the end of
+    the input)
+    """
+    print("WELCOME TO THE TRAVEL AGENT 3000")
+    while True:
+        try:
+            command = input("> ").strip()
+        except EOFError:
+            break
+        if command == "EXIT":
+            break
+        for line in run_command(airports, command):
+            print(line)
+
+
+def main(args: list[str]) -> int:
+    """
+    Runs the TUI (or the server) with the given command-line arguments
+
+    Returns: The exit status
+    """
+    usage = "Usage: python3 tui.py SCHEDULE [--serve SOCKET [--workers N]]"
+    if not args or len(args) not in (1, 3, 5):
+        print(usage, file=sys.stderr)
+        return 1
+
+    options = dict(zip(args[1::2], args[2::2]))
+    if not set(options) <= {"--serve", "--workers"} or \
+            ("--workers" in options and "--serve" not in options):
+        print(usage, file=sys.stderr)
+        return 1
+
+    airports = load_flights(args[0])
+    if airports is None:
+        print(f"Could not load schedule: {args[0]}", file=sys.stderr)
+        return 1
+
+    if "--serve" in options:
+        # Imported here, so that the TUI does not have to load asyncio
+        # pylint: disable-next=import-outside-toplevel
+        from server import run_server
+
+        try:
+            workers = int(options["--workers"]) \
+                if "--workers" in options else None
+        except ValueError:
+            workers = -1
+        if workers is not None and workers < 0:
+            print(usage, file=sys.stderr)
+            return 1
+        run_server(args[0], airports, options["--serve"], workers)
+        return 0
+
+    tui(airports)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))